@@ -1,4 +1,5 @@
 from django.contrib import admin
+from apps.core.pagination import EstimatedCountPaginator
 from apps.account.models import User, Address, CodeDiscount, UserAuth, Profile, Role
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
@@ -106,8 +107,10 @@ class ProfileInline(admin.StackedInline):
 class UserAuthModelAdmin(admin.ModelAdmin):
     """Admin configuration for UserAuth model."""
     list_display = ['user_id', 'token_type', 'uuid', 'create_time', 'update_time', 'is_active', 'is_deleted']
-    list_filter = ['user_id', 'token_type', 'is_active']
+    list_filter = ['token_type', 'is_active']
     search_fields = ['user_id', 'token_type', 'is_active']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ('create_time', 'update_time', 'is_active', 'is_deleted')
     ordering = ['-create_time']
     date_hierarchy = 'create_time'
@@ -133,6 +136,7 @@ class RoleAdmin(admin.ModelAdmin):
     """Admin configuration for Role model."""
     list_display = ['code_discount', 'golden', 'silver', 'bronze',
                     'create_time', 'update_time', 'is_active', 'is_deleted']
+    list_select_related = ['code_discount', 'golden', 'silver', 'bronze']
     list_filter = ['code_discount', 'golden', 'silver', 'bronze', 'create_time', 'is_active']
     readonly_fields = ('create_time', 'update_time', 'is_active', 'is_deleted')
     ordering = ['-create_time']
@@ -160,6 +164,7 @@ class ProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'name', 'last_name', 'gender', 'age', 'profile_picture', 'create_time', 'update_time',
                     'is_active',
                     'is_deleted']
+    list_select_related = ['user']
     list_filter = ['user__username', 'name', 'age']
     search_fields = ['user__username', 'name', 'age', 'create_time', 'is_active']
     readonly_fields = ('is_deleted', 'create_time', 'update_time', 'is_active')
@@ -222,6 +227,7 @@ class AddressAdmin(admin.ModelAdmin):
 
     list_display = ['user', 'address_name', 'country', 'city',
                     'street', 'is_deleted', 'is_active']
+    list_select_related = ['user']
     list_filter = ['user__username', 'address_name', 'city']
     search_fields = ['user__username', 'address_name', 'city']
     readonly_fields = ('create_time', 'update_time', 'is_deleted', 'is_active')
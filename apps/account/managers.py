@@ -52,29 +52,17 @@ class UserAuthQuerySet(models.QuerySet):
     pass
 
 
-class UserAuthManager(models.Manager):
+class UserAuthManager(models.Manager.from_queryset(UserAuthQuerySet)):
     """Manager for handling address operations."""
 
-    def get_queryset(self):
-        """Get the queryset object associated with this manager."""
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = UserAuthQuerySet(self.model)
-        return self.__queryset
-
 
 class ProfileQuerySet(models.QuerySet):
     pass
 
 
-class ProfileManager(models.Manager):
+class ProfileManager(models.Manager.from_queryset(ProfileQuerySet)):
     """Manager for handling address operations."""
 
-    def get_queryset(self):
-        """Get the queryset object associated with this manager."""
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = UserAuthQuerySet(self.model)
-        return self.__queryset
-
 
 class AddressQuerySet(models.QuerySet):
     """QuerySet for handling address operations."""
@@ -109,15 +97,9 @@ class AddressQuerySet(models.QuerySet):
         return self.create(user=user, **kwargs)
 
 
-class AddressManager(models.Manager):
+class AddressManager(models.Manager.from_queryset(AddressQuerySet)):
     """Manager for handling address operations."""
 
-    def get_queryset(self):
-        """Get the queryset object associated with this manager."""
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = AddressQuerySet(self.model)
-        return self.__queryset
-
     def active_addresses(self):
         """Retrieve active addresses."""
         return self.get_queryset().active_addresses()
@@ -147,12 +129,8 @@ class RoleQuerySet(models.QuerySet):
     pass
 
 
-class RoleManager(models.Manager):
-    def get_queryset(self):
-        """Get the queryset object associated with this manager."""
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = RoleQuerySet(self.model)
-        return self.__queryset
+class RoleManager(models.Manager.from_queryset(RoleQuerySet)):
+    pass
 
 
 class CodeDiscountQuerySet(models.QuerySet):
@@ -229,13 +207,7 @@ class CodeDiscountQuerySet(models.QuerySet):
         return self.filter(percentage_discount__gt=value)
 
 
-class CodeDiscountManager(models.Manager):
-    def get_queryset(self):
-        """Get the queryset object associated with this manager."""
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = CodeDiscountQuerySet(self.model)
-        return self.__queryset
-
+class CodeDiscountManager(models.Manager.from_queryset(CodeDiscountQuerySet)):
     @property
     def is_expired(self):
         """
@@ -177,6 +177,7 @@ class Profile(mixin_model.TimestampsStatusFlagMixin):
         max_length=255, blank=True, null=True,
         validators=[validators.PictureValidator()], verbose_name=_('Profile Picture')
     )
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)  # see apps.core.images
     objects = managers.ProfileManager()
     soft_delete = soft_delete_manager.DeleteManager()
 
@@ -1,6 +1,8 @@
 from django.test import TestCase
 from apps.account.models import Address, CodeDiscount, UserAuth
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from apps.core import authz
 from datetime import date
 from datetime import datetime, timedelta
 import uuid
@@ -400,3 +402,22 @@ class CodeDiscountModelTestCase(TestCase):
         )
         # Assert that the discount code has not been used
         self.assertFalse(unused_discount_code.is_use)
+
+
+class TestAuthzSnapshot(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="seller", email="seller@example.com", phone_number="09120000000")
+        self.group = Group.objects.create(name="Seller")
+
+    def test_snapshot_follows_group_membership(self):
+        self.assertFalse(authz.get_snapshot(self.user).is_seller)
+        self.user.groups.add(self.group)
+        self.assertTrue(authz.get_snapshot(self.user).is_seller)
+        self.group.user_set.remove(self.user)
+        self.assertFalse(authz.get_snapshot(self.user).is_seller)
+
+    def test_snapshot_is_cached(self):
+        authz.get_snapshot(self.user)
+        with self.assertNumQueries(0):
+            authz.get_snapshot(self.user)
@@ -45,6 +45,7 @@ class DiscountCodCreateView(CRUD.AdminPermissionRequiredMixinView):
 
 class DiscountCodUpdateView(CRUD.AdminPermissionRequiredMixinView):
     """View for updating an existing discount code."""
+    instance_models = {'discount_code_instance': CodeDiscount}
 
     def setup(self, request, *args, **kwargs):
         """Initialize form class and template."""
@@ -95,8 +96,7 @@ class AdminDiscountCodDetailView(CRUD.AdminPermissionRequiredMixinView, generic.
         if self.request.user.is_superuser or self.request.user.is_staff:
             context['admin_discount_cod'] = discount_cods
             return context
-        if self.request.user.is_superuser or self.request.user.is_staff or self.request.user.groups.filter(
-                name='Supervisor').exists():
+        if self.request.authz.is_admin_or_staff or self.request.authz.is_supervisor:
             context['supervisor_discount_cod'] = discount_cods
             return context
 
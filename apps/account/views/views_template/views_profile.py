@@ -6,8 +6,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse_lazy
 from django.views.generic import DetailView
 from apps.core.mixin.mixin_views_template import HttpsOptionNotLogoutMixin as MustBeLogingCustomView
-from apps.order.models import Order, OrderItem
-from apps.product.models import Product
+from apps.order.models import Order, OrderLine
 
 
 class ProfileCreateView(MustBeLogingCustomView):
@@ -130,14 +129,9 @@ class ProfileDetailView(MustBeLogingCustomView, DetailView):
             Q(seller=self.request.user)
         ).values_list('code_discount', flat=True)
         code_discounts = forms.CodeDiscount.objects.filter(id__in=user_cods_discount)
-        orders = Order.objects.filter(order_item__user=self.request.user).distinct()
-        products = Product.objects.all()
-        order_items = OrderItem.objects.filter(order_items__order_item__product__in=
-                                               products.all())
-        unique_product_names = set()
-        for order_item in order_items:
-            if order_item.user == self.request.user:
-                unique_product_names.add(order_item.product.name)
+        orders = Order.objects.filter(address__user=self.request.user).with_totals()
+        unique_product_names = OrderLine.objects.filter(order__address__user=self.request.user).values_list(
+            'product_name', flat=True).order_by('product_name').distinct()
         name_product_in_order = ','.join(unique_product_names)
         context['name_product_in_order'] = name_product_in_order
         context['cods_discount'] = code_discounts
@@ -79,8 +79,7 @@ class AdminRoleListView(CRUD.AdminPermissionRequiredMixinView, generic.ListView)
         if self.request.user.is_superuser or self.request.user.is_staff:
             context['admin_role'] = roles
             return context
-        if self.request.user.is_superuser or self.request.user.is_staff or self.request.user.groups.filter(
-                name='Supervisor').exists():
+        if self.request.authz.is_admin_or_staff or self.request.authz.is_supervisor:
             context['supervisor_role'] = roles
             return context
 
@@ -137,6 +136,7 @@ class RoleUpdateView(CRUD.AdminPermissionRequiredMixinView):
     - get: Handles GET request for role update page.
     - post: Handles POST request for updating a role.
     """
+    instance_models = {'role_instance': forms.Role}
 
     def setup(self, request, *args, **kwargs):
         """Initialize the success_url."""
@@ -0,0 +1,34 @@
+from django.contrib import admin, messages
+from apps.core import cascade
+from apps.core.models import SoftDeleteOperation
+
+
+@admin.register(SoftDeleteOperation)
+class SoftDeleteOperationAdmin(admin.ModelAdmin):
+    """
+    Admin panel configuration for SoftDeleteOperation model; shows the progress of cascading soft deletes
+    and undoes them.
+    """
+    list_display = ('id', 'action', 'model_label', 'object_ids', 'status', 'processed', 'user', 'create_time',
+                    'update_time')
+    list_filter = ('action', 'status')
+    list_select_related = ('user',)
+    ordering = ('-create_time',)
+    list_per_page = 30
+    readonly_fields = ('action', 'model_label', 'object_ids', 'status', 'processed', 'error', 'undo_of', 'user',
+                       'create_time', 'update_time')
+    actions = ('undo_operations',)
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Undo selected soft deletes')
+    def undo_operations(self, request, queryset):
+        """
+        Queue the undo of every selected finished delete operation.
+        """
+        queued = 0
+        for operation in queryset.filter(action=SoftDeleteOperation.DELETE, status=SoftDeleteOperation.DONE):
+            cascade.undelete(operation, user=request.user)
+            queued += 1
+        messages.success(request, f'{queued} undo operation(s) queued.', extra_tags='success')
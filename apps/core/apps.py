@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.core'
+
+    def ready(self):
+        """
+        Connect the signal handlers that invalidate the per-user authorization snapshots
+        and queue the image derivatives of new uploads.
+        """
+        from apps.core import authz, images  # noqa
+        images.connect()
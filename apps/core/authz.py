@@ -0,0 +1,153 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from apps.core import versioning
+
+User = get_user_model()
+
+SELLER_GROUP = 'Seller'
+SUPERVISOR_GROUP = 'Supervisor'
+AUTHZ_VERSION_KEY = 'authz:version'
+AUTHZ_CACHE_TIMEOUT = 60 * 60
+
+
+class AuthzSnapshot:
+    """
+    Compact, read-only view of what a user may do: group names, permission codenames and role flags.
+    Built once per permissions version and shared through the cache, so checks cost no queries.
+    """
+
+    def __init__(self, user_id=None, groups=(), permissions=(), is_active=False, is_superuser=False,
+                 is_staff=False, is_admin=False):
+        self.user_id = user_id
+        self.groups = frozenset(groups)
+        self.permissions = frozenset(permissions)
+        self.is_active = is_active
+        self.is_superuser = is_superuser
+        self.is_staff = is_staff
+        self.is_admin = is_admin
+
+    @property
+    def is_authenticated(self):
+        return self.user_id is not None
+
+    @property
+    def is_admin_or_staff(self):
+        """Superusers and staff members."""
+        return self.is_superuser or self.is_staff
+
+    @property
+    def is_seller(self):
+        return SELLER_GROUP in self.groups
+
+    @property
+    def is_supervisor(self):
+        return SUPERVISOR_GROUP in self.groups
+
+    def in_group(self, name):
+        return name in self.groups
+
+    def has_perm(self, perm):
+        """Same answer as User.has_perm for active users, without touching the database."""
+        if not self.is_active:
+            return False
+        return self.is_superuser or perm in self.permissions
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'groups': sorted(self.groups),
+            'permissions': sorted(self.permissions),
+            'is_active': self.is_active,
+            'is_superuser': self.is_superuser,
+            'is_staff': self.is_staff,
+            'is_admin': self.is_admin,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    @classmethod
+    def from_user(cls, user):
+        """Compute the snapshot from the database."""
+        return cls(
+            user_id=user.pk,
+            groups=user.groups.values_list('name', flat=True),
+            permissions=user.get_all_permissions(),
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            is_staff=user.is_staff,
+            is_admin=getattr(user, 'is_admin', False),
+        )
+
+
+ANONYMOUS = AuthzSnapshot()
+
+
+def user_version_key(user_id):
+    return f'{AUTHZ_VERSION_KEY}:{user_id}'
+
+
+def get_snapshot(user):
+    """
+    Return the authorization snapshot of `user`, from the cache when the permissions version allows it.
+    The key combines the global version (group permissions) and the user's own version (groups,
+    direct permissions, flags), so any change makes the old snapshot unreachable.
+    """
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS
+    global_version, user_version = versioning.get_versions(AUTHZ_VERSION_KEY, user_version_key(user.pk))
+    key = f'authz:{global_version}:{user.pk}:{user_version}'
+    data = cache.get(key)
+    if data is None:
+        data = AuthzSnapshot.from_user(user).to_dict()
+        cache.set(key, data, AUTHZ_CACHE_TIMEOUT)
+    return AuthzSnapshot.from_dict(data)
+
+
+def invalidate_user(user_id):
+    versioning.bump_version(user_version_key(user_id))
+
+
+def invalidate_all():
+    versioning.bump_version(AUTHZ_VERSION_KEY)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_on_user_relations_change(sender, instance, action, reverse, pk_set, **kwargs):  # noqa
+    """
+    Groups or direct permissions of a user changed.
+    From the user side only that user is affected; from the group/permission side every user in pk_set.
+    """
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_user(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            invalidate_user(user_id)
+    else:
+        invalidate_all()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_on_group_permissions_change(sender, action, **kwargs):  # noqa
+    """The permissions of a group changed; every member may be affected."""
+    if action.startswith('post_'):
+        invalidate_all()
+
+
+@receiver(post_delete, sender=Group)
+def invalidate_on_group_delete(sender, **kwargs):  # noqa
+    invalidate_all()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_on_user_change(sender, instance, **kwargs):  # noqa
+    """The active/staff/superuser/admin flags live on the user row."""
+    invalidate_user(instance.pk)
@@ -0,0 +1,148 @@
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from apps.core.models import SoftDeleteOperation, SoftDeleteOperationRow
+
+# Models list the reverse relations their soft delete spreads to in `soft_delete_cascade`,
+# e.g. Product.soft_delete_cascade = ('media_products', 'product_code_discounts', ...).
+CASCADE_ATTRIBUTE = 'soft_delete_cascade'
+
+
+def chunk_size():
+    return getattr(settings, 'SOFT_DELETE_CHUNK_SIZE', 500)
+
+
+def cascade_relations(model):
+    """
+    Yield (related model, foreign key column) for every relation declared in `model.soft_delete_cascade`.
+    """
+    for name in getattr(model, CASCADE_ATTRIBUTE, ()):
+        relation = model._meta.get_field(name)  # noqa
+        yield relation.related_model, relation.field.attname
+
+
+def flag(operation, model, rows):
+    """
+    Soft delete one chunk of (pk, is_active) rows and record them on the operation, in a short transaction.
+    Returns the primary keys flagged.
+    """
+    pks = [pk for pk, _ in rows]
+    with transaction.atomic():
+        SoftDeleteOperationRow.objects.bulk_create([
+            SoftDeleteOperationRow(operation=operation, model_label=model._meta.label, object_id=pk,  # noqa
+                                   was_active=is_active)
+            for pk, is_active in rows
+        ])
+        model.soft_delete.filter(pk__in=pks).delete()
+        SoftDeleteOperation.objects.filter(pk=operation.pk).update(processed=F('processed') + len(pks))
+    return pks
+
+
+def live_rows(model, **lookups):
+    """
+    Iterate the (pk, is_active) rows of `model` matching `lookups` that are not deleted yet, one chunk at a time.
+    Chunks are read by primary key ranges, so each query only touches the next `chunk_size()` rows.
+    """
+    last_pk = None
+    while True:
+        queryset = model._base_manager.filter(is_deleted=False, **lookups)  # noqa
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        rows = list(queryset.order_by('pk').values_list('pk', 'is_active')[:chunk_size()])
+        if not rows:
+            return
+        yield rows
+        last_pk = rows[-1][0]
+
+
+def descend(operation, model, pks, progress=None):
+    """
+    Soft delete the rows depending on `pks` of `model`, depth first and chunk by chunk.
+    """
+    for related_model, column in cascade_relations(model):
+        for rows in live_rows(related_model, **{f'{column}__in': pks}):
+            flagged = flag(operation, related_model, rows)
+            if progress is not None:
+                progress(len(flagged))
+            descend(operation, related_model, flagged, progress)
+
+
+def soft_delete(model, pks, user=None):
+    """
+    Soft delete rows of `model` at once and queue the cascade to their dependent rows.
+    Returns the SoftDeleteOperation; the root rows leave the storefront before the request ends.
+    """
+    from apps.core.tasks import run_soft_delete_operation
+    pks = list(pks)
+    operation = SoftDeleteOperation.objects.create(
+        action=SoftDeleteOperation.DELETE, model_label=model._meta.label, object_ids=pks, user=user)  # noqa
+    for rows in live_rows(model, pk__in=pks):
+        flag(operation, model, rows)
+    transaction.on_commit(lambda: run_soft_delete_operation.delay(operation.pk))
+    return operation
+
+
+def undelete(operation, user=None):
+    """
+    Queue the undo of a finished delete operation. Returns the new undelete operation.
+    """
+    from apps.core.tasks import run_soft_delete_operation
+    if operation.action != SoftDeleteOperation.DELETE or operation.status != SoftDeleteOperation.DONE:
+        raise ValueError(f'Only finished delete operations can be undone, got {operation}.')
+    undo = SoftDeleteOperation.objects.create(
+        action=SoftDeleteOperation.UNDELETE, model_label=operation.model_label, object_ids=operation.object_ids,
+        undo_of=operation, user=user)
+    transaction.on_commit(lambda: run_soft_delete_operation.delay(undo.pk))
+    return undo
+
+
+def restore(operation, progress=None):
+    """
+    Undelete the rows recorded by the operation being undone, chunk by chunk, parents before their children.
+    """
+    recorded = operation.undo_of.rows.all()
+    last_pk = 0
+    while True:
+        rows = list(recorded.filter(pk__gt=last_pk).order_by('pk').values_list(
+            'pk', 'model_label', 'object_id', 'was_active')[:chunk_size()])
+        if not rows:
+            return
+        last_pk = rows[-1][0]
+        groups = {}
+        for _, model_label, object_id, was_active in rows:
+            groups.setdefault((model_label, was_active), []).append(object_id)
+        with transaction.atomic():
+            for (model_label, was_active), pks in groups.items():
+                apps.get_model(model_label).soft_delete.filter(pk__in=pks).undelete(active=was_active)
+            SoftDeleteOperation.objects.filter(pk=operation.pk).update(processed=F('processed') + len(rows))
+        if progress is not None:
+            progress(len(rows))
+
+
+def run(operation_pk, progress=None):
+    """
+    Run a pending operation: cascade a delete from its root rows, or restore what a delete flagged.
+    `progress(count)` is called after every chunk with the number of rows it changed.
+    """
+    operation = SoftDeleteOperation.objects.get(pk=operation_pk)
+    if operation.status != SoftDeleteOperation.PENDING:
+        return operation
+    SoftDeleteOperation.objects.filter(pk=operation.pk).update(status=SoftDeleteOperation.RUNNING)
+    try:
+        if operation.action == SoftDeleteOperation.DELETE:
+            model = apps.get_model(operation.model_label)
+            roots = operation.rows.filter(model_label=operation.model_label).values_list('object_id', flat=True)
+            for start in range(0, len(operation.object_ids), chunk_size()):
+                pks = list(roots.filter(object_id__in=operation.object_ids[start:start + chunk_size()]))
+                descend(operation, model, pks, progress)
+        else:
+            restore(operation, progress)
+            SoftDeleteOperation.objects.filter(pk=operation.undo_of_id).update(status=SoftDeleteOperation.UNDONE)
+    except Exception as error:
+        SoftDeleteOperation.objects.filter(pk=operation.pk).update(status=SoftDeleteOperation.FAILED,
+                                                                   error=str(error))
+        raise
+    SoftDeleteOperation.objects.filter(pk=operation.pk).update(status=SoftDeleteOperation.DONE)
+    operation.refresh_from_db()
+    return operation
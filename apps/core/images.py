@@ -0,0 +1,180 @@
+import io
+import logging
+import os
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from PIL import Image, ImageOps
+from apps.core import signals
+
+logger = logging.getLogger(__name__)
+
+# Model label -> image field whose uploads get derivatives. Each model has a `derivatives` JSONField.
+IMAGE_FIELDS = {
+    'product.Media': 'product_picture',
+    'product.Category': 'category_picture',
+    'product.Brand': 'logo',
+    'account.Profile': 'profile_picture',
+}
+WEBP = 'webp'
+
+
+class ImageTooLarge(Exception):
+    """The image has more pixels than IMAGE_MAX_PIXELS allows to decode."""
+
+
+def image_field(model):
+    return IMAGE_FIELDS.get(model._meta.label)  # noqa
+
+
+def derivative_name(name, width, extension):
+    """
+    Name of a derivative, stored next to the original: media_picture/2024/05/shoe.jpg -> shoe_640w.webp
+    """
+    root, _ = os.path.splitext(name)
+    return f'{root}_{width}w.{extension}'
+
+
+def open_image(file, max_width):
+    """
+    Open an image without decoding more pixels than needed.
+    The header is checked against IMAGE_MAX_PIXELS before any decoding and JPEGs are decoded
+    at the smallest DCT scale that still covers `max_width`.
+    Returns the decoded image, whether it is transparent and its width at full resolution.
+    """
+    image = Image.open(file)
+    width, height = image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ImageTooLarge(f'{width}x{height}')
+    if image.format == 'JPEG' and width > max_width:
+        image.draft('RGB', (max_width, max_width * height // width))
+    scale = width / image.width
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    return image.convert('RGBA' if has_alpha else 'RGB'), has_alpha, round(image.width * scale)
+
+
+def encode(image, image_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_derivatives(field_file):
+    """
+    Store resized copies of `field_file` for every width of IMAGE_DERIVATIVE_WIDTHS smaller than the image,
+    each in the original kind (JPEG, or PNG when transparent) and as WebP.
+    Returns the record kept in the `derivatives` field:
+    {'source': name, 'width': 2400, 'images': [{'width': 320, 'format': 'webp', 'name': ...}, ...]}
+    """
+    storage = field_file.storage
+    widths = sorted(settings.IMAGE_DERIVATIVE_WIDTHS)
+    with storage.open(field_file.name, 'rb') as file:
+        image, has_alpha, source_width = open_image(file, widths[-1])
+    fallback = ('png', 'PNG', {'optimize': True}) if has_alpha else (
+        'jpg', 'JPEG', {'quality': settings.IMAGE_JPEG_QUALITY, 'optimize': True, 'progressive': True})
+    images = []
+    for width in widths:
+        if width >= source_width:
+            break
+        resized = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        for extension, image_format, options in (
+                (WEBP, 'WEBP', {'quality': settings.IMAGE_WEBP_QUALITY, 'method': 4}), fallback):
+            name = storage.save(derivative_name(field_file.name, width, extension),
+                                encode(resized, image_format, **options))
+            images.append({'width': width, 'format': extension, 'name': name})
+        resized.close()
+    image.close()
+    return {'source': field_file.name, 'width': source_width, 'images': images}
+
+
+def delete_derivatives(storage, derivatives):
+    for item in (derivatives or {}).get('images', []):
+        try:
+            storage.delete(item['name'])
+        except Exception:  # noqa
+            logger.warning('Could not delete image derivative %s', item['name'])
+
+
+def process(model_label, pk, force=False):
+    """
+    Build the derivatives of one row and record them, unless they are already up to date.
+    The row is updated with a single UPDATE guarded on the image name, so a newer upload is never
+    overwritten by a slow worker, and post_save does not fire again.
+    """
+    model = apps.get_model(model_label)
+    field_name = IMAGE_FIELDS[model_label]
+    instance = model._base_manager.filter(pk=pk).only('pk', field_name, 'derivatives').first()  # noqa
+    if instance is None:
+        return None
+    field_file = getattr(instance, field_name)
+    derivatives = instance.derivatives or {}
+    if not field_file:
+        derivatives = {}
+    elif force or derivatives.get('source') != field_file.name:
+        try:
+            derivatives = generate_derivatives(field_file)
+        except (ImageTooLarge, OSError, Image.DecompressionBombError) as error:
+            logger.warning('Skipping derivatives of %s %s: %s', model_label, pk, error)
+            derivatives = {'source': field_file.name, 'width': None, 'images': [], 'error': str(error)}
+    else:
+        return derivatives
+    previous = instance.derivatives
+    if field_file:
+        unchanged = Q(**{field_name: field_file.name})
+    else:
+        unchanged = Q(**{f'{field_name}__isnull': True}) | Q(**{field_name: ''})
+    updated = model._base_manager.filter(unchanged, pk=pk).update(derivatives=derivatives)  # noqa
+    if updated:
+        if previous and previous.get('images') != derivatives.get('images'):
+            delete_derivatives(field_file.storage, previous)
+        signals.image_derivatives_changed.send(sender=model, pk=pk)
+    else:
+        delete_derivatives(field_file.storage, derivatives)
+    return derivatives
+
+
+def srcset(instance, image_format=WEBP):
+    """
+    Return the `srcset` attribute value of an instance's image, e.g. "…_320w.webp 320w, …_640w.webp 640w",
+    or '' when no derivatives exist yet.
+    """
+    field_name = image_field(type(instance))
+    derivatives = getattr(instance, 'derivatives', None) or {}
+    if field_name is None or not derivatives.get('images'):
+        return ''
+    storage = getattr(instance, field_name).storage
+    return srcset_from_record(storage, derivatives, image_format)
+
+
+def srcset_from_record(storage, derivatives, image_format=WEBP):
+    return ', '.join(
+        f'{storage.url(item["name"])} {item["width"]}w'
+        for item in derivatives.get('images', []) if item['format'] == image_format
+    )
+
+
+def schedule_derivatives(sender, instance, created=False, update_fields=None, **kwargs):  # noqa
+    """
+    post_save receiver: queue the derivatives once the transaction commits, when the image changed.
+    """
+    field_name = image_field(sender)
+    if update_fields is not None and field_name not in update_fields:
+        return
+    field_file = getattr(instance, field_name)
+    if (instance.derivatives or {}).get('source') == (field_file.name or None):
+        return
+    from apps.core.tasks import generate_image_derivatives
+    transaction.on_commit(lambda: generate_image_derivatives.delay(sender._meta.label, instance.pk))  # noqa
+
+
+def connect():
+    """
+    Connect the post_save receivers of every model in IMAGE_FIELDS; called from CoreConfig.ready.
+    """
+    for model_label in IMAGE_FIELDS:
+        post_save.connect(schedule_derivatives, sender=apps.get_model(model_label),
+                          dispatch_uid=f'image_derivatives:{model_label}')
@@ -0,0 +1,49 @@
+from celery import group
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from apps.core import images
+from apps.core.tasks import generate_image_derivatives_batch
+
+
+class Command(BaseCommand):
+    """
+    Management command to build the image derivatives of existing uploads.
+    Rows are split into batches that Celery workers process in parallel; use --sync without workers.
+    """
+    help = 'Generate resized and WebP derivatives for existing images'
+
+    def add_arguments(self, parser):
+        """
+        Adds the model, batch size, force and sync arguments.
+        """
+        parser.add_argument('--model', action='append', choices=list(images.IMAGE_FIELDS),
+                            help='Model label to process, may repeat (default: all)')
+        parser.add_argument('--batch-size', type=int, default=100, help='Number of images per task')
+        parser.add_argument('--force', action='store_true', help='Rebuild derivatives that are up to date')
+        parser.add_argument('--sync', action='store_true', help='Process in this process instead of Celery')
+
+    def handle(self, *args, **options):
+        """
+        Handles the command execution.
+        """
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be positive')
+        for model_label in options['model'] or images.IMAGE_FIELDS:
+            model = apps.get_model(model_label)
+            field_name = images.IMAGE_FIELDS[model_label]
+            pks = list(model._base_manager.exclude(Q(**{f'{field_name}__isnull': True}) | Q(**{field_name: ''}))  # noqa
+                       .order_by('pk').values_list('pk', flat=True))
+            batches = [pks[start:start + batch_size] for start in range(0, len(pks), batch_size)]
+            tasks = [generate_image_derivatives_batch.si(model_label, batch, force=options['force'])
+                     for batch in batches]
+            if options['sync']:
+                generated = sum(task.apply().get() for task in tasks)
+                self.stdout.write(self.style.SUCCESS(f'{model_label}: {generated} derivatives from {len(pks)} images'))
+            elif tasks:
+                result = group(tasks).apply_async()
+                self.stdout.write(self.style.SUCCESS(
+                    f'{model_label}: {len(pks)} images queued in {len(tasks)} tasks (group {result.id})'))
+            else:
+                self.stdout.write(f'{model_label}: nothing to do')
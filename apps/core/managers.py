@@ -1,39 +1,54 @@
-from django.db import models
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections, models, router
+from django.utils import timezone
+from apps.core import signals
 
 
 class SoftDeleteQuerySet(models.QuerySet):
     """QuerySet for handling soft deletes."""
 
+    def _update_flags(self, action, **kwargs):
+        """
+        Update the status flags and send `soft_delete_changed` for the affected rows.
+        The primary keys are only collected when something listens for the model.
+        `update_time` is moved forward as well, QuerySet.update() skips auto_now and conditional GETs rely on it.
+        """
+        try:
+            self.model._meta.get_field('update_time')  # noqa
+            kwargs.setdefault('update_time', timezone.now())
+        except FieldDoesNotExist:
+            pass
+        if not signals.soft_delete_changed.has_listeners(self.model):
+            return super().update(**kwargs)
+        pks = list(self.values_list('pk', flat=True))
+        rows = self.model._base_manager.filter(pk__in=pks).update(**kwargs)  # noqa
+        signals.soft_delete_changed.send(sender=self.model, pks=pks, action=action)
+        return rows
+
     def delete(self):
         """Soft delete queryset items."""
-        return super().update(is_deleted=True, is_active=False)
+        return self._update_flags('delete', is_deleted=True, is_active=False)
 
-    def undelete(self):
-        """Undelete previously soft-deleted items."""
-        return super().update(is_deleted=False, is_active=True)
+    def undelete(self, active=True):
+        """Undelete previously soft-deleted items, `active` is the is_active flag they get back."""
+        return self._update_flags('undelete', is_deleted=False, is_active=active)
 
     def activate(self):
         """Activate queryset items."""
-        return super().update(is_active=True)
+        return self._update_flags('activate', is_active=True)
 
     def deactivate(self):
         """Deactivate queryset items."""
-        return super().update(is_active=False)
+        return self._update_flags('deactivate', is_active=False)
 
     def archive(self):
         """Retrieve all items."""
         return super().all()
 
 
-class DeleteManager(models.Manager):
+class DeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
     """Manager for handling soft deletes."""
 
-    def get_queryset(self):
-        """Get the queryset object associated with this manager."""
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = SoftDeleteQuerySet(self.model)
-        return self.__queryset
-
     def delete(self):
         """Soft delete items."""
         return self.get_queryset().delete()
@@ -53,3 +68,93 @@ class DeleteManager(models.Manager):
     def archive(self):
         """Retrieve all items."""
         return self.get_queryset().archive()
+
+
+# Rows the storefront works with; also the condition of the partial indexes on live rows.
+LIVE_CONDITION = models.Q(is_deleted=False, is_active=True)
+
+
+class LiveManagerMixin:
+    """
+    Manager mixin returning only live rows: not soft deleted and active.
+    Models using it keep `soft_delete` as their Django default manager (Meta.default_manager_name),
+    so the admin, model validation and related managers still see every row.
+    """
+
+    def get_queryset(self):
+        """Get a queryset of the live rows."""
+        return super().get_queryset().filter(LIVE_CONDITION)
+
+    def archive(self):
+        """Retrieve all items, soft deleted and inactive ones included."""
+        return super().get_queryset()
+
+
+class UpsertQuerySet(models.QuerySet):
+    """QuerySet writing rows with INSERT ... ON CONFLICT DO UPDATE."""
+
+    def upsert_increment(self, objs, unique_fields, increment_fields, update_fields=(), restart_if=None):
+        """
+        Insert `objs` with a single INSERT ... ON CONFLICT (unique_fields) DO UPDATE statement.
+        A row that already exists gets the values of `increment_fields` added to its own
+        (quantity = quantity + EXCLUDED.quantity) and the values of `update_fields` replaced,
+        so concurrent writers never lose an increment nor create duplicates.
+        When the boolean column `restart_if` is set on the existing row, e.g. `is_deleted`, the increment
+        fields start over from the new values instead.
+        Returns the rows as stored, read back with RETURNING.
+        """
+        objs = list(objs)
+        if not objs:
+            return []
+        meta = self.model._meta  # noqa
+        db = self._db or router.db_for_write(self.model)
+        connection = connections[db]
+        quote = connection.ops.quote_name
+        table = quote(meta.db_table)
+        fields = [field for field in meta.concrete_fields if not field.primary_key]
+
+        def column(name):
+            return quote(meta.get_field(name).column)
+
+        params = []
+        for obj in objs:
+            params.extend(field.get_db_prep_save(field.pre_save(obj, add=True), connection) for field in fields)
+        values = ', '.join(['(%s)' % ', '.join(['%s'] * len(fields))] * len(objs))
+        if restart_if is None:
+            assignments = [f'{column(name)} = {table}.{column(name)} + EXCLUDED.{column(name)}'
+                           for name in increment_fields]
+        else:
+            assignments = [f'{column(name)} = CASE WHEN {table}.{column(restart_if)} THEN EXCLUDED.{column(name)} '
+                           f'ELSE {table}.{column(name)} + EXCLUDED.{column(name)} END'
+                           for name in increment_fields]
+        assignments += [f'{column(name)} = EXCLUDED.{column(name)}' for name in update_fields]
+        sql = (f'INSERT INTO {table} ({", ".join(quote(field.column) for field in fields)}) VALUES {values} '
+               f'ON CONFLICT ({", ".join(column(name) for name in unique_fields)}) '
+               f'DO UPDATE SET {", ".join(assignments)} '
+               f'RETURNING {", ".join(quote(field.column) for field in meta.concrete_fields)}')
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+        names = [field.attname for field in meta.concrete_fields]
+        return [self.model.from_db(db, names, row) for row in rows]
+
+
+class UserLineQuerySet(UpsertQuerySet):
+    """
+    QuerySet of per-user product lines unique on (user, product) and carrying `quantity` and `total_price`,
+    such as cart items and wishlist rows.
+    """
+
+    def add_lines(self, user_id, quantities, prices):
+        """
+        Add `quantities` (product id -> quantity) at unit `prices` (product id -> price) to the lines of a user
+        in one statement. Products missing from `prices` are skipped; soft deleted lines come back to life
+        with the new quantity and total, not the ones they had when deleted.
+        """
+        objs = [self.model(user_id=user_id, product_id=product_id, quantity=quantity,
+                           total_price=(prices[product_id] or 0) * quantity)
+                for product_id, quantity in quantities.items() if product_id in prices]
+        return self.upsert_increment(objs, unique_fields=['user', 'product'],
+                                     increment_fields=['quantity', 'total_price'],
+                                     update_fields=['is_active', 'is_deleted', 'update_time'],
+                                     restart_if='is_deleted')
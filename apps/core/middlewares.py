@@ -2,6 +2,8 @@ import logging
 from django.contrib import messages
 from django.http import HttpResponseRedirect
 from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
+from apps.core import authz
 
 """Initialize the logger with the current module name."""
 logger = logging.getLogger(__name__)
@@ -45,3 +47,35 @@ class LoginRequiredMiddleware:
             f"Status Code {response.status_code}")
 
         return response
+
+
+class AuthorizationSnapshotMiddleware:
+    """
+    Defines a middleware class that exposes the authorization snapshot of the user as `request.authz`.
+    The snapshot is loaded lazily on first access, from the cache whenever possible.
+    Must come after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.authz = SimpleLazyObject(lambda: authz.get_snapshot(request.user))
+        return self.get_response(request)
+
+
+class ExpiredCookiesMiddleware:
+    """
+    Defines a middleware class that deletes the cookies listed in `request.expired_cookies` from the response,
+    e.g. the guest cart and wishlist cookies merged into the account at login.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.expired_cookies = []
+        response = self.get_response(request)
+        for key in request.expired_cookies:
+            response.delete_cookie(key)
+        return response
@@ -0,0 +1,80 @@
+import hashlib
+from django.db.models import Count, Max
+from django.db.models.functions import Greatest
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.translation import get_language
+
+
+class ConditionalGetMixin:
+    """
+    Answer GET and HEAD requests with 304 Not Modified while the data behind the response is unchanged.
+    Works with Django views and DRF API views alike, it runs before `dispatch`.
+
+    The validators come from one aggregate query over `get_validator_queryset()`:
+    the greatest `update_time` of every lookup in `validator_lookups` (e.g. the product, its media and its
+    active discount) and the number of related rows in `validator_counts`, so hard deletes are noticed too.
+    `get_validator_extra()` adds cheap values such as cache versions. Pages that render per-user content
+    (navigation, CSRF token) keep `vary_on_user` so a user never revalidates someone else's page.
+    """
+    validator_lookups = ('update_time',)
+    validator_counts = ()
+    vary_on_user = True
+
+    def get_validator_queryset(self):
+        """
+        Queryset whose rows the response depends on, or None to only use `get_validator_extra()`.
+        """
+        return None
+
+    def get_validator_extra(self):
+        """
+        Extra values mixed into the ETag.
+        """
+        return []
+
+    def get_validator_aggregate(self):
+        queryset = self.get_validator_queryset()
+        if queryset is None:
+            return None, []
+        maxima = [Max(lookup) for lookup in self.validator_lookups]
+        aggregates = {'last_modified': Greatest(*maxima) if len(maxima) > 1 else maxima[0]}
+        for lookup in self.validator_counts:
+            aggregates[f'count_{lookup}'] = Count(lookup, distinct=True)
+        result = queryset.order_by().aggregate(**aggregates)
+        return result.pop('last_modified'), [result[key] for key in sorted(result)]
+
+    def get_validators(self, request):
+        """
+        Return (etag, last_modified); both None when there is nothing to validate against.
+        """
+        last_modified, counts = self.get_validator_aggregate()
+        extra = self.get_validator_extra()
+        if last_modified is None and not extra:
+            return None, None
+        parts = [last_modified.isoformat() if last_modified else '', *counts, *extra, get_language()]
+        if self.vary_on_user:
+            parts += [request.user.pk if request.user.is_authenticated else '',
+                      request.COOKIES.get('csrftoken', '')]
+        etag = '"%s"' % hashlib.md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+        return etag, last_modified
+
+    def dispatch(self, request, *args, **kwargs):
+        """
+        Check the validators before the view runs and add them to a successful response.
+        """
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        etag, last_modified = self.get_validators(request)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code == 200:
+                if etag and not response.has_header('ETag'):
+                    response['ETag'] = etag
+                if timestamp and not response.has_header('Last-Modified'):
+                    response['Last-Modified'] = http_date(timestamp)
+        if self.vary_on_user:
+            patch_vary_headers(response, ('Cookie',))
+        return response
@@ -89,14 +89,46 @@ class HttpsOptionLoginMixin(View):
         return render(request, self.template_http_method_not_allowed)
 
 
-class SellerPermissionRequiredMixinView(PermissionRequiredMixin, HttpsOptionNotLogoutMixin):
+class RequestInstanceMixin:
+    """
+    Resolve the objects a view works on lazily, by the `pk` URL parameter.
+    `instance_models` maps an attribute name to the model (or queryset) it is loaded from, e.g.
+    {'product_instance': Product.soft_delete.select_related('brand')}. The object is fetched with
+    get_object_or_404 the first time the attribute is read, and kept in a per-request identity map
+    so the permission check and the view share one query.
+    """
+    instance_models = {}
+    instance_url_kwarg = 'pk'
+
+    def get_instance(self, source, pk=None):
+        """
+        Return the object of `source` with `pk` (the URL parameter by default), loading it at most once per request.
+        """
+        pk = self.kwargs[self.instance_url_kwarg] if pk is None else pk
+        queryset = source._default_manager.all() if hasattr(source, '_meta') else source  # noqa
+        identity_map = self.request.__dict__.setdefault('_instance_map', {})
+        key = (queryset.model._meta.label, str(pk))  # noqa
+        if key not in identity_map:
+            identity_map[key] = get_object_or_404(queryset, pk=pk)
+        return identity_map[key]
+
+    def __getattr__(self, name):
+        source = type(self).instance_models.get(name)
+        if source is None or 'request' not in self.__dict__:
+            raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
+        instance = self.get_instance(source)
+        setattr(self, name, instance)
+        return instance
+
+
+class SellerPermissionRequiredMixinView(RequestInstanceMixin, PermissionRequiredMixin, HttpsOptionNotLogoutMixin):  # noqa
+    instance_models = {'brand_instance': Brand}
     http_method_names = ['get', 'post']
     permission_required = (
         'Seller',
     )
 
     def dispatch(self, request, *args, **kwargs):
-        self.brand_instance = get_object_or_404(Brand, pk=kwargs['pk'])  # noqa
         if not self.has_permission():
             messages.error(request, 'You do not have permission.', extra_tags='error')
             return redirect(self.next_page_home)
@@ -113,8 +145,8 @@ class SellerPermissionRequiredMixinView(PermissionRequiredMixin, HttpsOptionNotL
                 self.request.user.is_superuser
                 or self.request.user.is_staff
                 or self.request.user.is_active
-                or self.request.user.groups.filter(name='Supervisor').exists()
-                or self.request.user.groups.filter(name='Seller').exists()
+                or self.request.authz.is_supervisor
+                or self.request.authz.is_seller
                 and self.brand_instance.user == self.request.user):
             return True
         else:
@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SoftDeleteOperation(models.Model):
+    """
+    A cascading soft delete, or its undo, run in chunks by apps.core.cascade.
+    `processed` counts the rows flagged so far and is the progress shown while the task runs.
+    """
+    DELETE = 'delete'
+    UNDELETE = 'undelete'
+    ACTION_CHOICES = (
+        (DELETE, _('Delete')),
+        (UNDELETE, _('Undelete')),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    UNDONE = 'undone'
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (RUNNING, _('Running')),
+        (DONE, _('Done')),
+        (FAILED, _('Failed')),
+        (UNDONE, _('Undone')),
+    )
+
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, verbose_name=_('Action'))
+    model_label = models.CharField(max_length=100, verbose_name=_('Model'))
+    object_ids = models.JSONField(default=list, verbose_name=_('Object IDs'))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, verbose_name=_('Status'))
+    processed = models.PositiveIntegerField(default=0, verbose_name=_('Processed Rows'))
+    error = models.TextField(blank=True, default='')
+    undo_of = models.ForeignKey('self', on_delete=models.CASCADE, related_name='undo_operations', null=True,
+                                blank=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+                             related_name='soft_delete_operations', null=True, blank=True)
+    create_time = models.DateTimeField(auto_now_add=True, editable=False)
+    update_time = models.DateTimeField(auto_now=True, editable=False)
+
+    def __str__(self):
+        """
+        Method to return a string representation of the SoftDeleteOperation object.
+        """
+        return f'{self.action} {self.model_label} {self.object_ids} - {self.status}'
+
+    class Meta:
+        ordering = ('-create_time',)
+        verbose_name = 'Soft Delete Operation'
+        verbose_name_plural = 'Soft Delete Operations'
+
+
+class SoftDeleteOperationRow(models.Model):
+    """
+    A row flagged by a delete operation, with its previous `is_active` so the undo restores it exactly.
+    """
+    operation = models.ForeignKey(SoftDeleteOperation, on_delete=models.CASCADE, related_name='rows')
+    model_label = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    was_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Soft Delete Operation Row'
+        verbose_name_plural = 'Soft Delete Operation Rows'
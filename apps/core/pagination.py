@@ -0,0 +1,243 @@
+import datetime
+from functools import cached_property
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """
+    JSON encoder keeping datetimes and times at full precision; DjangoJSONEncoder cuts them to milliseconds,
+    and a seek filter on a truncated `create_time` would skip the rows of the same millisecond.
+    """
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorSerializer(signing.JSONSerializer):
+    """Signing serializer that also understands datetimes and decimals."""
+
+    def dumps(self, obj):
+        return CursorEncoder(separators=(',', ':')).encode(obj).encode('latin-1')
+
+
+class KeysetPage:
+    """
+    One page of a keyset paginated queryset.
+    The rows are fetched lazily on first access, so a page that is never rendered costs no query.
+    """
+
+    def __init__(self, paginator, queryset, cursor=None):
+        self.paginator = paginator
+        self.queryset = queryset
+        self.cursor = cursor
+
+    @cached_property
+    def rows(self):
+        """Fetch one extra row to know whether another page follows."""
+        rows = list(self.queryset[:self.paginator.per_page + 1])
+        self.__dict__['has_next'] = len(rows) > self.paginator.per_page
+        rows = rows[:self.paginator.per_page]
+        if self.paginator.transform is not None:
+            rows = self.paginator.transform(rows)
+        return rows
+
+    @cached_property
+    def has_next(self):
+        self.rows  # noqa
+        return self.__dict__['has_next']
+
+    @cached_property
+    def next_cursor(self):
+        """Signed token pointing after the last row of this page, or None on the last page."""
+        if not self.has_next:
+            return None
+        return self.paginator.encode_cursor(self.rows[-1])
+
+    def next_query(self, query_dict):
+        """
+        Return the url-encoded query string for the "load more" link, keeping the other GET parameters.
+        """
+        if not self.has_next:
+            return None
+        query_dict = query_dict.copy()
+        query_dict[self.paginator.cursor_param] = self.next_cursor
+        return query_dict.urlencode()
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __bool__(self):
+        return bool(self.rows)
+
+
+class KeysetPaginator:
+    """
+    Seek (keyset) pagination over a queryset.
+    Instead of OFFSET, each page filters on the ordering columns of the last row already shown,
+    so the cost of a page stays the same however deep the user scrolls.
+    The last element of `ordering` must be unique (usually `id`) to keep the order stable.
+    """
+    cursor_param = 'cursor'
+    salt = 'apps.core.pagination.KeysetPaginator'
+
+    def __init__(self, queryset, ordering=('-create_time', '-id'), per_page=20, transform=None):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+        self.transform = transform
+
+    @property
+    def fields(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def encode_cursor(self, row):
+        """Sign the ordering values of `row` (a model instance or a `.values()` dict) into an opaque cursor token."""
+        if isinstance(row, dict):
+            values = [row[field] for field in self.fields]
+        else:
+            values = [getattr(row, field) for field in self.fields]
+        return signing.dumps(values, salt=self.salt, serializer=CursorSerializer, compress=True)
+
+    def decode_cursor(self, cursor):
+        """Return the ordering values stored in `cursor`, or None when the token is missing or invalid."""
+        if not cursor:
+            return None
+        try:
+            values = signing.loads(cursor, salt=self.salt, serializer=CursorSerializer)
+        except signing.BadSignature:
+            return None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            return None
+        try:
+            return [self.to_python(field, value) for field, value in zip(self.fields, values)]
+        except ValidationError:
+            return None
+
+    def to_python(self, field_name, value):
+        """Turn a cursor value back into the python type of its model field."""
+        try:
+            field = self.queryset.model._meta.get_field(field_name)  # noqa
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+    def seek_filter(self, values):
+        """
+        Build the row comparison `(a, b, c) > (x, y, z)` as an OR of AND terms,
+        honouring the direction of each ordering column.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_page(self, cursor=None):
+        """Return the page that starts after `cursor`; the first page when the cursor is empty or invalid."""
+        queryset = self.queryset.order_by(*self.ordering)
+        values = self.decode_cursor(cursor)
+        if values is not None:
+            queryset = queryset.filter(self.seek_filter(values))
+        return KeysetPage(self, queryset, cursor=cursor if values is not None else None)
+
+    def get_page_from_request(self, request):
+        return self.get_page(request.GET.get(self.cursor_param))
+
+
+class IdListPage(KeysetPage):
+    """
+    Page of an IdListPaginator; the rows are loaded with one `in_bulk` lookup in the order of the ids.
+    """
+
+    @cached_property
+    def rows(self):
+        start = self.cursor or 0
+        ids = self.paginator.ids[start:start + self.paginator.per_page]
+        self.__dict__['has_next'] = start + self.paginator.per_page < len(self.paginator.ids)
+        objects = self.queryset.in_bulk(ids)
+        rows = [objects[pk] for pk in ids if pk in objects]
+        if self.paginator.transform is not None:
+            rows = self.paginator.transform(rows)
+        return rows
+
+    @cached_property
+    def next_cursor(self):
+        """Signed position of the first id of the next page, or None on the last page."""
+        if not self.has_next:
+            return None
+        return self.paginator.encode_position((self.cursor or 0) + self.paginator.per_page)
+
+
+class IdListPaginator(KeysetPaginator):
+    """
+    Paginate a precomputed, ordered list of primary keys (e.g. cached search results).
+    The cursor is the signed position after the last id shown; rows that vanished from
+    `queryset` since the list was built are skipped.
+    """
+    salt = 'apps.core.pagination.IdListPaginator'
+
+    def __init__(self, queryset, ids, per_page=20, transform=None):
+        super().__init__(queryset, ordering=('pk',), per_page=per_page, transform=transform)
+        self.ids = list(ids)
+
+    def encode_position(self, position):
+        return signing.dumps(position, salt=self.salt)
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            position = signing.loads(cursor, salt=self.salt)
+        except signing.BadSignature:
+            return None
+        if not isinstance(position, int) or not 0 <= position <= len(self.ids):
+            return None
+        return position
+
+    def get_page(self, cursor=None):
+        return IdListPage(self, self.queryset, cursor=self.decode_cursor(cursor))
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for admin changelists of very large tables.
+    An unfiltered changelist takes its row count from the planner statistics (pg_class.reltuples, kept up to
+    date by autovacuum/ANALYZE) instead of running COUNT(*) over the whole table. Filtered or searched lists,
+    small tables and databases other than PostgreSQL are counted exactly.
+    Use together with `show_full_result_count = False` on the ModelAdmin.
+    """
+    exact_threshold = 10000
+
+    def estimated_count(self):
+        """Return the estimated number of rows of the table, or None when there is no usable estimate."""
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                           [queryset.model._meta.db_table])  # noqa
+            row = cursor.fetchone()
+        return row[0] if row and row[0] >= 0 else None
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.has_filters() and not query.distinct:
+            estimate = self.estimated_count()
+            if estimate is not None and estimate >= self.exact_threshold:
+                return estimate
+        return super().count
@@ -0,0 +1,71 @@
+from rest_framework.exceptions import ValidationError
+
+
+class ValuesSerializer:
+    """
+    Lightweight serializer for `.values()` rows, used by read-heavy endpoints instead of ModelSerializer.
+    `fields` maps each output name to the values() lookup it is read from, or to None when the value is
+    computed by a `get_<name>(row)` method. `resolve(rows)` runs once per page to load extra data in bulk.
+    Clients may ask for a subset of the fields with `?fields=name,price`; only their lookups are selected.
+    """
+    fields = {}
+    # Lookups fetched whatever the client selected (keys for bulk resolution and cursors).
+    required = ('id',)
+    fields_param = 'fields'
+
+    def __init__(self, requested=None):
+        self.selected = self.select(requested)
+
+    @classmethod
+    def from_request(cls, request):
+        return cls(request.GET.get(cls.fields_param))
+
+    def select(self, requested):
+        """
+        Return the output names to render; all of them when `requested` is empty.
+        """
+        if not requested:
+            return list(self.fields)
+        names = list(dict.fromkeys(name.strip() for name in requested.split(',') if name.strip()))
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise ValidationError({self.fields_param: f'Unknown fields: {", ".join(unknown)}.'})
+        return names
+
+    def lookups(self, *extra):
+        """
+        Return the values() lookups needed by the selected fields, the required ones and `extra`.
+        """
+        lookups = list(self.required) + list(extra)
+        for name in self.selected:
+            lookup = self.fields[name]
+            if lookup is not None:
+                lookups.append(lookup)
+            lookups.extend(self.depends_on(name))
+        return list(dict.fromkeys(lookups))
+
+    def depends_on(self, name):  # noqa
+        """
+        Lookups a computed field reads from the row; override for fields mapped to None.
+        """
+        return ()
+
+    def resolve(self, rows):
+        """
+        Hook to load data for the whole page at once (prices, pictures, ...).
+        """
+
+    def serialize(self, rows):
+        rows = list(rows)
+        self.resolve(rows)
+        getters = {name: getattr(self, f'get_{name}', None) for name in self.selected}
+        return [
+            {
+                name: getter(row) if getter is not None else row[self.fields[name]]
+                for name, getter in getters.items()
+            }
+            for row in rows
+        ]
+
+    def serialize_one(self, row):
+        return self.serialize([row])[0]
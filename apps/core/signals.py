@@ -0,0 +1,9 @@
+from django.dispatch import Signal
+
+# Sent by SoftDeleteQuerySet after delete/undelete/activate/deactivate, which run as a single UPDATE
+# and therefore skip post_save. Arguments: sender (model class), pks (list of primary keys), action (str).
+soft_delete_changed = Signal()
+
+# Sent by apps.core.images after the derivatives of an uploaded image were stored with a single UPDATE.
+# Arguments: sender (model class), pk (primary key).
+image_derivatives_changed = Signal()
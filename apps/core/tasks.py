@@ -0,0 +1,37 @@
+from celery import shared_task
+from apps.core import cascade, images
+
+
+@shared_task
+def generate_image_derivatives(model_label, pk, force=False):
+    """
+    Build the resized and WebP copies of one uploaded image, see apps.core.images.
+    Queued from post_save once the upload is committed.
+    """
+    derivatives = images.process(model_label, pk, force=force)
+    return len(derivatives['images']) if derivatives else 0
+
+
+@shared_task
+def generate_image_derivatives_batch(model_label, pks, force=False):
+    """
+    Build the derivatives of a batch of rows; used by the generate_image_derivatives command.
+    """
+    return sum(generate_image_derivatives(model_label, pk, force=force) for pk in pks)
+
+
+@shared_task(bind=True)
+def run_soft_delete_operation(self, operation_pk):
+    """
+    Run a cascading soft delete or its undo in chunks, see apps.core.cascade.
+    The number of rows done so far is published as the PROGRESS state of the task.
+    """
+    processed = 0
+
+    def progress(count):
+        nonlocal processed
+        processed += count
+        self.update_state(state='PROGRESS', meta={'operation': operation_pk, 'processed': processed})
+
+    operation = cascade.run(operation_pk, progress)
+    return {'operation': operation_pk, 'status': operation.status, 'processed': operation.processed}
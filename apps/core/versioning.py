@@ -0,0 +1,43 @@
+import time
+from django.core.cache import cache
+
+
+def initial_version():
+    """
+    Start counters from the clock so a lost counter never hands out a version that was already used.
+    """
+    return int(time.time())
+
+
+def get_version(key):
+    """
+    Return the version counter stored under `key`.
+    Cache keys built from it go stale as soon as the counter moves, without deleting anything.
+    """
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(*keys):
+    """
+    Return the version counters stored under `keys` with one cache round trip.
+    """
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            versions[key] = get_version(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(key):
+    """
+    Increase the version counter stored under `key`.
+    """
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, initial_version(), None)
+        return cache.get(key)
@@ -1,5 +1,9 @@
 from django.contrib import admin
-from apps.order.models import Order, OrderItem, OrderPayment
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from apps.core.pagination import EstimatedCountPaginator
+from apps.order.managers import placed_total
+from apps.order.models import Order, OrderItem, OrderLine, OrderPayment, StockReservation
 
 
 @admin.register(OrderItem)
@@ -7,10 +11,13 @@ class OrderItemAdmin(admin.ModelAdmin):
     """Admin configuration for the OrderItem model."""
 
     list_display = (
-        'user', 'product', 'total_price', 'quantity', 'is_active', 'is_deleted'
+        'user', 'product', 'total_price', 'current_total', 'quantity', 'is_active', 'is_deleted'
     )
-    list_filter = ('user__username', 'product__name', 'total_price')
-    search_fields = ('ser__username', 'product__name', 'total_price')
+    list_select_related = ('user', 'product__category', 'product__brand')
+    list_filter = ('is_active', 'is_deleted')
+    search_fields = ('user__username', 'product__name', 'total_price')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ('create_time', 'update_time', 'is_active', 'is_deleted')
     ordering = ('-create_time',)
     date_hierarchy = 'create_time'
@@ -29,27 +36,56 @@ class OrderItemAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """
+        Annotate each line with its total at the current product price and discount, computed in SQL.
+        """
+        return super().get_queryset(request).total_price_each_product()
+
+    def current_total(self, obj):  # noqa
+        """Line total at the current product price and discount."""
+        return obj.total_price_each_product
+
+    current_total.short_description = 'Current Total'
+    current_total.admin_order_field = 'total_price_each_product'
+
+
+class OrderLineInline(admin.TabularInline):
+    """Inline showing the lines of an order; they are copied at checkout and never edited."""
+    model = OrderLine
+    extra = 0
+    fields = ('product', 'product_name', 'unit_price', 'discount', 'quantity', 'create_time')
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     """Admin configuration for the Order model."""
 
     list_display = (
-        'address', 'display_order_items', 'status', 'transaction_id', 'payment_method', 'finally_price',
-        'time_accepted_order', 'accepted_order', 'time_shipped_order', 'shipped_order', 'time_deliver_order',
-        'deliver_order', 'time_rejected_order', 'rejected_order', 'time_cancelled_order', 'cancelled_order',
-        'create_time', 'update_time', 'is_active', 'is_deleted')
-    list_filter = ('status', 'address__user__username', 'payment_method', 'time_accepted_order')
+        'address', 'items_count', 'items_total', 'display_order_items', 'status', 'transaction_id', 'payment_method',
+        'finally_price', 'time_accepted_order', 'accepted_order', 'time_shipped_order', 'shipped_order',
+        'time_deliver_order', 'deliver_order', 'time_rejected_order', 'rejected_order', 'time_cancelled_order',
+        'cancelled_order', 'create_time', 'update_time', 'is_active', 'is_deleted')
+    list_select_related = ('address',)
+    list_filter = ('status', 'payment_method', 'time_accepted_order')
     search_fields = ('status', 'address__user__username', 'payment_method', 'time_accepted_order')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     readonly_fields = ('create_time', 'update_time', 'is_active', 'is_deleted')
     ordering = ('-create_time',)
     date_hierarchy = 'create_time'
     list_per_page = 30
     raw_id_fields = ('address',)
+    inlines = (OrderLineInline,)
     fieldsets = (
         ('Creation Order', {
             'fields': (
-                'address', 'order_item', 'status', 'transaction_id', 'payment_method',
+                'address', 'status', 'transaction_id', 'payment_method',
                 'finally_price',
                 'time_accepted_order', 'time_shipped_order', 'time_deliver_order',
                 'time_rejected_order', 'time_cancelled_order')
@@ -66,17 +102,45 @@ class OrderAdmin(admin.ModelAdmin):
         ('Creation Order', {
             'classes': ('wide',),
             'fields': (
-                'address', 'order_item', 'status', 'transaction_id', 'payment_method',
+                'address', 'status', 'transaction_id', 'payment_method',
                 'finally_price',
                 'time_accepted_order', 'time_shipped_order', 'time_deliver_order',
                 'time_rejected_order', 'time_cancelled_order')
         }),
     )
 
+    def get_queryset(self, request):
+        """
+        Prefetch the order lines for the whole page in one query, and annotate the number of lines and their
+        total with correlated subqueries evaluated for the rows of the page only.
+        """
+        lines = OrderLine.objects.filter(order=OuterRef('pk')).order_by().values('order')
+        items_count = lines.annotate(count=Count('pk')).values('count')
+        items_total = lines.annotate(total=Sum(placed_total())).values('total')
+        return super().get_queryset(request).annotate(
+            items_count=Coalesce(Subquery(items_count, output_field=IntegerField()), 0),
+            items_total=Coalesce(Subquery(items_total, output_field=IntegerField()), 0),
+        ).prefetch_related('lines')
+
+    def items_count(self, obj):  # noqa
+        """Number of items in the order."""
+        return obj.items_count
+
+    items_count.short_description = 'Items'
+    items_count.admin_order_field = 'items_count'
+
+    def items_total(self, obj):  # noqa
+        """Total of the order lines at the prices paid."""
+        return obj.items_total
+
+    items_total.short_description = 'Items Total'
+    items_total.admin_order_field = 'items_total'
+
     def display_order_items(self, obj):
         """Custom method to display order items."""
         return ", ".join(
-            [f"{item.product.name} (Qty: {item.quantity}, Total: {item.total_price})" for item in obj.order_item.all()]
+            [f"{line.product_name} (Qty: {line.quantity}, Total: {line.unit_price * line.quantity})"
+             for line in obj.lines.all()]
         )
 
     display_order_items.short_description = 'Order Items'
@@ -92,6 +156,7 @@ class OrderPaymentAdmin(admin.ModelAdmin):
         'transaction_payment', 'order', 'amount', 'cardholder_name', 'card_number', 'expiration_date', 'cvv', 'status', 'payment_time',
         'is_paid', 'is_failed', 'is_canceled'
     )
+    list_select_related = ('order',)
     list_filter = (
         'transaction_payment', 'order__address__user__username', 'amount', 'status', 'is_paid', 'is_failed', 'is_canceled'
     )
@@ -119,3 +184,20 @@ class OrderPaymentAdmin(admin.ModelAdmin):
             )
         }),
     )
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    """
+    Admin panel configuration for StockReservation model; shows the stock held for orders awaiting payment.
+    """
+    list_display = ('order', 'product', 'quantity', 'status', 'expires_at', 'create_time', 'update_time')
+    list_filter = ('status',)
+    list_select_related = ('order', 'product')
+    ordering = ('-create_time',)
+    list_per_page = 30
+    raw_id_fields = ('order', 'product')
+    readonly_fields = ('order', 'product', 'quantity', 'status', 'expires_at', 'create_time', 'update_time')
+
+    def has_add_permission(self, request):
+        return False
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class OrderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.order'
+
+    def ready(self):
+        """
+        Connect the signal handlers that merge the guest cart at login and release the stock of closed orders.
+        """
+        from apps.order import signals  # noqa
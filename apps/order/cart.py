@@ -0,0 +1,216 @@
+import json
+import logging
+import uuid
+import redis
+from django.conf import settings
+from django.core.signing import BadSignature, Signer
+from django.db import transaction
+
+# Guest carts live in `cart:guest:<cart id>` hashes, the cart id is the only thing kept in a cookie.
+# Additions of signed-in users are buffered in `cart:pending:<user id>` and written behind to OrderItem rows.
+GUEST_KEY = 'cart:guest:{}'
+PENDING_KEY = 'cart:pending:{}'
+# Guest wishlists are still kept in one `product_wishlist<signed product id>` JSON cookie per product.
+WISHLIST_COOKIE_PREFIX = 'product_wishlist'
+
+logger = logging.getLogger(__name__)
+
+_client = None
+
+
+def client():
+    """
+    Return the Redis connection of the cart store, shared by the whole process.
+    """
+    global _client
+    if _client is None:
+        _client = redis.StrictRedis.from_url(settings.CART_REDIS_URL, decode_responses=True)
+    return _client
+
+
+class CartStore:
+    """
+    A cart kept in one Redis hash mapping product id to quantity.
+    Quantities change with HINCRBY, so concurrent additions never overwrite each other,
+    and every write pushes the expiry of the hash `ttl` seconds ahead.
+    """
+
+    def __init__(self, key, ttl=None):
+        self.key = key
+        self.ttl = ttl or settings.CART_TTL
+
+    def add(self, product_id, quantity=1):
+        """
+        Add `quantity` of a product and return the new quantity of the line.
+        """
+        pipe = client().pipeline()
+        pipe.hincrby(self.key, product_id, quantity)
+        pipe.expire(self.key, self.ttl)
+        return pipe.execute()[0]
+
+    def set(self, product_id, quantity):
+        """
+        Replace the quantity of a line; a quantity below one removes it.
+        """
+        if quantity < 1:
+            return self.remove(product_id)
+        pipe = client().pipeline()
+        pipe.hset(self.key, product_id, quantity)
+        pipe.expire(self.key, self.ttl)
+        pipe.execute()
+
+    def remove(self, *product_ids):
+        client().hdel(self.key, *product_ids)
+
+    def items(self):
+        """
+        Return the lines of the cart as a dict mapping product id to quantity.
+        """
+        return {int(product_id): int(quantity) for product_id, quantity in client().hgetall(self.key).items()
+                if int(quantity) > 0}
+
+    def take(self):
+        """
+        Read and empty the cart in one MULTI block, so an addition lands either in the lines returned
+        or in the next cart, never in neither.
+        """
+        pipe = client().pipeline(transaction=True)
+        pipe.hgetall(self.key)
+        pipe.delete(self.key)
+        lines = pipe.execute()[0]
+        return {int(product_id): int(quantity) for product_id, quantity in lines.items() if int(quantity) > 0}
+
+    def merge(self, lines):
+        """
+        Add the lines of another cart, e.g. lines returned by `take`, with one increment per line.
+        """
+        if not lines:
+            return
+        pipe = client().pipeline()
+        for product_id, quantity in lines.items():
+            pipe.hincrby(self.key, product_id, quantity)
+        pipe.expire(self.key, self.ttl)
+        pipe.execute()
+
+    def clear(self):
+        client().delete(self.key)
+
+
+def guest_cart_id(request):
+    """
+    Return the cart id stored in the signed cart cookie of the request, or None.
+    """
+    value = request.COOKIES.get(settings.CART_COOKIE_NAME)
+    if not value:
+        return None
+    try:
+        return Signer().unsign(value)
+    except BadSignature:
+        return None
+
+
+def guest_cart(cart_id):
+    return CartStore(GUEST_KEY.format(cart_id))
+
+
+def new_guest_cart_id():
+    return uuid.uuid4().hex
+
+
+def set_guest_cart_cookie(response, cart_id):
+    """
+    Store the cart id in the cart cookie; only done when a guest starts a cart.
+    """
+    response.set_cookie(settings.CART_COOKIE_NAME, Signer().sign(cart_id), max_age=settings.CART_TTL,
+                        httponly=True, samesite='Lax')
+    return response
+
+
+def pending_cart(user_id):
+    return CartStore(PENDING_KEY.format(user_id))
+
+
+def add_for_user(user_id, product_id, quantity=1):
+    """
+    Buffer an addition to the cart of a signed-in user and queue its write to the database.
+    """
+    from apps.order.tasks import flush_cart
+    pending_cart(user_id).add(product_id, quantity)
+    transaction.on_commit(lambda: flush_cart.delay(user_id))
+
+
+def flush(user_id):
+    """
+    Write the buffered additions of a user to their OrderItem rows with one INSERT ... ON CONFLICT DO UPDATE.
+    Views reading OrderItem call this first, so the write-behind never shows a stale cart.
+    Returns the number of lines written.
+    Products that are gone or no longer live are dropped.
+    """
+    from apps.order.models import OrderItem
+    from apps.product import pricing
+    from apps.product.models import Product
+    store = pending_cart(user_id)
+    lines = store.take()
+    if not lines:
+        return 0
+    try:
+        prices = pricing.resolve_prices(Product.objects.filter(pk__in=list(lines)).only('price', 'effective_price'))
+        OrderItem.objects.add_lines(user_id, lines, prices)
+    except Exception:
+        store.merge(lines)
+        raise
+    return len(prices)
+
+
+def guest_wishlist_lines(request):
+    """
+    Parse the wishlist cookies of the request. Returns (lines, cookie names), lines mapping product id to quantity.
+    Cookies that cannot be parsed are returned too, so they get deleted.
+    """
+    lines = {}
+    cookie_names = []
+    for key, value in request.COOKIES.items():
+        if not key.startswith(WISHLIST_COOKIE_PREFIX):
+            continue
+        cookie_names.append(key)
+        try:
+            product_data = json.loads(value)
+            product_id = int(product_data['product'])
+            quantity = max(int(product_data.get('quantity', 1)), 1)
+        except (ValueError, TypeError, KeyError):
+            continue
+        lines[product_id] = lines.get(product_id, 0) + quantity
+    return lines, cookie_names
+
+
+def merge_guest_state(request, user):
+    """
+    Move the guest cart and the wishlist cookies of the browser to the user's rows at login.
+    Every referenced product is loaded with one query; the active discount comes with it as the stored
+    effective price snapshot. Each table then gets a single INSERT ... ON CONFLICT DO UPDATE adding to the
+    quantities already there, and products that are gone are dropped.
+    The guest cart is read without being emptied, so when Redis or the database fails nothing is lost and the
+    merge is tried again at the next login. Once the rows are written the guest cart is emptied and its cookies
+    are listed in `request.expired_cookies`, so ExpiredCookiesMiddleware deletes them from this response.
+    Additions the user made while signed in stay in their pending buffer and are written behind by `flush`.
+    """
+    from apps.order.models import OrderItem
+    from apps.product import pricing
+    from apps.product.models import Product, Wishlist
+    cart_id = guest_cart_id(request)
+    wishlist_lines, cookie_names = guest_wishlist_lines(request)
+    guest = guest_cart(cart_id) if cart_id is not None else None
+    cart_lines = guest.items() if guest is not None else {}
+    if cart_lines or wishlist_lines:
+        with transaction.atomic():
+            prices = pricing.resolve_prices(Product.objects.filter(
+                pk__in=set(cart_lines) | set(wishlist_lines)).only('price', 'effective_price'))
+            OrderItem.objects.add_lines(user.pk, cart_lines, prices)
+            Wishlist.objects.add_lines(user.pk, wishlist_lines, prices)
+    if guest is not None:
+        cookie_names.append(settings.CART_COOKIE_NAME)
+        try:
+            guest.clear()
+        except redis.RedisError:
+            logger.warning('Could not empty guest cart %s after merging it, it expires on its own', cart_id)
+    request.expired_cookies = [*getattr(request, 'expired_cookies', []), *cookie_names]
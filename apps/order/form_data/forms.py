@@ -83,7 +83,6 @@ class OrderForm(forms.ModelForm):
 
         widgets = {
             'user': forms.HiddenInput(),
-            'order_item': forms.HiddenInput(),
             'address': forms.Select(
                 attrs={'class': 'form-select mt-1 pt-2 py-2 px-4 focus:ring-indigo-500 focus:border-indigo-500 '
                                 'block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'}),
@@ -109,7 +108,6 @@ class OrderForm(forms.ModelForm):
         }
         labels = {
             'user': _('User'),
-            'order_item': _('Order Item'),
             'address': _('Address'),
             'status': _('Status'),
             'transaction_id': _('Transaction ID'),
@@ -129,7 +127,6 @@ class OrderForm(forms.ModelForm):
         }
         help_texts = {
             'user': _('Select the user who placed the order.'),
-            'order_item': _('Select the order item.'),
             'address': _('Select the address.'),
             'status': _('Select the status.'),
             'transaction_id': _('Enter the transaction ID.'),
@@ -151,9 +148,6 @@ class OrderForm(forms.ModelForm):
             'user': {
                 'required': _('User is required.')
             },
-            'order_item': {
-                'required': _('Order item is required.')
-            },
             'address': {
                 'required': _('Address is required.')
             },
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.order.managers import list_price, unit_price
+from apps.order.models import Order, OrderLine
+
+
+class Command(BaseCommand):
+    """
+    Management command to copy the cart rows linked to orders placed before OrderLine existed into order lines.
+    Run it right after the migration adding OrderLine and before serving traffic: a checkout deletes the cart
+    rows of its user, and with them the links of older orders still waiting to be copied.
+    Orders that already have lines are skipped, so running it twice is harmless.
+    The unit price paid comes from the total stored on the cart row at checkout; the current product price is
+    only used when nothing was stored. Discounts were never stored, so each line gets the current discount of
+    its product, the amount the old order totals showed.
+    """
+    help = 'Create the order lines of orders placed before OrderLine existed'
+
+    def add_arguments(self, parser):
+        """
+        Adds the batch size argument.
+        """
+        parser.add_argument('--batch-size', type=int, default=500, help='Number of orders copied per transaction')
+
+    def handle(self, *args, **options):
+        """
+        Handles the command execution.
+        """
+        links = Order.order_item.through.objects
+        pending = Order._base_manager.filter(lines__isnull=True, order_item__isnull=False).order_by(  # noqa
+            'pk').values_list('pk', flat=True).distinct()
+        last_pk = 0
+        created = 0
+        while True:
+            batch = list(pending.filter(pk__gt=last_pk)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            rows = links.filter(order_id__in=batch).order_by('order_id', 'orderitem_id').annotate(
+                current=unit_price('orderitem__'), listed=list_price('orderitem__')).values_list(
+                'order_id', 'orderitem__product_id', 'orderitem__product__name', 'orderitem__total_price',
+                'orderitem__quantity', 'current', 'listed')
+            lines = []
+            for order_id, product_id, name, total_price, quantity, current, listed in rows:
+                paid = total_price // quantity if total_price and quantity else current
+                lines.append(OrderLine(order_id=order_id, product_id=product_id, product_name=name, unit_price=paid,
+                                       discount=max(0, listed - current), quantity=quantity))
+            with transaction.atomic():
+                OrderLine.objects.bulk_create(lines)
+            created += len(lines)
+        self.stdout.write(self.style.SUCCESS(f'{created} order lines created'))
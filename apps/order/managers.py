@@ -1,18 +1,64 @@
 from django.db import models
-from django.db.models import Case, When, Value, BooleanField, IntegerField, ExpressionWrapper, DecimalField, Sum
-from django.db.models import F
+from django.db.models import Case, When, Value, BooleanField, IntegerField, ExpressionWrapper, Sum
+from django.db.models import F, OuterRef, Subquery
 from django.db.models.functions import Coalesce
 from django.utils import timezone
+from apps.core.managers import UserLineQuerySet
 
 
-class OrderItemQuerySet(models.QuerySet):
+def unit_price(prefix=''):
+    """
+    Price paid for one unit: the product's effective price, i.e. its price after the active discount,
+    else its price. `prefix` points at the row holding the product, e.g. 'orderitem__' from a related model.
+    """
+    return Coalesce(F(f'{prefix}product__effective_price'), F(f'{prefix}product__price'), Value(0),
+                    output_field=IntegerField())
+
+
+def list_price(prefix=''):
+    """
+    Price of one unit before any discount.
+    """
+    return Coalesce(F(f'{prefix}product__price'), Value(0), output_field=IntegerField())
+
+
+def line_total(prefix=''):
+    """
+    Amount paid for a line: unit price times quantity.
+    """
+    return ExpressionWrapper(unit_price(prefix) * F(f'{prefix}quantity'), output_field=IntegerField())
+
+
+def line_discount(prefix=''):
+    """
+    Amount taken off a line by the active discount of its product.
+    """
+    return ExpressionWrapper((list_price(prefix) - unit_price(prefix)) * F(f'{prefix}quantity'),
+                             output_field=IntegerField())
+
+
+def placed_total(prefix=''):
+    """
+    Amount paid for a placed order line, from the prices copied at checkout.
+    """
+    return ExpressionWrapper(F(f'{prefix}unit_price') * F(f'{prefix}quantity'), output_field=IntegerField())
+
+
+def placed_discount(prefix=''):
+    """
+    Amount taken off a placed order line by the discount copied at checkout.
+    """
+    return ExpressionWrapper(F(f'{prefix}discount') * F(f'{prefix}quantity'), output_field=IntegerField())
+
+
+class OrderItemQuerySet(UserLineQuerySet):
     def with_discount(self):
         """
         Annotate the queryset with a boolean indicating whether each order item has a discount applied.
         """
         return self.annotate(
             has_discount=Case(
-                When(product__code_discount__isnull=False, then=Value(True)),
+                When(product__active_discount__isnull=False, then=Value(True)),
                 default=Value(False),
                 output_field=BooleanField()
             )
@@ -20,66 +66,66 @@ class OrderItemQuerySet(models.QuerySet):
 
     def total_price_each_product_with_discount(self):
         """
-        Annotate the queryset with the total price for each product considering any code discounts.
+        Annotate the queryset with the discounted price of one unit of each product.
         """
-        return self.annotate(
-            total_price_each_product_with_discount=ExpressionWrapper(
-                F('price') - Coalesce(
-                    F('price') * F('product__code_discount__percentage_discount') / 100,
-                    F('product__code_discount__numerical_discount'),
-                    F('price')
-                ),
-                output_field=DecimalField(max_digits=10, decimal_places=2)
-            )
-        )
+        return self.annotate(total_price_each_product_with_discount=unit_price())
 
     def total_price_without_discount(self):
         """
-        Annotate the queryset with the total price for each product without considering any code discounts.
+        Annotate the queryset with the total price for each product without considering any discount.
         """
         return self.annotate(
-            total_price_without_discount=F('price') * F('quantity')
+            total_price_without_discount=ExpressionWrapper(list_price() * F('quantity'), output_field=IntegerField())
         )
 
     def total_price_each_product(self):
         """
-        Annotate the queryset with the total price for each product, considering whether a discount is applied.
+        Annotate the queryset with the unit price, the line total and the discount of each line, computed in SQL
+        from the product price and its active discount.
         """
         return self.with_discount().annotate(
-            total_price_each_product=Case(
-                When(has_discount=True, then=F('total_price_each_product_with_discount')),
-                default=F('total_price_without_discount'),
-                output_field=DecimalField(max_digits=10, decimal_places=2)
-            )
+            unit_price=unit_price(),
+            total_price_each_product=line_total(),
+            discount_each_product=line_discount(),
         )
 
-    def total_price_ordered(self):
+    def totals(self):
         """
-        Calculate the total price of all order items, considering any code discounts.
+        Return the total price, total discount and total quantity of the order items with one aggregate query.
         """
-        return self.aggregate(
-            total_price_ordered=Coalesce(Sum(F('total_price_each_product')), Value(0))
-        )['total_price_ordered']
+        return self.order_by().aggregate(
+            total_price=Coalesce(Sum(line_total()), Value(0)),
+            total_discount=Coalesce(Sum(line_discount()), Value(0)),
+            total_quantity=Coalesce(Sum('quantity'), Value(0)),
+        )
 
+    def total_price_ordered(self):
+        """
+        Calculate the total price of all order items, considering the active discounts.
+        """
+        return self.totals()['total_price']
 
-class OrderItemManager(models.Manager):
-    def get_queryset(self):
+    def reprice(self):
         """
-        Get the queryset object associated with this manager.
+        Recompute the stored `total_price` of the order items from the current product prices with one UPDATE.
         """
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = OrderItemQuerySet(self.model)
-        return self.__queryset
+        from apps.product.models import Product
+        price = Product._base_manager.filter(pk=OuterRef('product_id')).values(  # noqa
+            unit=Coalesce(F('effective_price'), F('price'), Value(0)))[:1]
+        return self.update(total_price=Subquery(price, output_field=IntegerField()) * F('quantity'),
+                           update_time=timezone.now())
+
 
+class OrderItemManager(models.Manager.from_queryset(OrderItemQuerySet)):
     def total_price_each_product(self):
         """
-        Calculate the total price for each product, considering any code discounts.
+        Calculate the total price for each product, considering the active discounts.
         """
         return self.get_queryset().total_price_each_product()
 
     def total_price_ordered(self):
         """
-        Calculate the total price of all order items, considering any code discounts.
+        Calculate the total price of all order items, considering the active discounts.
         """
         return self.get_queryset().total_price_ordered()
 
@@ -90,7 +136,7 @@ class OrderQuerySet(models.QuerySet):
         Annotate the queryset with the total quantity of all order items in each order.
         """
         return self.annotate(
-            total_quantity_ordered=Sum('order_items__quantity')
+            total_quantity_ordered=Coalesce(Sum('lines__quantity'), Value(0))
         )
 
     def with_total_price(self):
@@ -98,7 +144,7 @@ class OrderQuerySet(models.QuerySet):
         Annotate the queryset with the total price of each order.
         """
         return self.annotate(
-            total_price=Sum('order_items__total_price_each_product')
+            total_price=Coalesce(Sum(placed_total('lines__')), Value(0))
         )
 
     def with_total_discount(self):
@@ -106,24 +152,14 @@ class OrderQuerySet(models.QuerySet):
         Annotate the queryset with the total discount applied to each order.
         """
         return self.annotate(
-            total_discount=Sum(
-                Case(
-                    When(order_items__product__code_discount__percentage_discount__isnull=False,
-                         then=(F('order_items__price') * F('order_items__quantity') *
-                               F('order_items__product__code_discount__percentage_discount') / 100)),
-                    When(order_items__product__code_discount__numerical_discount__isnull=False,
-                         then=F('order_items__product__code_discount__numerical_discount')),
-                    default=Value(0),
-                    output_field=IntegerField()
-                )
-            )
+            total_discount=Coalesce(Sum(placed_discount('lines__')), Value(0))
         )
 
     def with_is_discounted(self):
         """
         Annotate the queryset with a boolean indicating whether each order has a discount applied.
         """
-        return self.annotate(
+        return self.with_total_discount().annotate(
             is_discounted=Case(
                 When(total_discount__gt=0, then=Value(True)),
                 default=Value(False),
@@ -131,23 +167,25 @@ class OrderQuerySet(models.QuerySet):
             )
         )
 
+    def with_totals(self):
+        """
+        Annotate the queryset with the total quantity, price and discount of each order in one GROUP BY.
+        """
+        return self.annotate(
+            total_quantity_ordered=Coalesce(Sum('lines__quantity'), Value(0)),
+            total_price=Coalesce(Sum(placed_total('lines__')), Value(0)),
+            total_discount=Coalesce(Sum(placed_discount('lines__')), Value(0)),
+        )
+
     def orders_within_last_30_days(self):
         """
         Return orders placed within the last 30 days.
         """
         thirty_days_ago = timezone.now() - timezone.timedelta(days=30)
-        return self.filter(created_at__gte=thirty_days_ago)
+        return self.filter(create_time__gte=thirty_days_ago)
 
 
-class OrderManager(models.Manager):
-    def get_queryset(self):
-        """
-        Get the queryset object associated with this manager.
-        """
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = OrderQuerySet(self.model)
-        return self.__queryset
-
+class OrderManager(models.Manager.from_queryset(OrderQuerySet)):
     def with_total_quantity_ordered(self):
         """
         Annotate the queryset with the total quantity of all order items in each order.
@@ -172,6 +210,12 @@ class OrderManager(models.Manager):
         """
         return self.get_queryset().with_is_discounted()
 
+    def with_totals(self):
+        """
+        Annotate the queryset with the total quantity, price and discount of each order.
+        """
+        return self.get_queryset().with_totals()
+
     def orders_within_last_30_days(self):
         """
         Return orders placed within the last 30 days.
@@ -179,6 +223,33 @@ class OrderManager(models.Manager):
         return self.get_queryset().orders_within_last_30_days()
 
 
+class OrderLineQuerySet(models.QuerySet):
+    def from_cart(self, order_items):
+        """
+        Build the unsaved lines of an order from cart order items with one SELECT, copying the product name
+        and the unit price and discount of now; save them with bulk_create once the order has a primary key.
+        """
+        rows = order_items.order_by('pk').annotate(paid=unit_price(), listed=list_price()).values_list(
+            'product_id', 'product__name', 'paid', 'listed', 'quantity')
+        return [self.model(product_id=product_id, product_name=name, unit_price=paid, discount=listed - paid,
+                           quantity=quantity)
+                for product_id, name, paid, listed, quantity in rows]
+
+    def totals(self):
+        """
+        Return the total price, total discount and total quantity of the lines with one aggregate query.
+        """
+        return self.order_by().aggregate(
+            total_price=Coalesce(Sum(placed_total()), Value(0)),
+            total_discount=Coalesce(Sum(placed_discount()), Value(0)),
+            total_quantity=Coalesce(Sum('quantity'), Value(0)),
+        )
+
+
+class OrderLineManager(models.Manager.from_queryset(OrderLineQuerySet)):
+    pass
+
+
 class StatusOrderQuerySet(models.QuerySet):
     def accepted_orders(self):
         """
@@ -217,15 +288,7 @@ class StatusOrderQuerySet(models.QuerySet):
         return self.filter(deliver=True)
 
 
-class StatusOrderManager(models.Manager):
-    def get_queryset(self):
-        """
-        Get the queryset object associated with this manager.
-        """
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = StatusOrderQuerySet(self.model)
-        return self.__queryset
-
+class StatusOrderManager(models.Manager.from_queryset(StatusOrderQuerySet)):
     def accepted_orders(self):
         """
         Retrieve queryset of accepted orders.
@@ -307,15 +370,7 @@ class OrderPaymentQuerySet(models.QuerySet):
         return self.pending_payments().count()
 
 
-class OrderPaymentManager(models.Manager):
-    def get_queryset(self):
-        """
-        Get the queryset object associated with this manager.
-        """
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = OrderPaymentQuerySet(self.model)
-        return self.__queryset
-
+class OrderPaymentManager(models.Manager.from_queryset(OrderPaymentQuerySet)):
     def total_payment_amount(self):
         """
         Calculate the total amount of all payments.
@@ -26,14 +26,17 @@ class OrderItem(mixin_model.TimestampsStatusFlagMixin):
         ordering = ('-create_time',)
         verbose_name = 'Order Item'
         verbose_name_plural = 'Order Items'
-        indexes = [
-            models.Index(
-                fields=('user', 'product'), name='order_item')]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_order_item_user_product')
+        ]
 
 
 class Order(mixin_model.TimestampsStatusFlagMixin):
-    """Model representing an order placed by a user."""
-    order_item = models.ManyToManyField(OrderItem, related_name="order_items", verbose_name=_('Order Items'))
+    """Model representing an order placed by a user; what was bought is kept in its OrderLine rows."""
+    # Legacy links to the cart rows of orders placed before OrderLine existed. Only read by the
+    # backfill_order_lines command; drop the field once it has run on every database.
+    order_item = models.ManyToManyField(OrderItem, related_name="order_items", verbose_name=_('Order Items'),
+                                        blank=True, editable=False)
     address = models.ForeignKey(Address, on_delete=models.CASCADE, related_name="address_order")
     status = models.CharField(max_length=20, choices=validators.StatusChoice.CHOICES,
                               validators=[validators.StatusValidator()],
@@ -75,6 +78,32 @@ class Order(mixin_model.TimestampsStatusFlagMixin):
                 fields=['address'], name='user_order_items')]
 
 
+class OrderLine(models.Model):
+    """
+    A line of a placed order, copied from the cart at checkout: product, name, unit price, discount and quantity.
+    Lines are never updated, so later changes to the cart or to the product do not change placed orders.
+    """
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='lines')
+    product = models.ForeignKey('product.Product', on_delete=models.SET_NULL, related_name='order_lines', null=True,
+                                blank=True)
+    product_name = models.CharField(max_length=100, verbose_name=_('Product Name'))
+    unit_price = models.IntegerField(default=0, verbose_name=_('Unit Price'))
+    discount = models.IntegerField(default=0, verbose_name=_('Discount'))
+    quantity = models.PositiveIntegerField(default=1, verbose_name=_('Quantity'))
+    create_time = models.DateTimeField(auto_now_add=True, editable=False)
+    objects = managers.OrderLineManager()
+
+    def __str__(self):
+        """Return a string representation of the OrderLine."""
+        return f'{self.product_name} - Quantity: {self.quantity} - Unit Price: {self.unit_price}'
+
+    class Meta:
+        """Additional metadata about the OrderLine model."""
+        ordering = ('id',)
+        verbose_name = 'Order Line'
+        verbose_name_plural = 'Order Lines'
+
+
 class OrderPayment(models.Model):
     """Model representing a payment associated with an order."""
 
@@ -112,3 +141,40 @@ class OrderPayment(models.Model):
         indexes = [
             models.Index(fields=['payment_time', 'order']),
         ]
+
+
+class StockReservation(models.Model):
+    """
+    Stock of a product held for an order between checkout and payment, see apps.order.stock.
+    The quantity is taken off Product.quantity when reserved and given back when released.
+    """
+    RESERVED = 'reserved'
+    COMMITTED = 'committed'
+    RELEASED = 'released'
+    STATUS_CHOICES = (
+        (RESERVED, _('Reserved')),
+        (COMMITTED, _('Committed')),
+        (RELEASED, _('Released')),
+    )
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='stock_reservations')
+    product = models.ForeignKey('product.Product', on_delete=models.CASCADE, related_name='stock_reservations')
+    quantity = models.PositiveIntegerField(verbose_name=_('Quantity'))
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RESERVED, verbose_name=_('Status'))
+    expires_at = models.DateTimeField(verbose_name=_('Expires At'))
+    create_time = models.DateTimeField(auto_now_add=True, editable=False)
+    update_time = models.DateTimeField(auto_now=True, editable=False)
+
+    def __str__(self):
+        """Return a string representation of the StockReservation."""
+        return f'{self.order_id} - {self.product_id} - {self.quantity} - {self.status}'
+
+    class Meta:
+        """Additional metadata about the StockReservation model."""
+        ordering = ('-create_time',)
+        verbose_name = 'Stock Reservation'
+        verbose_name_plural = 'Stock Reservations'
+        indexes = [
+            models.Index(fields=['expires_at'], name='stock_reservation_expiring',
+                         condition=models.Q(status='reserved')),
+        ]
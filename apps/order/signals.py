@@ -0,0 +1,33 @@
+import logging
+from django.contrib.auth.signals import user_logged_in
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from apps.order import cart
+from apps.order.models import Order
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(user_logged_in)
+def merge_guest_state_at_login(sender, request, user, **kwargs):  # noqa
+    """
+    Move the guest cart and wishlist of the browser to the user who just logged in.
+    A failed merge never fails the login: the guest cart and its cookies are kept for the next one.
+    """
+    if request is None:
+        return
+    try:
+        cart.merge_guest_state(request, user)
+    except Exception:  # noqa
+        logger.exception('Could not merge the guest cart and wishlist of user %s at login', user.pk)
+
+
+@receiver(post_save, sender=Order)
+def release_stock_of_closed_order(sender, instance, **kwargs):  # noqa
+    """
+    Queue the release of the stock reserved for an order once it is cancelled or rejected.
+    """
+    if instance.cancelled_order or instance.rejected_order:
+        from apps.order.tasks import release_order_stock
+        transaction.on_commit(lambda: release_order_stock.delay(instance.pk))
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from apps.order.models import Order, StockReservation
+from apps.product.models import Product
+
+
+class StockShortage(Exception):
+    """Raised inside `reserve` to roll back a partial reservation."""
+
+
+def requested_quantity(lines):
+    """
+    CASE expression giving the quantity of `lines` (product id -> quantity) for the product of each row.
+    """
+    return Case(*[When(pk=pk, then=Value(quantity)) for pk, quantity in lines.items()],
+                default=Value(0), output_field=IntegerField())
+
+
+def adjust_stock(deltas):
+    """
+    Add `deltas` (product id -> signed quantity) to the stock of the products with one UPDATE.
+    """
+    Product._base_manager.filter(pk__in=list(deltas)).update(  # noqa
+        quantity=F('quantity') + requested_quantity(deltas), update_time=timezone.now())
+
+
+def reserve(order, lines, retry=True):
+    """
+    Reserve `lines` (product id -> quantity) for `order`, all or nothing.
+    The stock is taken with a single conditional UPDATE that only touches products with enough stock left;
+    when it changes fewer rows than there are lines the savepoint is rolled back and the stock is read to
+    report the lines that failed as {product id: (requested, available)}. Returns an empty dict on success.
+    The UPDATE locks the product rows until the surrounding transaction ends, so call this last, just before
+    the checkout commits. Products that are gone count as having no stock.
+    """
+    lines = {product_id: quantity for product_id, quantity in lines.items() if quantity > 0}
+    if not lines:
+        return {}
+    requested = requested_quantity(lines)
+    try:
+        with transaction.atomic():
+            updated = Product._base_manager.filter(pk__in=list(lines), quantity__gte=requested).update(  # noqa
+                quantity=F('quantity') - requested, update_time=timezone.now())
+            if updated != len(lines):
+                raise StockShortage
+            expires_at = timezone.now() + timedelta(seconds=settings.STOCK_RESERVATION_TTL)
+            StockReservation.objects.bulk_create([
+                StockReservation(order=order, product_id=product_id, quantity=quantity, expires_at=expires_at)
+                for product_id, quantity in lines.items()
+            ])
+    except StockShortage:
+        stock = dict(Product._base_manager.filter(pk__in=list(lines)).values_list('pk', 'quantity'))  # noqa
+        failed = {product_id: (quantity, stock.get(product_id, 0)) for product_id, quantity in lines.items()
+                  if stock.get(product_id, 0) < quantity}
+        if not failed and retry:
+            # The missing stock came back in the meantime, e.g. another order was released.
+            return reserve(order, lines, retry=False)
+        return failed or {product_id: (quantity, stock.get(product_id, 0)) for product_id, quantity in lines.items()}
+    return {}
+
+
+def release(order_ids):
+    """
+    Give back the stock of the reservations still held for `order_ids`.
+    Committed and already released reservations are left alone, so releasing twice is harmless.
+    Returns the number of reservations released.
+    """
+    with transaction.atomic():
+        reservations = list(StockReservation.objects.select_for_update().filter(
+            order_id__in=list(order_ids), status=StockReservation.RESERVED).order_by('pk').values_list(
+            'pk', 'product_id', 'quantity'))
+        if not reservations:
+            return 0
+        deltas = {}
+        for _, product_id, quantity in reservations:
+            deltas[product_id] = deltas.get(product_id, 0) + quantity
+        adjust_stock(deltas)
+        StockReservation.objects.filter(pk__in=[pk for pk, _, _ in reservations]).update(
+            status=StockReservation.RELEASED, update_time=timezone.now())
+    return len(reservations)
+
+
+def commit(order):
+    """
+    Make the reservations of an order final once it is paid.
+    Returns False when its reservations were released in the meantime, e.g. the payment came after they expired.
+    """
+    updated = StockReservation.objects.filter(order=order, status=StockReservation.RESERVED).update(
+        status=StockReservation.COMMITTED, update_time=timezone.now())
+    if updated:
+        return True
+    return not StockReservation.objects.filter(order=order, status=StockReservation.RELEASED).exists()
+
+
+def release_expired(batch_size=500):
+    """
+    Release the reservations of orders that were not paid in time and cancel those orders.
+    Returns the number of orders cancelled.
+    """
+    now = timezone.now()
+    order_ids = list(StockReservation.objects.filter(
+        status=StockReservation.RESERVED, expires_at__lte=now).order_by().values_list(
+        'order_id', flat=True).distinct()[:batch_size])
+    if not order_ids:
+        return 0
+    release(order_ids)
+    return Order.objects.filter(pk__in=order_ids, cancelled_order=False).update(
+        cancelled_order=True, time_cancelled_order=now, update_time=now)
@@ -0,0 +1,28 @@
+from celery import shared_task
+from apps.order import cart, stock
+
+
+@shared_task
+def flush_cart(user_id):
+    """
+    Write the buffered cart additions of a user to the database, see apps.order.cart.
+    Queued after every addition; finds nothing to do when a view already flushed the cart.
+    """
+    return cart.flush(user_id)
+
+
+@shared_task
+def release_order_stock(order_id):
+    """
+    Give back the stock reserved for a cancelled or rejected order, see apps.order.stock.
+    """
+    return stock.release([order_id])
+
+
+@shared_task
+def release_expired_reservations():
+    """
+    Release the stock of orders not paid within STOCK_RESERVATION_TTL and cancel them.
+    Runs periodically from celery beat, see `beat_schedule` in config/celery.py.
+    """
+    return stock.release_expired()
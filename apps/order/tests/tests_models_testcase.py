@@ -1,11 +1,22 @@
+import io
+import json
 from datetime import timedelta, date
 from decimal import Decimal
-from django.db import transaction
-from django.test import TestCase
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.core.management import call_command
+from django.core.signing import Signer
+from django.db import DatabaseError, connection, transaction
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from django.utils import timezone
-from apps.order.models import Order, OrderItem, OrderPayment
+from apps.core.pagination import EstimatedCountPaginator
+from apps.order import cart, stock
+from apps.order.models import Order, OrderItem, OrderLine, OrderPayment, StockReservation
 from apps.account.models import User, Address, CodeDiscount
-from apps.product.models import Category, Brand, Product, AddToInventory
+from apps.product.models import Category, Brand, Product, AddToInventory, Discount, Wishlist
 
 
 class OrderItemTestCase(TestCase):
@@ -205,3 +216,279 @@ class OrderPaymentTestCase(TestCase):
         order_payment.delete()
         with self.assertRaises(OrderPayment.DoesNotExist):  # noqa
             OrderPayment.objects.get(id=order_payment.id)
+
+
+class EstimatedCountPaginatorTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser")  # noqa
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand")
+        for quantity in (1, 2, 3):
+            product = Product.objects.create(category=self.category, brand=self.brand, name=f"Test Product {quantity}")
+            OrderItem.objects.create(user=self.user, product=product, quantity=quantity)
+
+    def test_small_table_is_counted_exactly(self):
+        paginator = EstimatedCountPaginator(OrderItem.objects.order_by('-pk'), 2)
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_filtered_queryset_is_counted_exactly(self):
+        paginator = EstimatedCountPaginator(OrderItem.objects.filter(quantity__gte=2).order_by('-pk'), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 2)
+
+
+class CartStoreTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser")  # noqa
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand")
+        self.product = Product.objects.create(category=self.category, brand=self.brand, name="Test Product",
+                                              price=100)
+        self.cart_id = cart.new_guest_cart_id()
+        self.guest = cart.guest_cart(self.cart_id)
+
+    def tearDown(self):
+        self.guest.clear()
+        cart.pending_cart(self.user.pk).clear()
+
+    def test_guest_cart_counts_quantities_in_redis(self):
+        self.assertEqual(self.guest.add(self.product.pk), 1)
+        self.assertEqual(self.guest.add(self.product.pk, 2), 3)
+        self.assertEqual(self.guest.items(), {self.product.pk: 3})
+        self.guest.set(self.product.pk, 0)
+        self.assertEqual(self.guest.items(), {})
+
+    def test_guest_cart_keeps_only_the_cart_id_in_a_cookie(self):
+        response = self.client.post(reverse('add_order_item', args=(self.product.pk,)))
+        cookie = response.cookies[settings.CART_COOKIE_NAME].value
+        self.client.post(reverse('add_order_item', args=(self.product.pk,)))
+        cart_id = Signer().unsign(cookie)
+        self.addCleanup(cart.guest_cart(cart_id).clear)
+        self.assertEqual(cart.guest_cart(cart_id).items(), {self.product.pk: 2})
+        self.assertFalse(any(key.startswith('product_cart') for key in self.client.cookies))
+
+    def test_guest_cart_page_cost_does_not_depend_on_the_number_of_lines(self):
+        self.client.cookies[settings.CART_COOKIE_NAME] = Signer().sign(self.cart_id)
+        url = reverse('add_order_item_detail_views')
+        self.guest.add(self.product.pk)
+        with CaptureQueriesContext(connection) as one_line:
+            self.client.get(url)
+        for index in range(3):
+            product = Product.objects.create(category=self.category, brand=self.brand, name=f"Product {index}",
+                                             price=10)
+            self.guest.add(product.pk)
+        self.guest.add(0)
+        with CaptureQueriesContext(connection) as four_lines:
+            response = self.client.get(url)
+        self.assertEqual(len(four_lines), len(one_line))
+        self.assertEqual(len(response.context['cart_items_cookies']), 4)
+        self.assertNotIn(0, self.guest.items())
+
+    def test_guest_cart_update_validates_the_quantity(self):
+        self.client.cookies[settings.CART_COOKIE_NAME] = Signer().sign(self.cart_id)
+        self.guest.add(self.product.pk)
+        url = reverse('update_order_item', args=(self.product.pk,))
+        for quantity in ('', 'many', '0'):
+            self.assertEqual(self.client.post(url, {'quantity': quantity}).status_code, 400)
+        self.assertEqual(self.client.post(url, {'quantity': '3'}).status_code, 200)
+        self.assertEqual(self.guest.items(), {self.product.pk: 3})
+
+    def test_flush_writes_buffered_additions_behind(self):
+        with self.captureOnCommitCallbacks():
+            cart.add_for_user(self.user.pk, self.product.pk)
+            cart.add_for_user(self.user.pk, self.product.pk)
+        self.assertEqual(cart.flush(self.user.pk), 1)
+        self.assertEqual(cart.flush(self.user.pk), 0)
+        order_item = OrderItem.objects.get(user=self.user, product=self.product)
+        self.assertEqual((order_item.quantity, order_item.total_price), (2, 200))
+
+    def test_login_merges_guest_cart_and_wishlist_in_bulk(self):
+        other = Product.objects.create(category=self.category, brand=self.brand, name="Other Product", price=50)
+        OrderItem.objects.create(user=self.user, product=self.product, quantity=1, total_price=100)
+        self.guest.add(self.product.pk, 2)
+        self.guest.add(other.pk)
+        request = RequestFactory().get('/')
+        request.COOKIES[settings.CART_COOKIE_NAME] = Signer().sign(self.cart_id)
+        request.COOKIES['product_wishlist1'] = json.dumps({'product': other.pk, 'quantity': 1})
+        request.COOKIES['product_wishlist2'] = json.dumps({'product': 0, 'quantity': 1})
+        cart.merge_guest_state(request, self.user)
+        self.assertEqual(dict(OrderItem.objects.filter(user=self.user).values_list('product', 'quantity')),
+                         {self.product.pk: 3, other.pk: 1})
+        self.assertEqual(list(Wishlist.objects.filter(user=self.user).values_list('product', 'quantity')),
+                         [(other.pk, 1)])
+        self.assertEqual(self.guest.items(), {})
+        self.assertCountEqual(request.expired_cookies,
+                              ['product_wishlist1', 'product_wishlist2', settings.CART_COOKIE_NAME])
+
+    def test_failed_merge_keeps_guest_cart_and_does_not_fail_login(self):
+        self.guest.add(self.product.pk, 2)
+        request = RequestFactory().get('/')
+        request.COOKIES[settings.CART_COOKIE_NAME] = Signer().sign(self.cart_id)
+        with mock.patch.object(OrderItem.objects, 'add_lines', side_effect=DatabaseError('down')), \
+                self.assertLogs('apps.order.signals', 'ERROR'):
+            user_logged_in.send(sender=User, request=request, user=self.user)
+        self.assertEqual(self.guest.items(), {self.product.pk: 2})
+        self.assertFalse(hasattr(request, 'expired_cookies'))
+        self.assertFalse(OrderItem.objects.filter(user=self.user).exists())
+
+
+class UserLineUpsertTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser")  # noqa
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand")
+        self.product = Product.objects.create(category=self.category, brand=self.brand, name="Test Product",
+                                              price=100)
+        self.prices = {self.product.pk: 100}
+
+    def test_add_lines_is_one_statement_that_increments(self):
+        with self.assertNumQueries(1):
+            OrderItem.objects.add_lines(self.user.pk, {self.product.pk: 1}, self.prices)
+        with self.assertNumQueries(1):
+            order_item = OrderItem.objects.add_lines(self.user.pk, {self.product.pk: 2}, self.prices)[0]
+        self.assertEqual((order_item.quantity, order_item.total_price), (3, 300))
+        self.assertEqual(OrderItem.objects.filter(user=self.user, product=self.product).count(), 1)
+
+    def test_add_lines_revives_soft_deleted_wishlist_rows(self):
+        Wishlist.objects.add_lines(self.user.pk, {self.product.pk: 3}, self.prices)
+        Wishlist.soft_delete.filter(user=self.user).delete()
+        wishlist = Wishlist.objects.add_lines(self.user.pk, {self.product.pk: 1}, self.prices)[0]
+        self.assertEqual((wishlist.quantity, wishlist.total_price, wishlist.is_deleted, wishlist.is_active),
+                         (1, 100, False, True))
+        wishlist = Wishlist.objects.add_lines(self.user.pk, {self.product.pk: 1}, self.prices)[0]
+        self.assertEqual((wishlist.quantity, wishlist.total_price), (2, 200))
+
+    def test_add_lines_skips_products_without_price(self):
+        self.assertEqual(OrderItem.objects.add_lines(self.user.pk, {0: 1}, self.prices), [])
+
+
+class OrderTotalsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser")  # noqa
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand")
+        self.product = Product.objects.create(category=self.category, brand=self.brand, name="Test Product",
+                                              price=100)
+        self.discounted = Product.objects.create(category=self.category, brand=self.brand, name="Discounted",
+                                                 price=200)
+        Discount.objects.create(product=self.discounted, percentage_discount=10)
+        self.address = Address.objects.create(user=self.user, address_name="Home", country="Iran", city="Tehran",
+                                              street="123 Main St", building_number=5, floor_number=3,
+                                              postal_code=12345)
+        # Stored totals are stale on purpose, the engine reads the product prices.
+        self.line = OrderItem.objects.create(user=self.user, product=self.product, quantity=2, total_price=1)
+        self.discounted_line = OrderItem.objects.create(user=self.user, product=self.discounted, quantity=1,
+                                                        total_price=1)
+
+    def test_line_totals_are_computed_in_sql(self):
+        lines = {item.product_id: item for item in OrderItem.objects.total_price_each_product()}
+        self.assertEqual(lines[self.product.pk].total_price_each_product, 200)
+        self.assertEqual(lines[self.discounted.pk].unit_price, 180)
+        self.assertEqual(lines[self.discounted.pk].discount_each_product, 20)
+        self.assertTrue(lines[self.discounted.pk].has_discount)
+
+    def test_cart_totals_are_one_query(self):
+        with self.assertNumQueries(1):
+            totals = OrderItem.objects.filter(user=self.user).totals()
+        self.assertEqual(totals, {'total_price': 380, 'total_discount': 20, 'total_quantity': 3})
+
+    def test_reprice_recomputes_stored_totals(self):
+        OrderItem.objects.filter(user=self.user).reprice()
+        self.line.refresh_from_db()
+        self.discounted_line.refresh_from_db()
+        self.assertEqual((self.line.total_price, self.discounted_line.total_price), (200, 180))
+
+    def test_order_lines_copy_the_cart(self):
+        order = Order.objects.create(address=self.address, status='paid')
+        lines = OrderLine.objects.from_cart(OrderItem.objects.filter(user=self.user))
+        for line in lines:
+            line.order = order
+        with self.assertNumQueries(1):
+            OrderLine.objects.bulk_create(lines)
+        OrderItem.objects.filter(user=self.user).delete()
+        Product.objects.filter(pk=self.product.pk).update(name="Renamed", price=500)
+        placed = {line.product_id: line for line in order.lines.all()}
+        self.assertEqual((placed[self.product.pk].product_name, placed[self.product.pk].unit_price),
+                         ("Test Product", 100))
+        self.assertEqual((placed[self.discounted.pk].unit_price, placed[self.discounted.pk].discount), (180, 20))
+
+    def test_backfill_copies_legacy_order_links(self):
+        order = Order.objects.create(address=self.address, status='paid')
+        OrderItem.objects.filter(user=self.user).reprice()
+        order.order_item.set([self.line, self.discounted_line])
+        # Prices move after the order was paid; the backfill keeps the prices stored at checkout.
+        Product.soft_delete.filter(pk=self.product.pk).update(price=500, effective_price=500)
+        call_command('backfill_order_lines', stdout=io.StringIO())
+        order = Order.objects.with_totals().get(pk=order.pk)
+        self.assertEqual((order.total_price, order.total_discount, order.total_quantity_ordered), (380, 20, 3))
+        self.assertEqual(set(order.lines.values_list('product_name', flat=True)), {"Test Product", "Discounted"})
+        call_command('backfill_order_lines', stdout=io.StringIO())
+        self.assertEqual(order.lines.count(), 2)
+
+    def test_order_totals(self):
+        order = Order.objects.create(address=self.address, status='paid')
+        lines = OrderLine.objects.from_cart(OrderItem.objects.filter(user=self.user))
+        for line in lines:
+            line.order = order
+        OrderLine.objects.bulk_create(lines)
+        order = Order.objects.with_totals().get(pk=order.pk)
+        self.assertEqual((order.total_price, order.total_discount, order.total_quantity_ordered), (380, 20, 3))
+        self.assertTrue(Order.objects.with_is_discounted().get(pk=order.pk).is_discounted)
+
+
+class StockReservationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser")  # noqa
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand")
+        self.product = Product.objects.create(category=self.category, brand=self.brand, name="Test Product",
+                                              price=100, quantity=5)
+        self.scarce = Product.objects.create(category=self.category, brand=self.brand, name="Scarce Product",
+                                             price=100, quantity=1)
+        self.address = Address.objects.create(user=self.user, address_name="Home", country="Iran", city="Tehran",
+                                              street="123 Main St", building_number=5, floor_number=3,
+                                              postal_code=12345)
+        self.order = Order.objects.create(address=self.address, status='paid')
+
+    def stock_of(self, product):
+        return Product.soft_delete.values_list('quantity', flat=True).get(pk=product.pk)
+
+    def test_reserve_takes_stock_of_every_line(self):
+        self.assertEqual(stock.reserve(self.order, {self.product.pk: 2, self.scarce.pk: 1}), {})
+        self.assertEqual((self.stock_of(self.product), self.stock_of(self.scarce)), (3, 0))
+        self.assertEqual(self.order.stock_reservations.filter(status=StockReservation.RESERVED).count(), 2)
+
+    def test_reserve_takes_stock_with_one_conditional_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            stock.reserve(self.order, {self.product.pk: 2, self.scarce.pk: 1})
+        statements = [query['sql'].split()[0].upper() for query in queries]
+        self.assertEqual(statements.count('UPDATE'), 1)
+        self.assertFalse(any('FOR UPDATE' in query['sql'] for query in queries))
+
+    def test_reserve_is_all_or_nothing_and_reports_failed_lines(self):
+        failed = stock.reserve(self.order, {self.product.pk: 2, self.scarce.pk: 3})
+        self.assertEqual(failed, {self.scarce.pk: (3, 1)})
+        self.assertEqual((self.stock_of(self.product), self.stock_of(self.scarce)), (5, 1))
+        self.assertFalse(self.order.stock_reservations.exists())
+
+    def test_release_gives_stock_back_once(self):
+        stock.reserve(self.order, {self.product.pk: 2})
+        self.assertEqual(stock.release([self.order.pk]), 1)
+        self.assertEqual(stock.release([self.order.pk]), 0)
+        self.assertEqual(self.stock_of(self.product), 5)
+        self.assertFalse(stock.commit(self.order))
+
+    def test_expired_reservations_are_released_and_orders_cancelled(self):
+        stock.reserve(self.order, {self.product.pk: 2})
+        self.order.stock_reservations.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(stock.release_expired(), 1)
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.cancelled_order)
+        self.assertEqual(self.stock_of(self.product), 5)
+
+    def test_commit_keeps_the_stock_taken(self):
+        stock.reserve(self.order, {self.product.pk: 2})
+        self.assertTrue(stock.commit(self.order))
+        self.assertEqual(stock.release([self.order.pk]), 0)
+        self.assertEqual(self.stock_of(self.product), 3)
@@ -6,7 +6,8 @@ from django.shortcuts import render, redirect
 from django.utils.translation import gettext_lazy as _
 from apps.account.models import CodeDiscount, Role, Address
 from apps.order.form_data import forms
-from apps.order import mixin
+from apps.order.models import OrderLine
+from apps.order import cart, mixin, stock
 
 
 class AddOrderView(mixin.ProductDiscountMixin):
@@ -45,28 +46,23 @@ class AddOrderView(mixin.ProductDiscountMixin):
         """
         Handle GET requests: instantiate a blank version of the form.
         """
-        order_item = forms.OrderItem.objects.filter(user=self.user)  # noqa
+        cart.flush(self.user_id)
+        order_items = forms.OrderItem.objects.filter(user=self.user)
+        order_item = list(order_items.total_price_each_product().select_related('product'))  # noqa
+        sum_total_price = order_items.totals()['total_price']
         cart_data = {}
-        sum_total_price = 0
         pk_product = None
         for item in order_item:
-            total = item.product.price * item.quantity
             product = item.product  # noqa
             pk_product = product.pk
-            sum_total_price += item.total_price
-            latest_discount_product_price = product.product_code_discounts.filter(is_expired=False,
-                                                                                  is_active=True).order_by(
-                '-create_time').first()
-            product_discount = self.calculate_product_discount(product_instance=product,
-                                                               latest_discount=latest_discount_product_price)
             cart_data[item.product.pk] = {
                 'product': item.product.id,
                 'image_url': product,
                 'name': item.product.name,
-                'price': product_discount if product_discount else product.price,
+                'price': item.unit_price,
                 'quantity': item.quantity,
-                'total': total,
-                'total_price': item.total_price,
+                'total': item.total_price_each_product + item.discount_each_product,
+                'total_price': item.total_price_each_product,
             }
         form = self.form_class()
         form.fields['address'].queryset = Address.objects.filter(user=self.user)
@@ -74,7 +70,6 @@ class AddOrderView(mixin.ProductDiscountMixin):
                       {'form': form, 'pk_product': pk_product, 'products': cart_data,
                        'sum_total_price': sum_total_price})
 
-    @transaction.atomic
     def post(self, request, *args, **kwargs):
         """
         Handle POST requests: instantiate a form instance with the passed
@@ -87,26 +82,39 @@ class AddOrderView(mixin.ProductDiscountMixin):
     def process_order(self, form):
         """
         function to process the order and save it to the database.
+        The cart is copied into order lines at the current product prices, the posted `finally_price` is not
+        trusted. Buffered cart additions are flushed first, in their own transaction, so a failed checkout
+        never loses them. The checkout transaction then takes the same statements whatever the size of the
+        cart: one SELECT of the cart, the INSERT of the order, one INSERT of all the lines, the DELETE emptying
+        the cart and, last so the product rows stay locked only until the commit, the stock reservation.
+        When a line cannot be reserved nothing is saved and the lines out of stock are returned.
         """
-        order_items = forms.OrderItem.objects.filter(user=self.user)
-        order = form.save(commit=False)
-        product_discount = form.cleaned_data.get('finally_price')
-        if self.user_has_discount:
-            product_discount = self.calculate_product_discount(form.cleaned_data.get('finally_price'),
-                                                               self.code_discounts_role)
-        order.product = self.product_instance
-        order.product_discount = product_discount
-
-        if self.user_is_authenticated:
+        cart.flush(self.user_id)
+        with transaction.atomic():
+            order_items = forms.OrderItem.objects.filter(user=self.user)
+            lines = OrderLine.objects.from_cart(order_items)
+            order = form.save(commit=False)
+            product_discount = sum(line.unit_price * line.quantity for line in lines)
+            if self.user_has_discount:
+                code_discount_price = self.calculate_product_discount(product_discount, self.code_discounts_role)
+                if code_discount_price is not None:
+                    product_discount = max(0, round(code_discount_price))
+            order.product = self.product_instance
+            order.product_discount = product_discount
             order.user = self.request.user
             order.address = form.cleaned_data.get('address')
             order.finally_price = product_discount
             order.save()
-            order.order_item.set(order_items)
-            order.save()
-            response = JsonResponse({'success': True, 'message': _('Order added successfully')})
-            return redirect(self.next_page_payment_order)
-        else:
-            response = JsonResponse({'success': False, 'message': _('You must be logged in to place an order')})
-
-        return response
+            for line in lines:
+                line.order = order
+            OrderLine.objects.bulk_create(lines)
+            order_items.delete()
+            out_of_stock = stock.reserve(order, {line.product_id: line.quantity for line in lines})
+            if out_of_stock:
+                transaction.set_rollback(True)
+                return JsonResponse({'success': False, 'message': _('Some products are out of stock'),
+                                     'out_of_stock': [{'product': product_id, 'requested': requested,
+                                                       'available': available}
+                                                      for product_id, (requested, available) in out_of_stock.items()]},
+                                    status=409)
+        return redirect(self.next_page_payment_order)
@@ -1,13 +1,14 @@
-import json
-from django.core.signing import Signer
 from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import render, get_object_or_404
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.views import generic
 from apps.order.form_data import forms
-from apps.order import mixin
+from apps.order import cart, mixin
 from apps.product.models import Product
+from apps.product import pricing
+from apps.product.managers import card_prefetch
 
 
 class AddOrderItemView(mixin.ProductDiscountMixin):
@@ -20,38 +21,19 @@ class AddOrderItemView(mixin.ProductDiscountMixin):
         """
         Handles adding a product to the cart for authenticated users. It initializes a form instance using POST data.
 
-        Checks if the form data is valid. If valid, calculates the discounted price for the product if a discount is
-        available; otherwise, uses the product's regular price.
+        Checks if the form data is valid. If valid, adds one unit of the product to the user's cart in Redis; the
+        OrderItem row is written behind by the `flush_cart` task, or by the next view reading the cart.
 
-        Attempts to retrieve an existing cart item for the user and product. If not found, creates a new cart item
-        with default quantity 1 and calculated total price.
-
-        If form validation fails, returns JSON response with error details. If successful, updates cart item
-        quantity and total price if item exists, or creates a new item.
+        If form validation fails, returns JSON response with error details.
         """
         form = self.form_class(self.request_post)
         if form.is_valid():
             try:
-                product_discount = self.calculate_product_discount(self.product_instance,
-                                                                   self.latest_discount)
-                total_price = product_discount if product_discount else self.product_instance.price
-
-                cart, created = forms.OrderItem.objects.get_or_create(
-                    user=self.request.user,
-                    product=self.product_instance,
-                    defaults={'quantity': 1, 'total_price': total_price}
-                )
-
-                if not created:
-                    cart.quantity += 1
-                    cart.total_price += total_price
-                    cart.save()
-
+                cart.add_for_user(self.request.user.pk, self.product_instance.pk)
                 response = JsonResponse({'message': _('Product added to cart successfully.')})
             except Exception as e:
                 response = JsonResponse({'error': str(e)}, status=500)
         else:
-            form_errors = form.errors.as_json()
             response = JsonResponse({'error': _('Invalid form data.'), 'form_errors': form.errors}, status=400)
 
         return response
@@ -64,64 +46,72 @@ class ShowOrderItemProductView(generic.ListView):
 
     def get(self, request, *args, **kwargs):  # noqa
         """
-        Handles GET requests. If the user is not authenticated, calls a method to display cart items stored in cookies.
+        Handles GET requests. If the user is not authenticated, calls a method to display the guest cart.
          Otherwise, displays items stored in the database.
         """
         if not request.user.is_authenticated:
-            return self.show_product_order_item_cookie(request)
+            return self.show_product_order_item_guest(request)
         else:
             return self.show_product_order_item_authenticated(request)
 
-    def show_product_order_item_cookie(self, request):  # noqa
+    def show_product_order_item_guest(self, request):  # noqa
         """
-        Fetches and displays cart items stored in cookies for non-authenticated users. Renders a template
-        with cart item details and total price.
+        Fetches and displays the guest cart kept in Redis for non-authenticated users. Prices come from the
+        products, the cart only holds quantities. All products are loaded with one query and their primary media
+        with one more, whatever the number of lines; products that are gone are removed from the cart.
+        Renders a template with cart item details and total price.
         """
         cart_items_cookies = {}
         sum_total_price = 0
-        img_url = set()
-        for key, value in request.COOKIES.items():
-            if key.startswith('product_cart'):
-                product_data = json.loads(value)
-                cart_items_cookies[key] = product_data
-                total_price = product_data.get('total_price', 0)
-                sum_total_price += total_price
-                product_id = product_data.get('product')
-                product_instance = Product.objects.get(pk=product_id)
-                media_instances = product_instance.media_products.all()
-                for media_instance in media_instances:
-                    url = media_instance.get_img()
-                    img_url.add(url)
+        cart_id = cart.guest_cart_id(request)
+        store = cart.guest_cart(cart_id) if cart_id else None
+        lines = store.items() if store else {}
+        products = Product.objects.only('name', 'price', 'effective_price').prefetch_related(
+            card_prefetch()).in_bulk(list(lines))
+        for product_id, quantity in lines.items():
+            product_instance = products.get(product_id)
+            if product_instance is None:
+                continue
+            price = pricing.product_price(product_instance)
+            total_price = (price or 0) * quantity
+            sum_total_price += total_price
+            card_media = product_instance.card_media
+            cart_items_cookies[product_id] = {
+                'product': product_id,
+                'name': product_instance.name,
+                'image_url': card_media[0].get_img() if card_media else None,
+                'price': price,
+                'quantity': quantity,
+                'total_price': total_price,
+            }
+        stale = set(lines) - set(products)
+        if stale:
+            store.remove(*stale)
         return render(request, 'order/view_cart/order_item.html',
-                      {'img_url': img_url, 'cart_items_cookies': cart_items_cookies,
-                       'sum_total_price': sum_total_price})
+                      {'cart_items_cookies': cart_items_cookies, 'sum_total_price': sum_total_price})
 
     def show_product_order_item_authenticated(self, request):  # noqa
         """
-        Fetches and displays cart items stored in the database for authenticated users. Calculates any available
-         product discounts and renders a template with cart item details and total price.
+        Fetches and displays cart items stored in the database for authenticated users. Unit prices, line totals
+         and the cart total are computed in SQL from the product prices and their active discounts.
         """
-        cart_items = forms.OrderItem.objects.filter(user=request.user)  # noqa
+        cart.flush(request.user.pk)
+        order_items = forms.OrderItem.objects.filter(user=request.user)
+        cart_items = list(order_items.total_price_each_product().select_related(
+            'product').prefetch_related(card_prefetch('product__')))  # noqa
+        sum_total_price = order_items.totals()['total_price']
         cart_data = {}
-        sum_total_price = 0
         pk_product = None
         for item in cart_items:
             product = item.product
             pk_product = product.pk
-            sum_total_price += item.total_price
-            latest_discount_product_price = product.product_code_discounts.filter(is_expired=False,
-                                                                                  is_active=True).order_by(
-                '-create_time').first()
-            calculate = mixin.ProductDiscountMixin()
-            product_discount = calculate.calculate_product_discount(product_instance=product,
-                                                                    latest_discount=latest_discount_product_price)
             cart_data[item.product.pk] = {
                 'product': item.product.id,
                 'image_url': product,
                 'name': item.product.name,
-                'price': product_discount if product_discount else product.price,
+                'price': item.unit_price,
                 'quantity': item.quantity,
-                'total_price': item.total_price,
+                'total_price': item.total_price_each_product,
             }
         return render(request, 'order/view_cart/order_item.html',
                       {'pk_product': pk_product, 'cart_items': cart_data, 'sum_total_price': sum_total_price})
@@ -134,22 +124,21 @@ class DeleteOrderItemProductView(generic.ListView):
 
     def setup(self, request, *args, **kwargs):
         """
-        Initializes necessary variables and retrieves the product instance based on the URL parameter `pk`.
-        Uses the `Signer` to sign the product ID for secure retrieval.
+        Initializes necessary variables and retrieves the product instance based on the URL parameter `pk`
+        and the id of the guest cart from the cart cookie.
         """
         self.product_instance = get_object_or_404(Product, pk=kwargs['pk'])  # noqa
-        self.signer = Signer()  # noqa
         self.user_authenticated = request.user.is_authenticated  # noqa
-        self.signed_product_id = self.signer.sign(str(self.product_instance.pk))  # noqa
+        self.cart_id = cart.guest_cart_id(request)  # noqa
         return super().setup(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):  # noqa
         """
-        Handles POST requests. If the user is not authenticated, calls a method to delete the product from the cart
-         stored in cookies. Otherwise, deletes the product from the database.
+        Handles POST requests. If the user is not authenticated, calls a method to delete the product from the
+         guest cart. Otherwise, deletes the product from the database.
         """
         if not self.user_authenticated:
-            return self.delete_product_from_cart_cookie(request)
+            return self.delete_product_from_guest_cart(request)
         else:
             return self.delete_product_from_cart_authenticated(request)
 
@@ -160,6 +149,7 @@ class DeleteOrderItemProductView(generic.ListView):
         """
         product = self.product_instance
         if self.user_authenticated:
+            cart.flush(request.user.pk)
             with transaction.atomic():
                 cart_obj = forms.OrderItem.objects.filter(user=request.user, product=product).first()
                 cart_obj.delete()
@@ -167,18 +157,15 @@ class DeleteOrderItemProductView(generic.ListView):
         else:
             return JsonResponse({'success': False})
 
-    def delete_product_from_cart_cookie(self, request):
+    def delete_product_from_guest_cart(self, request):  # noqa
         """
-        Deletes the specified product from the cart stored in cookies for non-authenticated users.
-        Returns a JSON response indicating success or failure and deletes the corresponding cookie.
+        Deletes the specified product from the guest cart kept in Redis for non-authenticated users.
+        Returns a JSON response indicating success or failure.
         """
-        cookie_key = f"product_cart{self.signed_product_id}"
-        if cookie_key in self.request.COOKIES:
-            response = JsonResponse({'success': True})
-            response.delete_cookie(cookie_key)
-            return response
-        else:
+        if self.cart_id is None:
             return JsonResponse({'success': False})
+        cart.guest_cart(self.cart_id).remove(self.product_instance.pk)
+        return JsonResponse({'success': True})
 
 
 class UpdateOrderItemProductView(AddOrderItemView):
@@ -186,76 +173,47 @@ class UpdateOrderItemProductView(AddOrderItemView):
     Defines a view for updating items in the shopping cart, inheriting functionality from
     `AddOrderItemView` for adding products to the cart.
     """
-    def setup(self, request, *args, **kwargs):
-        """
-        Initializes necessary variables and retrieves the product instance based on the URL
-        parameter `pk`. Uses the `Signer` to sign the product ID for secure retrieval. Also initializes form data,
-         quantity, and total price for updating the cart item.
-        """
-        self.product_instance = get_object_or_404(Product, pk=kwargs['pk'])  # noqa
-        self.signer = Signer()  # noqa
-        self.user_authenticated = request.user.is_authenticated  # noqa
-        self.signed_product_id = self.signer.sign(str(self.product_instance.pk))  # noqa
-        self.latest_discount = self.product_instance.product_code_discounts.filter(is_expired=False,  # noqa
-                                                                                   is_active=True).order_by(
-            '-create_time').first()
-        self.request_quantity = request.POST.get('quantity')  # noqa
-        self.request_total_price = request.POST.get('total_price')  # noqa
-        self.form_class = forms.OrderItemForm  # noqa
-        return super().setup(request, *args, **kwargs)
-
     def post(self, request, *args, **kwargs):  # noqa
         """
-        Handles POST requests. If the user is not authenticated, calls a method to update the
-         product in the cart stored in cookies. Otherwise, updates the product in the database.
+        Handles POST requests. The posted quantity is validated with OrderItemForm first. If the user is not
+         authenticated, calls a method to update the product in the guest cart. Otherwise, updates the product
+         in the database.
         """
+        form = self.form_class(request.POST)
+        form.is_valid()
+        if 'quantity' not in form.cleaned_data:
+            return JsonResponse({'success': False, 'errors': form.errors.get_json_data().get('quantity', [])},
+                                status=400)
+        self.quantity = form.cleaned_data['quantity']  # noqa
         if not self.user_authenticated:
-            return self.update_product_from_cart_cookie(request)
+            return self.update_product_from_guest_cart(request)
         else:
             return self.update_product_from_cart_authenticated(request)
 
     def update_product_from_cart_authenticated(self, request):
         """
-        Updates the specified product in the cart for authenticated users. Uses an atomic
-        transaction to ensure database integrity and returns a JSON response indicating success or failure.
+        Updates the quantity of the specified product in the cart for authenticated users. The line total is
+        recomputed from the product price, the posted total price is not trusted. Returns a JSON response
+        indicating success or failure.
         """
         if self.user_authenticated:
-            new_quantity = int(self.request_quantity)
-            new_total_price = int(self.request_total_price)
+            new_quantity = self.quantity
             product = self.product_instance
+            cart.flush(request.user.pk)
             with transaction.atomic():
-                order_item_qs = forms.OrderItem.objects.get(user=request.user, product=product)
-                order_item_qs.quantity = new_quantity
-                order_item_qs.total_price = new_total_price
-                order_item_qs.save()
+                forms.OrderItem.objects.filter(user=request.user, product=product).update(
+                    quantity=new_quantity, total_price=(pricing.product_price(product) or 0) * new_quantity,
+                    update_time=timezone.now())
                 return JsonResponse({'success': True})
         else:
             return JsonResponse({'success': False})
 
-    def update_product_from_cart_cookie(self, request):
+    def update_product_from_guest_cart(self, request):  # noqa
         """
-        Updates the specified product in the cart stored in cookies for non-authenticated users.
-         Calculates any available product discounts, updates the cookie with the new product data,
-         and returns a JSON response indicating success or failure.
+        Updates the quantity of the specified product in the guest cart kept in Redis for non-authenticated
+         users and returns a JSON response indicating success or failure.
         """
-        new_quantity = int(self.request_quantity)
-        new_total_price = int(self.request_total_price)
-
-        product_discount = self.calculate_product_discount(self.product_instance, self.latest_discount)
-        cookie_key = f"product_cart{self.signed_product_id}"
-        if cookie_key in self.request.COOKIES:
-            product_data = {
-                'product': self.product_instance.pk,
-                'name': self.product_instance.name,
-                'price': product_discount if product_discount else self.product_instance.price,
-                'quantity': new_quantity,
-                'total_price': new_total_price
-            }
-
-            product_json = json.dumps(product_data)
-            response = JsonResponse({'success': True})
-            response.set_cookie(cookie_key, product_json, max_age=604800)
-        else:
-            response = JsonResponse({'success': False})
-
-        return response
+        if self.cart_id is None:
+            return JsonResponse({'success': False})
+        cart.guest_cart(self.cart_id).set(self.product_instance.pk, self.quantity)
+        return JsonResponse({'success': True})
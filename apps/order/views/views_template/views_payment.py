@@ -12,6 +12,7 @@ from django.urls import reverse_lazy
 from django.utils import timezone
 from apps.core.otp_sms import CodeGenerator
 from apps.account.form_data.forms import VerifyCodeForm
+from apps.order import stock
 from apps.order.form_data import forms
 from apps.core.mixin.mixin_views_template import HttpsOptionNotLogoutMixin as MustBeLogingCustomView
 
@@ -33,7 +34,7 @@ class PaymentOrderView(MustBeLogingCustomView):
     def post(self, request, *args, **kwargs):
         form = self.form_class(self.request_post)
         if form.is_valid():
-            order = forms.Order.objects.filter(order_item__user=request.user).latest('id')
+            order = forms.Order.objects.filter(address__user=request.user).latest('id')
             amount = order.finally_price
             expiration_date = form.cleaned_data['expiration_date']
             cardholder_name = form.cleaned_data['cardholder_name']
@@ -91,6 +92,11 @@ class PaymentVerifyCodeView(MustBeLogingCustomView):
                     if order_payment_form_data:
                         with transaction.atomic():
                             order = forms.Order.objects.get(id=order_payment_form_data['order'])
+                            if not stock.commit(order):
+                                del request.session['order_payment_form_data']
+                                messages.error(request, _('Your reservation expired, please place the order again'),
+                                               extra_tags='error')
+                                return redirect('add_order_item_detail_views')
                             create_payment = forms.OrderPayment.objects.create(
                                 order=order,
                                 amount=order_payment_form_data['amount'],
@@ -122,7 +128,7 @@ class PaymentSuccessView(MustBeLogingCustomView):
     def get(self, request, *args, **kwargs):
         try:
             order_payment = forms.OrderPayment.objects.filter(
-                order__order_item__user=request.user,
+                order__address__user=request.user,
                 is_paid=True
             ).latest('id')
         except forms.OrderPayment.DoesNotExist:
@@ -1,6 +1,11 @@
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from apps.product.models import Product, Comment, Brand, Category, Media, AddToInventory, Discount, Wishlist, Inventory
 
+# Product.__str__ shows the category and brand names; join them wherever a product is listed.
+PRODUCT_RELATED = ('product__category', 'product__brand')
+
 
 class MediaInline(admin.StackedInline):
     """
@@ -61,6 +66,7 @@ class BrandAdmin(admin.ModelAdmin):
     """Admin configuration for the Brand model."""
 
     list_display = ('user', 'phone_number', 'name', 'description', 'location', 'is_active', 'is_deleted')
+    list_select_related = ('user',)
     search_fields = ('user__username', 'name', 'description', 'location')
     list_filter = ('user__username', 'name', 'description', 'location', 'is_active')
     ordering = ('-create_time', '-update_time')
@@ -88,6 +94,7 @@ class CategoryAdmin(admin.ModelAdmin):
     """Admin configuration for the Category model."""
 
     list_display = ('name', 'parent_category', 'is_sub_category', 'is_active', 'is_deleted')
+    list_select_related = ('parent_category',)
     search_fields = ('name', 'parent_category', 'is_sub_category', 'is_active')
     ordering = ('-create_time', '-update_time')
     list_filter = ('name', 'parent_category', 'is_sub_category', 'is_active')
@@ -115,6 +122,7 @@ class MediaAdmin(admin.ModelAdmin):
     """Admin configuration for the Media model."""
 
     list_display = ('product', 'product_picture', 'create_time', 'update_time', 'is_active', 'is_deleted')
+    list_select_related = PRODUCT_RELATED
     search_fields = ('product__name', 'product_picture',)
     ordering = ('-create_time', '-update_time', 'create_time')
     list_filter = ('product__name', 'is_active', 'is_deleted')
@@ -147,6 +155,7 @@ class DiscountAdmin(admin.ModelAdmin):
         'product', 'category', 'percentage_discount', 'numerical_discount',
         'expiration_date', 'is_use', 'is_expired', 'is_active', 'is_deleted',
     )
+    list_select_related = PRODUCT_RELATED + ('category',)
     search_fields = ('product__name', 'category__name', 'percentage_discount',
                      'numerical_discount',)
     list_filter = ('product__name', 'category__name', 'percentage_discount',
@@ -182,6 +191,7 @@ class AddToInventoryAdmin(admin.ModelAdmin):
     list_display = (
         'inventory', 'product', 'quantity', 'create_time', 'update_time', 'is_deleted', 'is_active'
     )
+    list_select_related = ('inventory',) + PRODUCT_RELATED
     search_fields = (
         'inventory__name', 'product__name', 'quantity', 'create_time', 'update_time'
     )
@@ -242,6 +252,7 @@ class CommentAdmin(admin.ModelAdmin):
     Admin panel configuration for Comment model.
     """
     list_display = ('user', 'product', 'comment', 'reply', 'is_reply')
+    list_select_related = ('user', 'product', 'reply__product')
     search_fields = ('user__username', 'product__name', 'reply', 'is_reply', 'comment')
     ordering = ('-create_time', '-update_time')
     list_filter = ('user__username', 'product__name', 'reply', 'is_reply', 'comment')
@@ -270,7 +281,8 @@ class WishlistAdmin(admin.ModelAdmin):
     Admin panel configuration for Wishlist model.
     """
     list_display = ('user', 'product', 'order', 'quantity', 'total_price', 'create_time', 'update_time')
-    search_fields = ('user__username', 'product')
+    list_select_related = ('user', 'order') + PRODUCT_RELATED
+    search_fields = ('user__username', 'product__name')
     ordering = ('-create_time', '-update_time')
     list_filter = ('user__username', 'product', 'order')
     date_hierarchy = 'create_time'
@@ -301,8 +313,9 @@ class ProductAdmin(admin.ModelAdmin):
     list_display = (
         'name', 'brand', 'category', 'description', 'price', 'size', 'color', 'material', 'weight',
         'height',
-        'width', 'warranty', 'quantity', 'is_active', 'is_deleted'
+        'width', 'warranty', 'quantity', 'media_count', 'is_active', 'is_deleted'
     )
+    list_select_related = ('brand', 'category')
     search_fields = (
         'brand__name', 'name', 'brand__name', 'category__name', 'description', 'price', 'size', 'color',
         'material', 'weight', 'height', 'width', 'warranty', 'quantity'
@@ -341,3 +354,20 @@ class ProductAdmin(admin.ModelAdmin):
         if not obj:
             return list()
         return super(ProductAdmin, self).get_inline_instances(request, obj)
+
+    def get_queryset(self, request):
+        """
+        Annotate the number of media with a correlated subquery; it runs for the rows of the page only,
+        unlike a JOIN + GROUP BY over the whole table.
+        """
+        media_count = Media.soft_delete.filter(product=OuterRef('pk')).order_by().values('product').annotate(
+            count=Count('pk')).values('count')
+        return super().get_queryset(request).annotate(
+            media_count=Coalesce(Subquery(media_count, output_field=IntegerField()), 0))
+
+    def media_count(self, obj):  # noqa
+        """Number of media of the product."""
+        return obj.media_count
+
+    media_count.short_description = 'Media'
+    media_count.admin_order_field = 'media_count'
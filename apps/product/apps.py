@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import pre_migrate
 
 
 class ProductConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.product'
+
+    def ready(self):
+        """
+        Connect the signal handlers that keep the denormalized product data up to date.
+        """
+        from apps.product import signals  # noqa
+        pre_migrate.connect(signals.create_search_extensions, sender=self)
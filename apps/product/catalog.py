@@ -0,0 +1,34 @@
+from apps.core.versioning import bump_version, get_version, get_versions
+
+CATALOG_VERSION_KEY = 'catalog:version'
+
+
+def catalog_version():
+    """
+    Return the current catalog version.
+    """
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    """
+    Increase the catalog version, invalidating every cache entry keyed on the previous one.
+    """
+    return bump_version(CATALOG_VERSION_KEY)
+
+
+DISCOUNT_VERSION_KEY = 'catalog:discount:version'
+
+
+def bump_discount_version():
+    """
+    Increase the discount version; cache entries that show prices depend on it.
+    """
+    return bump_version(DISCOUNT_VERSION_KEY)
+
+
+def storefront_versions():
+    """
+    Return the catalog and discount versions with one cache round trip.
+    """
+    return get_versions(CATALOG_VERSION_KEY, DISCOUNT_VERSION_KEY)
@@ -0,0 +1,123 @@
+import time
+from django.core.cache import cache
+from apps.core import images, versioning
+from apps.product.models import Category
+
+TREE_VERSION_KEY = 'category_tree:version'
+TREE_CACHE_TIMEOUT = 60 * 60 * 24
+# How long a process trusts its own copy before checking the version key again.
+LOCAL_TTL = 5
+
+# Per-process copy of the tree; shared by the threads of a worker.
+_local = {'tree': None, 'version': None, 'checked_at': 0.0}
+
+
+class CategoryNode:
+    """
+    Lightweight, read-only category used by navigation and listings instead of a model instance.
+    """
+
+    def __init__(self, id, name, parent_id, path, depth, picture_url, is_sub_category, picture_srcset=''):  # noqa
+        self.id = self.pk = id
+        self.name = name
+        self.parent_id = parent_id
+        self.path = path
+        self.depth = depth
+        self.picture_url = picture_url
+        self.picture_srcset = picture_srcset
+        self.is_sub_category = is_sub_category
+        self.children = []
+
+    def __str__(self):
+        return f'{self.name}'
+
+    def __repr__(self):
+        return f'<CategoryNode {self.pk}: {self.name}>'
+
+
+class CategoryTree:
+    """
+    The active categories of the shop, ordered by materialized path.
+    """
+
+    def __init__(self, rows):
+        self.nodes = {row['id']: CategoryNode(**row) for row in rows}
+        self.roots = []
+        for node in self.nodes.values():
+            parent = self.nodes.get(node.parent_id)
+            if parent is None:
+                self.roots.append(node)
+            else:
+                parent.children.append(node)
+
+    def __iter__(self):
+        return iter(self.nodes.values())
+
+    def get(self, pk):
+        return self.nodes.get(pk)
+
+    def descendant_ids(self, pk, include_self=True):
+        """
+        Return the ids of all categories below `pk` without touching the database.
+        """
+        node = self.nodes.get(pk)
+        if node is None:
+            return []
+        return [
+            other.pk for other in self.nodes.values()
+            if other.path.startswith(node.path) and (include_self or other.pk != pk)
+        ]
+
+
+def build_rows():
+    """
+    Load the active categories with one query, in path order, as plain picklable dicts.
+    """
+    storage = Category._meta.get_field('category_picture').storage  # noqa
+    categories = Category.objects.order_by('path').values(
+        'id', 'name', 'parent_category_id', 'path', 'depth', 'category_picture', 'is_sub_category', 'derivatives')
+    return [
+        {
+            'id': category['id'],
+            'name': category['name'],
+            'parent_id': category['parent_category_id'],
+            'path': category['path'],
+            'depth': category['depth'],
+            'picture_url': storage.url(category['category_picture']) if category['category_picture'] else None,
+            'is_sub_category': category['is_sub_category'],
+            'picture_srcset': images.srcset_from_record(storage, category['derivatives'] or {}),
+        }
+        for category in categories
+    ]
+
+
+def get_tree():
+    """
+    Return the category tree.
+    Lookup order: the copy held by this process (re-validated every LOCAL_TTL seconds against the
+    version key), the serialized tree in the cache, and finally the database.
+    """
+    now = time.monotonic()
+    tree = _local['tree']
+    if tree is not None and now - _local['checked_at'] < LOCAL_TTL:
+        return tree
+    version = versioning.get_version(TREE_VERSION_KEY)
+    if tree is not None and _local['version'] == version:
+        _local['checked_at'] = now
+        return tree
+    key = f'category_tree:{version}'
+    rows = cache.get(key)
+    if rows is None:
+        rows = build_rows()
+        cache.set(key, rows, TREE_CACHE_TIMEOUT)
+    tree = CategoryTree(rows)
+    _local.update(tree=tree, version=version, checked_at=now)
+    return tree
+
+
+def invalidate():
+    """
+    Move to a new tree version; every process reloads the tree on its next version check.
+    """
+    versioning.bump_version(TREE_VERSION_KEY)
+    _local['tree'] = None
@@ -0,0 +1,155 @@
+from django.db.models import CharField, Count, F, Max, Min, Q, Value
+from django.db.models.functions import Cast
+from apps.product import category_tree
+from apps.product.models import Product
+
+# Filter name -> column counted for that facet.
+FACETS = {
+    'category': 'category_id',
+    'brand': 'brand_id',
+    'size': 'size',
+    'color': 'color',
+    'material': 'material',
+    'warranty': 'warranty',
+}
+# Facets whose values are foreign keys; their label is read with the counts.
+FACET_LABELS = {
+    'category': 'category__name',
+    'brand': 'brand__name',
+}
+PRICE_FACET = 'price'
+
+ORDERINGS = {
+    'newest': ('-create_time', '-id'),
+    'price_asc': ('effective_price', 'id'),
+    'price_desc': ('-effective_price', '-id'),
+}
+DEFAULT_ORDERING = 'newest'
+
+
+def base_queryset():
+    """
+    Products visible in the storefront.
+    """
+    return Product.objects.filter(category__is_active=True)
+
+
+def facet_condition(name, values):
+    """
+    Return the condition of one facet; a category also matches the products of its subcategories.
+    """
+    if name == 'category':
+        tree = category_tree.get_tree()
+        category_ids = set()
+        for pk in values:
+            category_ids.update(tree.descendant_ids(pk) or [pk])
+        return Q(category_id__in=category_ids)
+    return Q(**{f'{FACETS[name]}__in': values})
+
+
+def filter_conditions(filters):
+    """
+    Turn cleaned filter data (see ProductFilterForm) into one condition per dimension.
+    Values of the same facet are ORed, different facets are ANDed.
+    """
+    conditions = {}
+    for name in FACETS:
+        values = filters.get(name)
+        if values:
+            conditions[name] = facet_condition(name, values)
+    price = Q()
+    if filters.get('min_price') is not None:
+        price &= Q(effective_price__gte=filters['min_price'])
+    if filters.get('max_price') is not None:
+        price &= Q(effective_price__lte=filters['max_price'])
+    if price:
+        conditions[PRICE_FACET] = price
+    return conditions
+
+
+def apply_filters(queryset, conditions, exclude=None):
+    """
+    Filter `queryset` by every condition except the one of dimension `exclude`.
+    """
+    for name, condition in conditions.items():
+        if name != exclude:
+            queryset = queryset.filter(condition)
+    return queryset
+
+
+def facet_queries(queryset, conditions):
+    """
+    Build one grouped query per dimension, each filtered by all the other dimensions,
+    so selecting a value never hides the alternatives of its own facet.
+    All queries return the same (facet, value, label, count) columns and can be UNIONed.
+    """
+    queries = []
+    for name, column in FACETS.items():
+        label = F(FACET_LABELS[name]) if name in FACET_LABELS else Value('')
+        queries.append(
+            apply_filters(queryset, conditions, exclude=name).order_by()
+            .filter(**{f'{column}__isnull': False})
+            .annotate(facet=Value(name, output_field=CharField()),
+                      value=Cast(column, output_field=CharField()),
+                      label=Cast(label, output_field=CharField()))
+            .values('facet', 'value', 'label')
+            .annotate(count=Count('pk'))
+            .values_list('facet', 'value', 'label', 'count')
+        )
+    # The price range has no group: one row with the cheapest and the most expensive product.
+    queries.append(
+        apply_filters(queryset, conditions, exclude=PRICE_FACET).order_by()
+        .filter(effective_price__isnull=False)
+        .annotate(facet=Value(PRICE_FACET, output_field=CharField()))
+        .values('facet')
+        .annotate(value=Cast(Min('effective_price'), output_field=CharField()),
+                  label=Cast(Max('effective_price'), output_field=CharField()),
+                  count=Count('pk'))
+        .values_list('facet', 'value', 'label', 'count')
+    )
+    return queries
+
+
+def facet_counts(queryset, filters):
+    """
+    Return the facet counts for `filters` with a single UNION ALL query:
+    {'brand': [{'value': 3, 'label': 'Acme', 'count': 12, 'selected': False}, ...], ...,
+     'price': {'min': 100, 'max': 2500, 'count': 40}}
+    """
+    conditions = filter_conditions(filters)
+    queries = facet_queries(queryset, conditions)
+    rows = queries[0].union(*queries[1:], all=True)
+    choices = {name: dict(Product._meta.get_field(column).flatchoices)  # noqa
+               for name, column in FACETS.items() if name not in FACET_LABELS}
+    counts = {name: [] for name in FACETS}
+    counts[PRICE_FACET] = {'min': None, 'max': None, 'count': 0}
+    for facet, value, label, count in rows:
+        if facet == PRICE_FACET:
+            if count:
+                counts[PRICE_FACET] = {'min': int(value), 'max': int(label), 'count': count}
+            continue
+        if facet in FACET_LABELS:
+            value = int(value)
+        else:
+            label = str(choices[facet].get(value, value))
+        counts[facet].append({
+            'value': value,
+            'label': label,
+            'count': count,
+            'selected': value in (filters.get(facet) or ()),
+        })
+    for name in FACETS:
+        counts[name].sort(key=lambda item: (-item['count'], str(item['label'])))
+    return counts
+
+
+def filter_products(queryset, filters):
+    """
+    Return `queryset` narrowed by every filter, ordered for keyset pagination, and its ordering.
+    Sorting by price leaves out products without a price so the cursor never compares NULLs.
+    """
+    ordering = ORDERINGS[filters.get('ordering') or DEFAULT_ORDERING]
+    queryset = apply_filters(queryset, filter_conditions(filters))
+    if ordering[0].lstrip('-') == 'effective_price':
+        queryset = queryset.filter(effective_price__isnull=False)
+    return queryset, ordering
@@ -589,7 +589,7 @@ class CommentCreateForm(forms.ModelForm):
         attrs={'class': 'form-control mt-1 pt-2 py-2 px-4 focus:ring-indigo-500 focus:border-indigo-500 '
                         'block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'}))
 
-    reply = forms.ModelChoiceField(queryset=Comment.objects.all().filter(is_active=True, is_deleted=False),
+    reply = forms.ModelChoiceField(queryset=Comment.objects.all(),
                                    required=False,
                                    widget=forms.Select(
                                        attrs={'class': 'form-select mt-1 pt-2 py-2 px-4 focus:ring-indigo-500 '
@@ -667,11 +667,11 @@ class DiscountCreateForm(forms.ModelForm):
     """
     Form for creating a discount.
     """
-    product = forms.ModelChoiceField(queryset=Product.objects.all().filter(is_active=True, is_deleted=False),
+    product = forms.ModelChoiceField(queryset=Product.objects.all(),
                                      required=False, widget=forms.Select(
             attrs={'class': 'form-select mt-1 pt-2 py-2 px-4 focus:ring-indigo-500 focus:border-indigo-500 '
                             'block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'}))
-    category = forms.ModelChoiceField(queryset=Category.objects.all().filter(is_active=True, is_deleted=False),
+    category = forms.ModelChoiceField(queryset=Category.objects.all(),
                                       required=False, widget=forms.Select(
             attrs={'class': 'form-select mt-1 pt-2 py-2 px-4 focus:ring-indigo-500 focus:border-indigo-500 '
                             'block w-full shadow-sm sm:text-sm border-gray-300 rounded-md'}))
@@ -925,7 +925,7 @@ class AddToInventoryCreateForm(forms.ModelForm):
                                                         'focus:ring-indigo-500 focus:border-indigo-500 '
                                                         'block w-full shadow-sm sm:text-sm border-gray-300 '
                                                         'rounded-md'}))
-    product = forms.ModelChoiceField(queryset=Product.objects.all().filter(is_active=True, is_deleted=False),
+    product = forms.ModelChoiceField(queryset=Product.objects.all(),
                                      widget=forms.Select(
                                          attrs={
                                              'class': 'form-select mt-1 pt-2 py-2 px-4 '
@@ -1140,3 +1140,44 @@ class SearchForm(forms.Form):
     Form for searching.
     """
     search = forms.CharField(label=_('Search'), max_length=100)
+
+
+class IdMultipleChoiceField(forms.TypedMultipleChoiceField):
+    """
+    Multiple choice field of primary keys; unknown ids simply match nothing, so they are not validated.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(coerce=int, **kwargs)
+
+    def valid_value(self, value):
+        return str(value).isdigit()
+
+
+class ProductFilterForm(forms.Form):
+    """
+    Form for filtering products by facets and price range, see apps.product.facets.
+    """
+    category = IdMultipleChoiceField(label=_('Category'), required=False)
+    brand = IdMultipleChoiceField(label=_('Brand'), required=False)
+    size = forms.MultipleChoiceField(label=_('Size'), choices=validators.SizeChoice.CHOICES, required=False)
+    color = forms.MultipleChoiceField(label=_('Color'), choices=validators.ColorChoice.CHOICES, required=False)
+    material = forms.MultipleChoiceField(label=_('Material'), choices=validators.MaterialChoice.CHOICES,
+                                         required=False)
+    warranty = forms.MultipleChoiceField(label=_('Warranty'), choices=validators.WarrantyChoice.CHOICES,
+                                         required=False)
+    min_price = forms.IntegerField(label=_('Min price'), min_value=0, required=False)
+    max_price = forms.IntegerField(label=_('Max price'), min_value=0, required=False)
+    ordering = forms.ChoiceField(label=_('Ordering'), required=False, choices=(
+        ('newest', _('Newest')), ('price_asc', _('Cheapest')), ('price_desc', _('Most expensive'))))
+
+    def clean(self):
+        """
+        Checks that the price range is not reversed.
+        """
+        cleaned_data = super().clean()
+        min_price = cleaned_data.get('min_price')
+        max_price = cleaned_data.get('max_price')
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise forms.ValidationError(_('Min price cannot be greater than max price.'))
+        return cleaned_data
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from apps.core import validators
-from apps.product.models import Product, Wishlist
+from apps.core.serializers import ValuesSerializer
+from apps.product.managers import card_picture_urls
+from apps.product.models import Brand, Media, Product, Wishlist
 
 
 class WishlistProductSerializer(serializers.ModelSerializer):
@@ -50,7 +52,7 @@ class ProductSerializer(serializers.ModelSerializer):
     """
     Serializer for creating a new product.
     """
-    product_picture = serializers.ImageField(source='product_picture.url', read_only=True)
+    product_picture = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
@@ -95,13 +97,136 @@ class ProductSerializer(serializers.ModelSerializer):
                     'invalid_choice': 'Invalid color choice.'
                 }
             },
-            'product_picture': {
-                'write_only': True,
-                'required': True,
-                'validators': [validators.PictureValidator()],
-                'error_messages': {
-                    'required': 'Product picture is required.'
-                }
-            }
         }
 
+    def get_product_picture(self, product):  # noqa
+        """
+        Url of the primary picture; pictures are stored on Media, not on Product.
+        """
+        media = product.card_media
+        return media[0].get_img() if media else None
+
+
+class ProductCardSerializer(serializers.ModelSerializer):
+    """
+    Read-only serializer for product cards; expects products loaded with Product.objects.for_cards().
+    """
+    brand = serializers.CharField(source='brand.name', read_only=True)
+    category = serializers.CharField(source='category.name', read_only=True)
+    picture = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = ['id', 'name', 'price', 'effective_price', 'brand', 'category', 'size', 'color', 'material',
+                  'warranty', 'picture']
+        read_only_fields = fields
+
+    def get_picture(self, product):  # noqa
+        media = product.card_media
+        return media[0].get_img() if media else None
+
+
+class ProductValuesSerializer(ValuesSerializer):
+    """
+    Product list rows of the catalog API. Prices come from the stored effective price snapshot,
+    pictures are resolved for the whole page with one query.
+    """
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'price': 'price',
+        'final_price': 'effective_price',
+        'discount': None,
+        'brand_id': 'brand_id',
+        'brand': 'brand__name',
+        'category_id': 'category_id',
+        'category': 'category__name',
+        'size': 'size',
+        'color': 'color',
+        'material': 'material',
+        'warranty': 'warranty',
+        'picture': None,
+    }
+    discount_lookups = ('active_discount__percentage_discount', 'active_discount__numerical_discount')
+
+    def depends_on(self, name):
+        return self.discount_lookups if name == 'discount' else ()
+
+    def resolve(self, rows):
+        self.pictures = {}  # noqa
+        if 'picture' in self.selected and rows:
+            self.pictures = card_picture_urls([row['id'] for row in rows])  # noqa
+
+    def get_discount(self, row):  # noqa
+        percentage, numerical = (row[lookup] for lookup in self.discount_lookups)
+        if percentage is None and numerical is None:
+            return None
+        return {'percentage': percentage, 'amount': numerical}
+
+    def get_picture(self, row):
+        return self.pictures.get(row['id'])
+
+
+class ProductDetailValuesSerializer(ProductValuesSerializer):
+    """
+    Product detail of the catalog API: the list fields plus description, dimensions and every picture.
+    """
+    fields = {
+        **ProductValuesSerializer.fields,
+        'description': 'description',
+        'weight': 'weight',
+        'height': 'height',
+        'width': 'width',
+        'quantity': 'quantity',
+        'pictures': None,
+    }
+
+    def resolve(self, rows):
+        super().resolve(rows)
+        self.all_pictures = {}  # noqa
+        if 'pictures' in self.selected and rows:
+            storage = Media._meta.get_field('product_picture').storage  # noqa
+            pictures = Media.objects.filter(product_id__in=[row['id'] for row in rows]).exclude(
+                product_picture='').order_by('create_time', 'id').values_list('product_id', 'product_picture')
+            for product_id, name in pictures:
+                if name:
+                    self.all_pictures.setdefault(product_id, []).append(storage.url(name))
+
+    def get_pictures(self, row):
+        return self.all_pictures.get(row['id'], [])
+
+
+class BrandValuesSerializer(ValuesSerializer):
+    """
+    Brand rows of the catalog API.
+    """
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'description': 'description',
+        'location': 'location',
+        'logo': None,
+    }
+
+    def depends_on(self, name):  # noqa
+        return ('logo',) if name == 'logo' else ()
+
+    def get_logo(self, row):  # noqa
+        if not row['logo']:
+            return None
+        return Brand._meta.get_field('logo').storage.url(row['logo'])  # noqa
+
+
+class CategoryValuesSerializer(ValuesSerializer):
+    """
+    Category rows of the catalog API, read from the nodes of the cached category tree.
+    """
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'parent_id': 'parent_id',
+        'depth': 'depth',
+        'path': 'path',
+        'picture': 'picture_url',
+        'is_sub_category': 'is_sub_category',
+    }
@@ -0,0 +1,40 @@
+import hashlib
+from django.core.cache import cache
+from apps.product import catalog
+
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Per-request values are cut out of cached fragments and put back on every response.
+CSRF_TOKEN_HOLE = '__fragment_csrf_token__'
+USER_PK_HOLE = '__fragment_user_pk__'
+
+
+def fragment_key(name, vary_on=()):
+    """
+    Return the cache key of fragment `name`.
+    It includes the catalog and discount versions, so any change to products, categories, media
+    or discounts makes every fragment unreachable at once.
+    """
+    catalog_version, discount_version = catalog.storefront_versions()
+    digest = hashlib.md5(':'.join(str(value) for value in vary_on).encode('utf-8')).hexdigest()  # noqa
+    return f'fragment:{catalog_version}:{discount_version}:{name}:{digest}'
+
+
+def get_or_render(name, render, vary_on=(), timeout=FRAGMENT_CACHE_TIMEOUT):
+    """
+    Return the cached fragment `name`, calling `render()` to build and store it on a miss.
+    `render` must not produce per-user output; use the holes for the CSRF token and the user id.
+    """
+    key = fragment_key(name, vary_on)
+    content = cache.get(key)
+    if content is None:
+        content = render()
+        cache.set(key, content, timeout)
+    return content
+
+
+def fill_holes(content, csrf_token='', user_pk=''):
+    """
+    Put the per-request values back into a cached fragment.
+    """
+    return content.replace(CSRF_TOKEN_HOLE, str(csrf_token)).replace(USER_PK_HOLE, str(user_pk))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from apps.product import category_tree
+from apps.product.models import Category
+
+
+class Command(BaseCommand):
+    """
+    Management command to recompute the materialized path and depth of every category.
+    Needed once for categories created before the path column existed.
+    """
+    help = 'Rebuild Category.path and Category.depth from parent_category'
+
+    def handle(self, *args, **options):
+        """
+        Handles the command execution.
+        Walks the parent links in memory and writes all changed rows with one bulk update.
+        """
+        categories = {category.pk: category for category in Category._base_manager.only(  # noqa
+            'pk', 'parent_category', 'path', 'depth')}
+        paths = {}
+
+        def build_path(category):
+            if category.pk not in paths:
+                parent = categories.get(category.parent_category_id)
+                paths[category.pk] = (build_path(parent) if parent else '') + f'{category.pk}/'
+            return paths[category.pk]
+
+        changed = []
+        for category in categories.values():
+            path = build_path(category)
+            if category.path != path:
+                category.path, category.depth = path, path.count('/') - 1
+                changed.append(category)
+        Category._base_manager.bulk_update(changed, ['path', 'depth'], batch_size=1000)  # noqa
+        category_tree.invalidate()
+        self.stdout.write(self.style.SUCCESS(f'Paths rebuilt for {len(changed)} categories'))
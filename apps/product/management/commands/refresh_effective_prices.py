@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from apps.product import pricing
+from apps.product.models import Product
+
+
+class Command(BaseCommand):
+    """
+    Management command to rebuild the effective price snapshot of every product.
+    Useful after a fresh migration or a bulk import that bypassed the signal handlers.
+    """
+    help = 'Recompute effective_price and active_discount for all products'
+
+    def add_arguments(self, parser):
+        """
+        Adds the batch size argument.
+        """
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of products updated per query')
+
+    def handle(self, *args, **options):
+        """
+        Handles the command execution.
+        """
+        product_ids = Product._base_manager.values_list('pk', flat=True)  # noqa
+        updated = pricing.refresh_effective_prices(product_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Effective prices refreshed for {updated} products'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from apps.product import search
+
+
+class Command(BaseCommand):
+    """
+    Management command to rebuild the full-text search document of every product.
+    Needed after a fresh migration, a bulk import or a change of the weights in apps.product.search.
+    """
+    help = 'Rebuild the search_vector column of all products'
+
+    def add_arguments(self, parser):
+        """
+        Adds the batch size argument.
+        """
+        parser.add_argument('--batch-size', type=int, default=1000, help='Number of products updated per query')
+
+    def handle(self, *args, **options):
+        """
+        Handles the command execution.
+        """
+        updated = search.update_search_vectors(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Search index rebuilt for {updated} products'))
@@ -1,11 +1,11 @@
-from django.contrib.postgres.search import TrigramSimilarity
 from django.db import models
-from django.db.models import F, Q, Sum
+from django.db.models import F, Prefetch, Q, Sum
 import pytz
 from django.utils import timezone
+from apps.core.managers import LiveManagerMixin, UserLineQuerySet
 
 
-class WishlistQuerySet(models.QuerySet):
+class WishlistQuerySet(UserLineQuerySet):
     def available(self):
         return self.filter(available=True)
 
@@ -25,13 +25,7 @@ class WishlistQuerySet(models.QuerySet):
         return self.filter(product=product)
 
 
-class WishlistManager(models.Manager):
-    def get_queryset(self):
-        """Get the queryset object associated with this manager."""
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = WishlistQuerySet(self.model)
-        return self.__queryset
-
+class WishlistManager(models.Manager.from_queryset(WishlistQuerySet)):
     def available(self):
         return self.get_queryset().available()
 
@@ -87,15 +81,9 @@ class CodeDiscountQuerySet(models.QuerySet):
         return self.filter(code=code, user=user, expiration_date__gte=now).first()
 
 
-class CodeDiscountManager(models.Manager):
+class CodeDiscountManager(LiveManagerMixin, models.Manager.from_queryset(CodeDiscountQuerySet)):
     """Manager for handling code discounts."""
 
-    def get_queryset(self):
-        """Get the queryset object associated with this manager."""
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = CodeDiscountQuerySet(self.model)
-        return self.__queryset
-
     def get_discount(self, code):
         """Retrieve a discount by its code."""
         return self.get_queryset().get_discount(code)
@@ -171,15 +159,7 @@ class AddToInventoryQuerySet(models.QuerySet):
         return self.annotate(total_quantity=Sum('quantity')).filter(total_quantity__lt=value)
 
 
-class AddToInventoryManager(models.Manager):
-    def get_queryset(self):
-        """
-        Get the queryset object associated with this manager.
-        """
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = AddToInventoryQuerySet(self.model)
-        return self.__queryset
-
+class AddToInventoryManager(models.Manager.from_queryset(AddToInventoryQuerySet)):
     def available_products(self):
         """
         Returns warehouse keepers with available products using the custom queryset.
@@ -221,14 +201,8 @@ class InventoryQuerySet(models.QuerySet):
     pass
 
 
-class InventoryManager(models.Manager):
-    def get_queryset(self):
-        """
-        Get the queryset object associated with this manager.
-        """
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = InventoryQuerySet(self.model)
-        return self.__queryset
+class InventoryManager(models.Manager.from_queryset(InventoryQuerySet)):
+    pass
 
 
 class BrandQuerySet(models.QuerySet):
@@ -272,15 +246,7 @@ class BrandQuerySet(models.QuerySet):
         )
 
 
-class BrandManager(models.Manager):
-    def get_queryset(self):
-        """
-        Get the queryset object associated with this manager.
-        """
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = BrandQuerySet(self.model)
-        return self.__queryset
-
+class BrandManager(models.Manager.from_queryset(BrandQuerySet)):
     def active_brands(self):
         """
         Returns active brands using the custom queryset.
@@ -350,15 +316,7 @@ class MediaQuerySet(models.QuerySet):
         return self.filter(is_active=False)
 
 
-class MediaManager(models.Manager):
-    def get_queryset(self):
-        """
-        Get the queryset object associated with this manager.
-        """
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = MediaQuerySet(self.model)
-        return self.__queryset
-
+class MediaManager(LiveManagerMixin, models.Manager.from_queryset(MediaQuerySet)):
     def for_product(self, product):
         """
         Returns a queryset of media items associated with a specific product.
@@ -416,15 +374,7 @@ class CategoryQuerySet(models.QuerySet):
         return self.filter(name=name)
 
 
-class CategoryManager(models.Manager):
-    def get_queryset(self):
-        """
-        Get the queryset object associated with this manager.
-        """
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = CategoryQuerySet(self.model)
-        return self.__queryset
-
+class CategoryManager(LiveManagerMixin, models.Manager.from_queryset(CategoryQuerySet)):
     def main_categories(self):
         """
         Returns a queryset of main categories (not sub-categories).
@@ -451,104 +401,10 @@ class CategoryManager(models.Manager):
 
     def get_category_tree(self):
         """
-        Returns a hierarchical representation of categories.
-        """
-        categories = self.get_queryset().prefetch_related('pcategory').all()
-        category_tree = {}
-
-        for category in categories:
-            if not category.parent_category:
-                category_tree[category] = {}
-            else:
-                parent = category.parent_category
-                if parent not in category_tree:
-                    category_tree[parent] = {}
-                category_tree[parent][category] = {}
-
-        return category_tree
-
-
-class ProductQuerySet(models.QuerySet):
-    def discounted(self, code_discount):
-        """
-        Annotates each product in the queryset with its discounted price based on the given code_discount.
-        """
-        if code_discount:
-            percentage_discount = code_discount.percentage_discount
-            numerical_discount = code_discount.numerical_discount
-
-            if percentage_discount is not None:
-                return self.annotate(discounted_price=F('price') - (F('price') * (percentage_discount / 100)))
-            elif numerical_discount is not None:
-                return self.annotate(discounted_price=F('price') - numerical_discount)
-
-        return self.annotate(discounted_price=F('price'))
-
-
-class ProductManager(models.Manager):
-    def get_queryset(self):
-        """
-        Get the queryset object associated with this manager.
-        """
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = ProductQuerySet(self.model)
-        return self.__queryset
-
-    def discounted(self, code_discount=None):
-        """
-        Returns a queryset with products annotated with their discounted prices.
-        """
-        return self.get_queryset().discounted(code_discount)
-
-    def in_stock(self):
-        """
-        Returns a queryset of products that are in stock.
-        """
-        return self.get_queryset().filter(stock__gt=0)
-
-    def by_category(self, category):
-        """
-        Returns a queryset of products filtered by category.
-        """
-        return self.get_queryset().filter(category=category)
-
-    def by_brand(self, brand):
-        """
-        Returns a queryset of products filtered by brand.
-        """
-        return self.get_queryset().filter(brand=brand)
-
-    def top_selling(self):
-        """
-        Returns a queryset of top selling products.
-        """
-        # You need to define the logic for determining top selling products
-        return self.get_queryset().order_by('-sales_count')[:10]
-
-    def new_arrivals(self):
-        """
-        Returns a queryset of new arrival products.
-        """
-        from django.utils import timezone
-        from datetime import timedelta
-        return self.get_queryset().filter(created_at__gte=timezone.now() - timedelta(days=30))
-
-    def with_images(self):
-        """
-        Returns a queryset of products with images.
-        """
-        return self.get_queryset().exclude(product_picture__isnull=True)
-
-    def search(self, query):
-        """
-        Returns a queryset of products matching the given search query.
+        Returns the cached tree of active categories, see apps.product.category_tree.
         """
-        return self.annotate(
-            similarity=TrigramSimilarity('name', query) +
-                       TrigramSimilarity('brand__name', query) +  # noqa
-                       TrigramSimilarity('description', query) +
-                       TrigramSimilarity('price', query)
-        ).filter(similarity__gt=0.3).order_by('-similarity')
+        from apps.product import category_tree
+        return category_tree.get_tree()
 
 
 class CommentQuerySet(models.QuerySet):
@@ -589,21 +445,7 @@ class CommentQuerySet(models.QuerySet):
         return self.filter(is_active=False)
 
 
-class CommentManager(models.Manager):
-    def get_queryset(self):
-        """
-        Get the queryset object associated with this manager.
-        """
-        if not hasattr(self.__class__, '__queryset'):
-            self.__class__.__queryset = CommentQuerySet(self.model)
-        return self.__queryset
-
-    def search(self, keyword):
-        """
-        Search comments by keyword.
-        """
-        return self.get_queryset().search(keyword)
-
+class CommentManager(LiveManagerMixin, models.Manager.from_queryset(CommentQuerySet)):
     def get_comments_by_user(self, user_id):
         """
         Get all comments created by a specific user.
@@ -622,32 +464,114 @@ class CommentManager(models.Manager):
         """
         return self.get_queryset().filter(is_reply=True)
 
-    def with_user(self):
+
+def card_media_queryset():
+    """
+    Queryset of the media shown on product cards: active rows, the oldest one first.
+    """
+    from apps.product.models import Media
+    return Media.objects.order_by('create_time', 'id')
+
+
+def card_prefetch(prefix=''):
+    """
+    Prefetch only the primary media of each product; `prefix` points at the product relation,
+    e.g. 'product__' when loading order items.
+    """
+    return Prefetch(f'{prefix}media_products', queryset=card_media_queryset()[:1],
+                    to_attr='prefetched_card_media')
+
+
+def card_picture_urls(product_ids):
+    """
+    Return {product_id: url} of the primary picture of each product with one DISTINCT ON query.
+    """
+    from apps.product.models import Media
+    storage = Media._meta.get_field('product_picture').storage  # noqa
+    pictures = card_media_queryset().filter(product_id__in=product_ids).exclude(product_picture='').order_by(
+        'product_id', 'create_time', 'id').distinct('product_id').values_list('product_id', 'product_picture')
+    return {product_id: storage.url(name) for product_id, name in pictures if name}
+
+
+class ProductQuerySet(models.QuerySet):
+    def for_cards(self):
         """
-        Include user information in the queryset.
+        Load everything a product card renders in a fixed number of queries:
+        category, brand and the active discount joined in, the primary media prefetched.
         """
-        return self.get_queryset().with_user()
+        return self.select_related('category', 'brand', 'active_discount').prefetch_related(card_prefetch())
 
-    def with_product(self):
+    def discounted(self, code_discount):
         """
-        Include product information in the queryset.
+        Annotates each product in the queryset with its discounted price based on the given code_discount.
         """
-        return self.get_queryset().with_product()
+        if code_discount:
+            percentage_discount = code_discount.percentage_discount
+            numerical_discount = code_discount.numerical_discount
 
-    def with_reply(self):
+            if percentage_discount is not None:
+                return self.annotate(discounted_price=F('price') - (F('price') * (percentage_discount / 100)))
+            elif numerical_discount is not None:
+                return self.annotate(discounted_price=F('price') - numerical_discount)
+
+        return self.annotate(discounted_price=F('price'))
+
+
+class ProductManager(LiveManagerMixin, models.Manager.from_queryset(ProductQuerySet)):
+    def for_cards(self):
         """
-        Include reply information in the queryset.
+        Returns a queryset of products with everything a product card needs loaded up front.
         """
-        return self.get_queryset().with_reply()
+        return self.get_queryset().for_cards()
 
-    def active(self):
+    def discounted(self, code_discount=None):
         """
-        Get all active comments.
+        Returns a queryset with products annotated with their discounted prices.
         """
-        return self.get_queryset().active()
+        return self.get_queryset().discounted(code_discount)
 
-    def inactive(self):
+    def in_stock(self):
         """
-        Get all inactive comments.
+        Returns a queryset of products that are in stock.
         """
-        return self.get_queryset().inactive()
+        return self.get_queryset().filter(stock__gt=0)
+
+    def by_category(self, category):
+        """
+        Returns a queryset of products filtered by category.
+        """
+        return self.get_queryset().filter(category=category)
+
+    def by_brand(self, brand):
+        """
+        Returns a queryset of products filtered by brand.
+        """
+        return self.get_queryset().filter(brand=brand)
+
+    def top_selling(self):
+        """
+        Returns a queryset of top selling products.
+        """
+        # You need to define the logic for determining top selling products
+        return self.get_queryset().order_by('-sales_count')[:10]
+
+    def new_arrivals(self):
+        """
+        Returns a queryset of new arrival products.
+        """
+        from django.utils import timezone
+        from datetime import timedelta
+        return self.get_queryset().filter(created_at__gte=timezone.now() - timedelta(days=30))
+
+    def with_images(self):
+        """
+        Returns a queryset of products with images.
+        """
+        return self.get_queryset().exclude(product_picture__isnull=True)
+
+    def search(self, query):
+        """
+        Returns a queryset of products matching the given search query, best matches first.
+        """
+        from apps.product.search import search_products
+        return search_products(self.get_queryset(), query).order_by('-similarity', '-id')
@@ -2,6 +2,7 @@ import json
 from django.core.signing import Signer
 from django.shortcuts import get_object_or_404
 from apps.product.form_data import forms
+from apps.product import pricing
 from django.http import JsonResponse
 from django.utils.translation import gettext_lazy as _
 from django.views import generic
@@ -14,9 +15,7 @@ class ProductDiscountMixin(generic.View):
         self.signer = Signer()  # noqa
         self.user_authenticated = request.user.is_authenticated  # noqa
         self.signed_product_id = self.signer.sign(str(self.product_instance.pk))  # noqa
-        self.latest_discount = self.product_instance.product_code_discounts.filter(is_expired=False,  # noqa
-                                                                                   is_active=True).order_by(
-            '-create_time').first()
+        self.latest_discount = pricing.latest_discount(self.product_instance)  # noqa
         self.request_post = request.POST  # noqa
         self.form_class = forms.WishlistAddForm  # noqa
         return super().setup(request, *args, **kwargs)
@@ -25,29 +24,7 @@ class ProductDiscountMixin(generic.View):
         if not self.user_authenticated:
             return self.add_product_to_wishlist_cookie()
         else:
-            return self.add_products_from_cookies_to_wishlist_authenticated()
-
-    def add_products_from_cookies_to_wishlist_authenticated(self):
-        cookies_to_delete = []
-        if self.request.session and any(key.startswith("product_wishlist") for key in self.request.COOKIES):
-            for cookie_key, cookie_value in self.request.COOKIES.items():  # noqa
-                if cookie_key.startswith("product_wishlist"):
-                    product_data = json.loads(cookie_value)
-                    product_id = product_data.get('product')
-                    quantity = product_data.get('quantity', 0)
-                    total_price = product_data.get('total_price', 0)
-                    try:
-                        self.add_cookie_product_to_wishlist_get_or_create(product_id, quantity,
-                                                                          total_price, cookie_key,
-                                                                          cookies_to_delete)
-                    except Exception:  # noqa
-                        response = JsonResponse({'message': _('Product Does Not Exist.')})
-                        response.delete_cookie(cookie_key)
-                        continue
-            response = self.prepare_response_after_adding_products(cookies_to_delete)
-        else:
-            response = self.add_product_to_wishlist_authenticated()
-        return response
+            return self.add_product_to_wishlist_authenticated()
 
     def add_product_to_wishlist_cookie(self):
         product_discount = self.calculate_product_discount(self.product_instance, self.latest_discount)
@@ -91,65 +68,13 @@ class ProductDiscountMixin(generic.View):
             response.set_cookie(cookie_key, json.dumps(new_product_data), max_age=604800)
             return response
 
-    def add_cookie_product_to_wishlist_get_or_create(self, product_id, quantity, total_price, cookie_key,
-                                                     cookies_to_delete):
-        product = forms.Product.objects.get(pk=product_id)  # noqa
-        product_discount = self.calculate_product_discount(self.product_instance, self.latest_discount)  # noqa
-        wishlist, created = forms.Wishlist.objects.get_or_create(
-            user=self.request.user,
-            product=product,
-            quantity=quantity,
-            total_price=total_price
-        )
-        wishlist.quantity += 1
-        wishlist.total_price += product_discount if product_discount else self.product_instance.price
-        if not created:
-            wishlist.quantity += quantity
-            wishlist.total_price += total_price
-            wishlist.save()
-            response = JsonResponse({'message': _('Product added to wishlist successfully.')})
-            cookies_to_delete.append(cookie_key)
-            return response
-        else:
-            wishlist.save()
-            response = JsonResponse({'message': _('Product added to wishlist successfully.')})
-            cookies_to_delete.append(cookie_key)
-            return response
-
     def calculate_product_discount(self, product_instance, latest_discount):  # noqa
-        if latest_discount is None:
+        product_price = getattr(product_instance, 'price', product_instance)
+        if not isinstance(product_price, (int, float)):
             return None
-        try:
-            product_price = product_instance.price
-        except AttributeError:
-            if isinstance(product_instance, (int, float)):
-                product_price = product_instance
-            else:
-                return None
-
-        numerical_discount = latest_discount.numerical_discount
-        percentage_discount = latest_discount.percentage_discount
-
-        if numerical_discount and percentage_discount:
-            product_numerical_discount = product_price - numerical_discount
-            product_percentage_discount = product_price - (product_price * percentage_discount / 100)
-            if product_numerical_discount < product_percentage_discount:
-                return product_numerical_discount
-            else:
-                return product_percentage_discount
-        elif percentage_discount:
-            return product_price - (product_price * percentage_discount / 100)
-        elif numerical_discount:
-            return product_price - numerical_discount
-        return None
+        return pricing.discounted_price(product_price, latest_discount)
 
     def calculate_total_price(self, product_discount, total_price):  # noqa
         if product_discount is not None:
             total_price += product_discount
         return total_price
-
-    def prepare_response_after_adding_products(self, cookies_to_delete):  # noqa
-        response = JsonResponse({'message': _('Product added to wishlist successfully.')})
-        for cookie_key in cookies_to_delete:
-            response.delete_cookie(cookie_key)
-        return response
@@ -1,14 +1,20 @@
 from functools import partial
 from apps.core.upload_to_filename import maker
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 
 from apps.order.models import Order
 from apps.product import managers
+from apps.core import images
 from apps.core import managers as delete_managers
 from apps.account.models import User
 from django.utils.translation import gettext_lazy as _
 from apps.core.mixin import mixin_model
 from apps.core import managers as soft_delete_manager
+from apps.core.managers import LIVE_CONDITION
 from apps.core import validators
 
 
@@ -23,6 +29,7 @@ class Brand(mixin_model.TimestampsStatusFlagMixin):
     description = models.TextField(verbose_name=_('Description'))
     location = models.CharField(max_length=200, verbose_name=_('Location'))
     logo = models.ImageField(upload_to=partial(maker, "brand_logo/%Y/%m/", keys=["name"]), verbose_name=_('Logo'))
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)  # see apps.core.images
 
     objects = managers.BrandManager()
     soft_delete = soft_delete_manager.DeleteManager()
@@ -58,6 +65,7 @@ class Media(mixin_model.TimestampsStatusFlagMixin):
     product_picture = models.ImageField(
         upload_to=partial(maker, "media_picture/%Y/%m/", keys=["product"]), max_length=255, blank=True,
         null=True, validators=[validators.PictureValidator()], verbose_name=_('Product Picture'))
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)  # see apps.core.images
 
     objects = managers.MediaManager()
     soft_delete = soft_delete_manager.DeleteManager()
@@ -68,15 +76,27 @@ class Media(mixin_model.TimestampsStatusFlagMixin):
         else:
             return None
 
+    def get_srcset(self):
+        """
+        Return the srcset of the WebP derivatives, '' until the image pipeline has processed the upload.
+        """
+        return images.srcset(self)
+
     class Meta:
         """
         Meta options for the Media model:
         - verbose_name_plural: Plural name for the model.
         - verbose_name: Singular name for the model.
+        - default_manager_name: `objects` only returns live rows, Django keeps using every row.
+        - indexes: Partial index on the live media of a product, in card order.
         """
         ordering = ('-product',)
         verbose_name_plural = 'Media'
         verbose_name = 'Media'
+        default_manager_name = 'soft_delete'
+        indexes = [
+            models.Index(fields=['product', 'create_time', 'id'], name='media_live_product', condition=LIVE_CONDITION),
+        ]
 
 
 class Category(mixin_model.TimestampsStatusFlagMixin):
@@ -90,10 +110,15 @@ class Category(mixin_model.TimestampsStatusFlagMixin):
     category_picture = models.ImageField(
         upload_to=partial(maker, "media_picture/%Y/%m/", keys=["name"]), max_length=255, blank=True,
         null=True, validators=[validators.PictureValidator()], verbose_name=_('Category Picture'))
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)  # see apps.core.images
     is_sub_category = models.BooleanField(default=False)
+    path = models.CharField(max_length=255, default='', editable=False, verbose_name=_('Path'))
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
 
     objects = managers.CategoryManager()
     soft_delete = soft_delete_manager.DeleteManager()
+    # Relations soft deleted along with the category, see apps.core.cascade.
+    soft_delete_cascade = ('pcategory', 'category_products', 'category_code_discounts')
 
     def __str__(self):
         """
@@ -101,6 +126,39 @@ class Category(mixin_model.TimestampsStatusFlagMixin):
         """
         return f'{self.name}'
 
+    def build_path(self):
+        """
+        Return the materialized path of the category: the ids from the root down to itself, e.g. '1/4/9/'.
+        """
+        parent_path = self.parent_category.path if self.parent_category_id else ''
+        return f'{parent_path}{self.pk}/'
+
+    def save(self, *args, **kwargs):
+        """
+        Save the category and keep its materialized path, and the paths of its descendants, in sync.
+        """
+        super().save(*args, **kwargs)
+        old_path, new_path = self.path, self.build_path()
+        if old_path == new_path:
+            return
+        depth = new_path.count('/') - 1
+        Category._base_manager.filter(pk=self.pk).update(path=new_path, depth=depth)  # noqa
+        if old_path:
+            Category._base_manager.filter(path__startswith=old_path).exclude(pk=self.pk).update(  # noqa
+                path=Concat(Value(new_path), Substr('path', len(old_path) + 1)),
+                depth=F('depth') + (depth - self.depth),
+            )
+        self.path, self.depth = new_path, depth
+
+    def get_descendants(self, include_self=False):
+        """
+        Return all categories below this one with a single indexed prefix query.
+        """
+        descendants = Category.soft_delete.filter(path__startswith=self.path)
+        if not include_self:
+            descendants = descendants.exclude(pk=self.pk)
+        return descendants
+
     class Meta:
         """
         Meta options for the Category model:
@@ -109,13 +167,19 @@ class Category(mixin_model.TimestampsStatusFlagMixin):
         - verbose_name: Singular name for the model.
         - indexes: Database indexes.
         - constraints: Database constraints.
+        - default_manager_name: `objects` only returns live rows, Django keeps using every row.
         """
         ordering = ['name']
         verbose_name_plural = 'Categories'
         verbose_name = 'Category'
+        default_manager_name = 'soft_delete'
         constraints = [
             models.UniqueConstraint(fields=['name'], name='unique_name'),
         ]
+        indexes = [
+            models.Index(fields=['path'], name='category_path', opclasses=['varchar_pattern_ops']),
+            models.Index(fields=['parent_category'], name='category_live_parent', condition=LIVE_CONDITION),
+        ]
 
 
 class Product(mixin_model.TimestampsStatusFlagMixin):
@@ -139,6 +203,9 @@ class Product(mixin_model.TimestampsStatusFlagMixin):
     - category: Relationship with the Category model.
     - brand: Relationship with the Brand model.
     - warranty: Warranty period for the product.
+    - effective_price: Price after the active discount, kept up to date by apps.product.signals.
+    - active_discount: Discount the effective price was computed from.
+    - search_vector: Weighted full-text document (name > brand > description), see apps.product.search.
     """
     category = models.ForeignKey('Category', on_delete=models.CASCADE, related_name='category_products')
     brand = models.ForeignKey('Brand', on_delete=models.CASCADE, related_name='brand_products')
@@ -159,9 +226,17 @@ class Product(mixin_model.TimestampsStatusFlagMixin):
                                 validators=[validators.WarrantyValidator()], null=True,
                                 blank=True)
     quantity = models.PositiveSmallIntegerField(default=0)
+    effective_price = models.PositiveIntegerField(null=True, blank=True, db_index=True, editable=False,
+                                                  verbose_name=_('Effective Price'))
+    active_discount = models.ForeignKey('Discount', on_delete=models.SET_NULL, related_name='+', null=True,
+                                        blank=True, editable=False)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
 
     objects = managers.ProductManager()
     soft_delete = soft_delete_manager.DeleteManager()
+    # Relations soft deleted along with the product, see apps.core.cascade.
+    soft_delete_cascade = ('media_products', 'product_code_discounts', 'product_comments', 'product_wishlist',
+                           'product_add_to_inventory')
 
     def __str__(self):
         """
@@ -169,6 +244,23 @@ class Product(mixin_model.TimestampsStatusFlagMixin):
         """
         return f'{self.name} - {self.price} - {self.category.name} - {self.brand.name}'
 
+    @property
+    def card_media(self):
+        """
+        List holding the primary active media of the product, or an empty list.
+        Served from the prefetch of ProductQuerySet.for_cards() when available.
+        """
+        if hasattr(self, 'prefetched_card_media'):
+            return self.prefetched_card_media
+        return list(managers.card_media_queryset().filter(product=self)[:1])
+
+    @property
+    def current_discounts(self):
+        """
+        List holding the active discount of the product, or an empty list.
+        """
+        return [self.active_discount] if self.active_discount_id else []
+
     class Meta:
         """
         Meta options for the Product model:
@@ -176,16 +268,25 @@ class Product(mixin_model.TimestampsStatusFlagMixin):
         - verbose_name: Singular name for the model.
         - verbose_name_plural: Plural name for the model.
         - constraints: Database constraints.
-        - indexes: Database indexes.
+        - indexes: Database indexes, the partial ones cover the live rows the storefront lists.
+        - default_manager_name: `objects` only returns live rows, Django keeps using every row.
         """
         ordering = ('name',)
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
+        default_manager_name = 'soft_delete'
         constraints = [
             models.UniqueConstraint(fields=['name', 'brand'], name='unique_product')
         ]
         indexes = [
-            models.Index(fields=['name', 'category', 'brand'], name='indexes_product')
+            models.Index(fields=['name', 'category', 'brand'], name='indexes_product'),
+            GinIndex(fields=['search_vector'], name='product_search_vector'),
+            GinIndex(OpClass('name', name='gin_trgm_ops'), name='product_name_trgm'),
+            GinIndex(OpClass('description', name='gin_trgm_ops'), name='product_description_trgm'),
+            models.Index(fields=['-create_time', '-id'], name='product_live_newest', condition=LIVE_CONDITION),
+            models.Index(fields=['effective_price', 'id'], name='product_live_price', condition=LIVE_CONDITION),
+            models.Index(fields=['category', '-create_time'], name='product_live_category', condition=LIVE_CONDITION),
+            models.Index(fields=['brand'], name='product_live_brand', condition=LIVE_CONDITION),
         ]
 
 
@@ -201,6 +302,8 @@ class Comment(mixin_model.TimestampsStatusFlagMixin):
     comment = models.TextField(max_length=500, verbose_name=_('Comment'))
     objects = managers.CommentManager()
     soft_delete = soft_delete_manager.DeleteManager()
+    # Relations soft deleted along with the comment, see apps.core.cascade.
+    soft_delete_cascade = ('reply_comments',)
 
     def __str__(self):
         """
@@ -216,12 +319,15 @@ class Comment(mixin_model.TimestampsStatusFlagMixin):
         - verbose_name_plural: Plural name for the model.
         - constraints: Database constraints.
         - indexes: Database indexes.
+        - default_manager_name: `objects` only returns live rows, Django keeps using every row.
         """
         ordering = ('-create_time',)
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
+        default_manager_name = 'soft_delete'
         indexes = [
-            models.Index(fields=['user', 'product'], name='indexes_comment')
+            models.Index(fields=['user', 'product'], name='indexes_comment'),
+            models.Index(fields=['product', '-create_time'], name='comment_live_product', condition=LIVE_CONDITION),
         ]
 
 
@@ -246,8 +352,8 @@ class Wishlist(mixin_model.TimestampsStatusFlagMixin):
         ordering = ('user',)
         verbose_name = 'Favorites Basket'
         verbose_name_plural = 'Favorites Baskets'
-        indexes = [
-            models.Index(fields=['user', 'product']),
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_wishlist_user_product')
         ]
 
 
@@ -279,8 +385,12 @@ class Discount(mixin_model.TimestampsStatusFlagMixin):
         ordering = ('update_time', '-create_time')
         verbose_name = 'Discount %'
         verbose_name_plural = 'Discounts %'
+        default_manager_name = 'soft_delete'
         indexes = [
             models.Index(fields=['product', 'category']),
+            models.Index(fields=['is_expired', 'expiration_date']),
+            models.Index(fields=['product', '-create_time'], name='discount_live_product',
+                         condition=LIVE_CONDITION & models.Q(is_expired=False)),
         ]
 
 
@@ -293,6 +403,8 @@ class Inventory(mixin_model.TimestampsStatusFlagMixin):
 
     objects = managers.InventoryManager()
     soft_delete = delete_managers.DeleteManager()
+    # Relations soft deleted along with the inventory, see apps.core.cascade.
+    soft_delete_cascade = ('inventory_add_to_inventory',)
 
     def __str__(self):
         """Return a string representation of the Inventory."""
@@ -1,56 +1,20 @@
-from apps.account.models import CodeDiscount, Role
 from apps.core.mixin.mixin_views_template import HttpsOptionNotLogoutMixin, messages, PermissionRequiredMixin, \
-    redirect, get_object_or_404
-from apps.product.models import Product, Brand, Category, AddToInventory, Discount, Inventory
+    redirect, RequestInstanceMixin
+from apps.product.models import Product, Brand
 
 
-class MainPermissionRequiredMixinView(PermissionRequiredMixin, HttpsOptionNotLogoutMixin):
+class MainPermissionRequiredMixinView(RequestInstanceMixin, PermissionRequiredMixin, HttpsOptionNotLogoutMixin):
     """
     Defines a view mixin class that combines permission checking and HTTPS options for user sessions.
     """
 
     def dispatch(self, request, *args, **kwargs):
         """
-        Overrides the dispatch method to check permissions and fetch instances of various
-        models based on the URL parameter `pk`. If an instance is found, it assigns it to an
-        instance variable. If permission is denied, it redirects the user and displays an error message.
+        Overrides the dispatch method to check permissions. The objects the view works on are declared in
+        `instance_models` and only fetched when read (see RequestInstanceMixin).
+        If permission is denied, it redirects the user and displays an error message.
         """
 
-        try:  # noqa
-            self.discount_code_instance = get_object_or_404(CodeDiscount, pk=kwargs['pk'])  # noqa
-
-        except Exception:  # noqa
-            pass
-        try:  # noqa
-            self.role_instance = get_object_or_404(Role, pk=kwargs['pk'])  # noqa
-
-        except Exception:  # noqa
-            pass
-        try:
-            self.inventory_instance = get_object_or_404(Inventory, pk=kwargs['pk'])  # noqa
-        except Exception:  # noqa
-            pass
-        try:
-            self.add_to_inventory_instance = get_object_or_404(AddToInventory, pk=kwargs['pk'])  # noqa
-        except Exception:  # noqa
-            pass
-        try:  # noqa
-            self.discount_instance = get_object_or_404(Discount, pk=kwargs['pk'])  # noqa
-        except Exception:  # noqa
-            pass
-        try:  # noqa
-            self.category_instance = get_object_or_404(Category, pk=kwargs['pk'])  # noqa
-        except Exception:  # noqa
-            pass
-        try:
-            self.brand_instance = get_object_or_404(Brand, pk=kwargs['pk'])  # noqa
-        except Exception:  # noqa
-            pass
-        try:
-            self.product_instance = get_object_or_404(Product, pk=kwargs['pk'])  # noqa
-        except Exception:  # noqa
-            pass
-
         if not self.has_permission():
             messages.error(request, 'You do not have permission.', extra_tags='error')
             return redirect(self.next_page_home)
@@ -81,7 +45,7 @@ class SellerOrAdminCreatePermissionRequiredMixinView(MainPermissionRequiredMixin
         if self.request.user.is_authenticated and self.request.user.is_active and (
                 self.request.user.is_superuser
                 or self.request.user.is_staff
-                or self.request.user.groups.filter(name='Seller').exists()
+                or self.request.authz.is_seller
         ):
             return True
 
@@ -103,8 +67,8 @@ class SellerOrAdminOrSupervisorDetailPermissionRequiredMixinView(MainPermissionR
         if self.request.user.is_authenticated and self.request.user.is_active and (
                 self.request.user.is_superuser
                 or self.request.user.is_staff
-                or self.request.user.groups.filter(name='Seller').exists()
-                or self.request.user.groups.filter(name='Supervisor').exists()
+                or self.request.authz.is_seller
+                or self.request.authz.is_supervisor
         ):
             return True
 
@@ -118,12 +82,13 @@ class SellerOrAdminBrandUpdateOrDeletePermissionRequiredMixinView(MainPermission
     """
 
     http_method_names = ['get', 'post']  # noqa
+    instance_models = {'brand_instance': Brand}
 
     def has_permission(self):
         if self.request.user.is_authenticated and self.request.user.is_active and (
                 self.request.user.is_superuser
                 or self.request.user.is_staff
-                or (self.request.user.groups.filter(name='Seller').exists()
+                or (self.request.authz.is_seller
                     and self.brand_instance.user == self.request.user)
 
         ):
@@ -141,12 +106,13 @@ class SellerOrAdminProductUpdateOrDeletePermissionRequiredMixinView(MainPermissi
     """
 
     http_method_names = ['get', 'post']  # noqa
+    instance_models = {'product_instance': Product.soft_delete.select_related('brand')}
 
     def has_permission(self):
         if self.request.user.is_authenticated and self.request.user.is_active and (
                 self.request.user.is_superuser
                 or self.request.user.is_staff
-                or (self.request.user.groups.filter(name='Seller').exists()
+                or (self.request.authz.is_seller
                     and self.product_instance.brand.user == self.request.user)
 
         ):
@@ -0,0 +1,137 @@
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
+from apps.product.models import Discount, Product
+
+
+def active_discounts():
+    """
+    Return the queryset of discounts that currently apply to product prices.
+    """
+    return Discount.objects.filter(is_expired=False)
+
+
+def calculate_discounted_price(price, percentage_discount=None, numerical_discount=None):
+    """
+    Apply the numerical-versus-percentage rule to a price.
+    When a discount carries both values, the one giving the lower price wins.
+    Returns None when there is nothing to discount.
+    """
+    if price is None:
+        return None
+    if numerical_discount and percentage_discount:
+        product_numerical_discount = price - numerical_discount
+        product_percentage_discount = price - (price * percentage_discount / 100)
+        return min(product_numerical_discount, product_percentage_discount)
+    if percentage_discount:
+        return price - (price * percentage_discount / 100)
+    if numerical_discount:
+        return price - numerical_discount
+    return None
+
+
+def discounted_price(price, discount):
+    """
+    Return the discounted price for a single discount instance, or None.
+    """
+    if discount is None:
+        return None
+    return calculate_discounted_price(price, discount.percentage_discount, discount.numerical_discount)
+
+
+def latest_discount(product):
+    """
+    Return the active discount snapshot of a single product.
+    """
+    return product.active_discount
+
+
+def latest_discounts(product_ids):
+    """
+    Resolve the latest active discount for every product id with one query.
+    Returns a dict mapping product id to its Discount.
+    """
+    product_ids = {pk for pk in product_ids if pk is not None}
+    if not product_ids:
+        return {}
+    discounts = active_discounts().filter(product_id__in=product_ids).order_by(
+        'product_id', '-create_time').distinct('product_id')
+    return {discount.product_id: discount for discount in discounts}
+
+
+def compute_effective_price(price, discount):
+    """
+    Return the price the customer pays under `discount`, rounded to a non-negative integer.
+    """
+    if price is None:
+        return None
+    price_after_discount = discounted_price(price, discount)
+    if price_after_discount is None:
+        return price
+    return max(0, round(price_after_discount))
+
+
+def product_discount(product):
+    """
+    Return the discounted price stored on `product`, or None when no discount applies.
+    """
+    if product.active_discount_id is None:
+        return None
+    return product.effective_price
+
+
+def product_price(product):
+    """
+    Return the price the customer pays for `product`.
+    """
+    if product.effective_price is None:
+        return product.price
+    return product.effective_price
+
+
+def refresh_effective_prices(product_ids, batch_size=1000):
+    """
+    Recompute the `effective_price` / `active_discount` snapshot of the given products.
+    Works in batches of `batch_size` with one discount query and one bulk update per batch.
+    Returns the number of products whose snapshot changed.
+    """
+    product_ids = sorted({pk for pk in product_ids if pk is not None})
+    updated = 0
+    for start in range(0, len(product_ids), batch_size):
+        batch = product_ids[start:start + batch_size]
+        discounts = latest_discounts(batch)
+        changed = []
+        products = Product._base_manager.filter(pk__in=batch).only(  # noqa
+            'pk', 'price', 'effective_price', 'active_discount', 'update_time')
+        for product in products:
+            discount = discounts.get(product.pk)
+            price = compute_effective_price(product.price, discount)
+            discount_id = discount.pk if discount is not None else None
+            if product.effective_price != price or product.active_discount_id != discount_id:
+                product.effective_price = price
+                product.active_discount_id = discount_id
+                product.update_time = timezone.now()
+                changed.append(product)
+        Product._base_manager.bulk_update(changed, ['effective_price', 'active_discount', 'update_time'])  # noqa
+        updated += len(changed)
+    return updated
+
+
+def apply_discounts(products):
+    """
+    Set `latest_discount` and `discount` on every product of the iterable from the stored snapshot.
+    The iterable is evaluated once; discounts that were not selected with the products are
+    fetched with a single query.
+    """
+    products = list(products)
+    prefetch_related_objects(products, 'active_discount')
+    for product in products:
+        product.latest_discount = product.active_discount
+        product.discount = product_discount(product)
+    return products
+
+
+def resolve_prices(products):
+    """
+    Return a dict mapping product id to the price the customer pays.
+    """
+    return {product.pk: product_price(product) for product in products}
@@ -0,0 +1,111 @@
+import hashlib
+import re
+import unicodedata
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.core.cache import cache
+from django.db.models import F, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from apps.product import catalog
+from apps.product.models import Brand, Product
+
+# Product texts mix Persian and English, so no language specific stemming is applied.
+SEARCH_CONFIG = 'simple'
+
+# Arabic code points typed on Arabic keyboards, mapped to their Persian equivalents,
+# plus Persian/Arabic-Indic digits mapped to ASCII digits.
+CHARACTER_VARIANTS = str.maketrans({
+    '\u064a': '\u06cc',  # ARABIC YEH -> FARSI YEH
+    '\u0649': '\u06cc',  # ALEF MAKSURA -> FARSI YEH
+    '\u0643': '\u06a9',  # ARABIC KAF -> KEHEH
+    '\u0629': '\u0647',  # TEH MARBUTA -> HEH
+    '\u0623': '\u0627',  # ALEF WITH HAMZA ABOVE -> ALEF
+    '\u0625': '\u0627',  # ALEF WITH HAMZA BELOW -> ALEF
+    '\u0640': None,  # TATWEEL
+    '\u200c': ' ',  # ZERO WIDTH NON-JOINER
+    **{chr(0x06f0 + digit): str(digit) for digit in range(10)},
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},
+})
+# Arabic diacritics (harakat) carry no meaning for matching.
+DIACRITICS = re.compile('[\u064b-\u065f\u0670]')
+
+
+def search_document():
+    """
+    Return the weighted search vector of a product: name (A) > brand name (B) > description (C).
+    """
+    brand_name = Subquery(Brand._base_manager.filter(pk=OuterRef('brand_id')).values('name')[:1])  # noqa
+    return (
+        SearchVector('name', weight='A', config=SEARCH_CONFIG) +
+        SearchVector(Coalesce(brand_name, Value('')), weight='B', config=SEARCH_CONFIG) +
+        SearchVector('description', weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vectors(product_ids=None, batch_size=1000):
+    """
+    Rebuild `search_vector` for the given products, or for every product when `product_ids` is None.
+    Each batch is a single UPDATE. Returns the number of updated rows.
+    """
+    queryset = Product._base_manager.all()  # noqa
+    if product_ids is None:
+        product_ids = queryset.order_by('pk').values_list('pk', flat=True)
+    product_ids = list(product_ids)
+    updated = 0
+    for start in range(0, len(product_ids), batch_size):
+        batch = product_ids[start:start + batch_size]
+        updated += queryset.filter(pk__in=batch).update(search_vector=search_document())
+    return updated
+
+
+def search_products(queryset, query):
+    """
+    Filter `queryset` down to the products matching `query` and annotate them with a `similarity` score.
+    Every branch of the filter is served by an index: full-text matches by the GIN index on
+    `search_vector` and fuzzy matches by the trigram indexes through the `%` operator
+    (threshold `pg_trgm.similarity_threshold`). Order by ('-similarity', '-id') for ranked pages.
+    """
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    return queryset.filter(
+        Q(search_vector=search_query) |
+        Q(name__trigram_similar=query) |
+        Q(description__trigram_similar=query)
+    ).annotate(
+        similarity=SearchRank(F('search_vector'), search_query) +
+                   TrigramSimilarity('name', query) +  # noqa
+                   TrigramSimilarity('description', query)
+    )
+
+
+def normalize_query(query):
+    """
+    Normalize a search query so that equivalent spellings share one cache entry:
+    case, surrounding and repeated whitespace, and Persian/Arabic character variants.
+    """
+    query = unicodedata.normalize('NFKC', query or '')
+    query = DIACRITICS.sub('', query.translate(CHARACTER_VARIANTS))
+    return ' '.join(query.casefold().split())
+
+
+def search_cache_key(query, scope):
+    """
+    Return the cache key of `query` within `scope`, tied to the current catalog version.
+    """
+    digest = hashlib.md5(query.encode('utf-8')).hexdigest()  # noqa
+    return f'search:{catalog.catalog_version()}:{scope}:{digest}'
+
+
+def cached_search_ids(queryset, query, scope='products'):
+    """
+    Return the ordered ids of the products of `queryset` matching `query`.
+    The list is cached for SEARCH_CACHE_TIMEOUT seconds and dropped whenever the catalog version moves.
+    `scope` must identify `queryset`, e.g. 'products' or 'category:<pk>'.
+    """
+    query = normalize_query(query)
+    key = search_cache_key(query, scope)
+    product_ids = cache.get(key)
+    if product_ids is None:
+        product_ids = list(search_products(queryset, query).order_by('-similarity', '-id').values_list(
+            'pk', flat=True)[:settings.SEARCH_CACHE_MAX_RESULTS])
+        cache.set(key, product_ids, settings.SEARCH_CACHE_TIMEOUT)
+    return product_ids
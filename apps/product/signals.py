@@ -0,0 +1,131 @@
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from apps.core.signals import image_derivatives_changed, soft_delete_changed
+from apps.product import catalog, category_tree, pricing, search
+from apps.product.models import Brand, Category, Discount, Media, Product
+
+SEARCH_DOCUMENT_FIELDS = {'name', 'description', 'brand'}
+
+
+def affected_product_ids(discounts):
+    """
+    Return the ids of products that carry one of `discounts` or currently use it as their snapshot.
+    """
+    product_ids = {discount.product_id for discount in discounts}
+    product_ids.update(Product._base_manager.filter(  # noqa
+        active_discount__in=[discount.pk for discount in discounts]).values_list('pk', flat=True))
+    return product_ids
+
+
+@receiver(pre_save, sender=Product)
+def set_effective_price(sender, instance, **kwargs):  # noqa
+    """
+    Keep the effective price in line with the price being saved and the current discount snapshot.
+    """
+    instance.effective_price = pricing.compute_effective_price(instance.price, instance.active_discount)
+
+
+@receiver(post_save, sender=Discount)
+def refresh_prices_on_discount_save(sender, instance, **kwargs):  # noqa
+    """
+    Refresh the snapshot of the discounted product after a discount is created or changed.
+    """
+    pricing.refresh_effective_prices(affected_product_ids([instance]))
+
+
+@receiver(pre_delete, sender=Discount)
+def collect_products_on_discount_delete(sender, instance, **kwargs):  # noqa
+    """
+    Remember the products to refresh before the discount row is gone.
+    """
+    instance._affected_product_ids = affected_product_ids([instance])
+
+
+@receiver(post_delete, sender=Discount)
+def refresh_prices_on_discount_delete(sender, instance, **kwargs):  # noqa
+    """
+    Refresh the snapshot of the products that used a deleted discount.
+    """
+    pricing.refresh_effective_prices(getattr(instance, '_affected_product_ids', {instance.product_id}))
+
+
+@receiver(soft_delete_changed, sender=Discount)
+def refresh_prices_on_discount_soft_delete(sender, pks, **kwargs):  # noqa
+    """
+    Refresh the snapshot of the products whose discounts were soft-deleted, restored or (de)activated.
+    """
+    product_ids = set(Discount._base_manager.filter(pk__in=pks).values_list('product_id', flat=True))  # noqa
+    product_ids.update(Product._base_manager.filter(active_discount__in=pks).values_list('pk', flat=True))  # noqa
+    pricing.refresh_effective_prices(product_ids)
+
+
+@receiver(post_save, sender=Product)
+def update_search_vector_on_product_save(sender, instance, update_fields=None, **kwargs):  # noqa
+    """
+    Rebuild the search document of a saved product when one of its searchable fields may have changed.
+    """
+    if update_fields is not None and not SEARCH_DOCUMENT_FIELDS.intersection(update_fields):
+        return
+    search.update_search_vectors([instance.pk])
+
+
+@receiver(post_save, sender=Brand)
+def update_search_vector_on_brand_save(sender, instance, **kwargs):  # noqa
+    """
+    Rebuild the search documents of every product of a renamed brand.
+    """
+    search.update_search_vectors(instance.brand_products.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=Category)
+@receiver(soft_delete_changed, sender=Product)
+@receiver(soft_delete_changed, sender=Brand)
+@receiver(soft_delete_changed, sender=Category)
+@receiver(post_save, sender=Media)
+@receiver(post_delete, sender=Media)
+@receiver(soft_delete_changed, sender=Media)
+@receiver(image_derivatives_changed, sender=Media)
+@receiver(image_derivatives_changed, sender=Brand)
+@receiver(image_derivatives_changed, sender=Category)
+def bump_catalog_version(sender, **kwargs):  # noqa
+    """
+    Invalidate the catalog caches (search results, storefront fragments, ...) after any change to products,
+    brands, categories or product media.
+    """
+    catalog.bump_catalog_version()
+
+
+@receiver(post_save, sender=Discount)
+@receiver(post_delete, sender=Discount)
+@receiver(soft_delete_changed, sender=Discount)
+def bump_discount_version(sender, **kwargs):  # noqa
+    """
+    Invalidate the cached storefront fragments that show prices after any change to discounts.
+    """
+    catalog.bump_discount_version()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(soft_delete_changed, sender=Category)
+@receiver(image_derivatives_changed, sender=Category)
+def invalidate_category_tree(sender, **kwargs):  # noqa
+    """
+    Drop the cached category tree once the change is committed, so no process rebuilds it from stale rows.
+    """
+    transaction.on_commit(category_tree.invalidate)
+
+
+def create_search_extensions(using, **kwargs):  # noqa
+    """
+    Create the pg_trgm extension before migrating, the trigram indexes of Product depend on it.
+    Connected to pre_migrate in ProductConfig.ready.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
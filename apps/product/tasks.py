@@ -0,0 +1,19 @@
+from celery import shared_task
+from django.utils import timezone
+from apps.product import catalog, pricing
+from apps.product.models import Discount
+
+
+@shared_task
+def expire_discounts():
+    """
+    Mark discounts whose expiration date has passed as expired and refresh the prices of their products.
+    Runs periodically from celery beat, see `beat_schedule` in config/celery.py.
+    """
+    expired = Discount._base_manager.filter(is_expired=False, expiration_date__lte=timezone.now())  # noqa
+    product_ids = set(expired.values_list('product_id', flat=True))
+    count = expired.update(is_expired=True, update_time=timezone.now())
+    pricing.refresh_effective_prices(product_ids)
+    if count:
+        catalog.bump_discount_version()
+    return count
@@ -0,0 +1,65 @@
+from django import template
+from django.utils.safestring import mark_safe
+from apps.product import fragments
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    """
+    Renders its content once per catalog/discount version and vary_on values, then serves it from the cache.
+    """
+
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        vary_on = [variable.resolve(context) for variable in self.vary_on]
+
+        def render_fragment():
+            with context.push(csrf_token=fragments.CSRF_TOKEN_HOLE, fragment_holes=True):
+                return self.nodelist.render(context)
+
+        content = fragments.get_or_render(name, render_fragment, vary_on=vary_on)
+        return mark_safe(fragments.fill_holes(content, context.get('csrf_token', ''), current_user_pk(context)))
+
+
+def current_user_pk(context):
+    request = context.get('request')
+    if request is None or not request.user.is_authenticated:
+        return ''
+    return request.user.pk
+
+
+@register.tag
+def cachefragment(parser, token):
+    """
+    Usage::
+
+        {% load fragment_cache %}
+        {% cachefragment 'home-products' request.GET.urlencode %}
+            ... {% csrf_token %} ... {% user_pk %} ...
+        {% endcachefragment %}
+
+    Everything inside must be the same for every visitor, except the CSRF token and {% user_pk %}.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires at least one argument.")
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    return FragmentCacheNode(nodelist, parser.compile_filter(bits[1]),
+                             [parser.compile_filter(bit) for bit in bits[2:]])
+
+
+@register.simple_tag(takes_context=True)
+def user_pk(context):
+    """
+    Primary key of the current user; a placeholder inside {% cachefragment %}, filled in per request.
+    """
+    if context.get('fragment_holes'):
+        return fragments.USER_PK_HOLE
+    return current_user_pk(context)
@@ -1,10 +1,28 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage
+from django.http import Http404
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from apps.core import cascade, images
+from apps.core.models import SoftDeleteOperation
+from apps.core.pagination import KeysetPaginator
+from apps.product import catalog, category_tree, facets, fragments, pricing, search
 from apps.account.models import User, Address, CodeDiscount
 from apps.order.models import OrderItem, Order
+from apps.product.form_data.serializers import ProductValuesSerializer
+from apps.product.views.views_template.views_product import ProductDeleteView, ProductUpdateView
 from apps.product.models import Brand, Media, Category, Product, Comment, AddToInventory, Discount, Wishlist
 from datetime import timedelta
 from decimal import Decimal
 from django.utils import timezone
+from PIL import Image
+from types import SimpleNamespace
+from unittest import mock
+import gc
+import io
+import threading
+import tracemalloc
 import uuid
 
 
@@ -67,6 +85,64 @@ class MediaTestCase(TestCase):
         media = Media.objects.create(product=self.product, product_picture="test.jpg")
         self.assertIsNotNone(media)
 
+    def test_media_srcset(self):
+        media = Media.objects.create(product=self.product, product_picture="media_picture/test.jpg")
+        self.assertEqual(media.get_srcset(), "")
+        media.derivatives = {'source': "media_picture/test.jpg", 'width': 2000, 'images': [
+            {'width': 320, 'format': 'webp', 'name': images.derivative_name("media_picture/test.jpg", 320, 'webp')},
+            {'width': 320, 'format': 'jpg', 'name': images.derivative_name("media_picture/test.jpg", 320, 'jpg')},
+        ]}
+        self.assertTrue(media.get_srcset().endswith("media_picture/test_320w.webp 320w"))
+
+    def upload(self, storage, name, size, mode='RGB', image_format='JPEG'):
+        buffer = io.BytesIO()
+        Image.new(mode, size, (200, 30, 30, 128) if mode == 'RGBA' else (200, 30, 30)).save(buffer, image_format)
+        return SimpleNamespace(storage=storage, name=storage.save(name, ContentFile(buffer.getvalue())))
+
+    def test_generate_derivatives(self):
+        storage = InMemoryStorage()
+        record = images.generate_derivatives(self.upload(storage, "media_picture/shoe.jpg", (1000, 500)))
+        self.assertEqual(record['width'], 1000)
+        self.assertEqual([(item['width'], item['format']) for item in record['images']],
+                         [(320, 'webp'), (320, 'jpg'), (640, 'webp'), (640, 'jpg')])
+        for item in record['images']:
+            with Image.open(storage.open(item['name'])) as derivative:
+                self.assertEqual(derivative.size, (item['width'], item['width'] // 2))
+                self.assertEqual(derivative.format, {'webp': 'WEBP', 'jpg': 'JPEG'}[item['format']])
+
+    def test_transparent_derivatives_fall_back_to_png(self):
+        storage = InMemoryStorage()
+        record = images.generate_derivatives(self.upload(storage, "media_picture/logo.png", (400, 400), 'RGBA',
+                                                          'PNG'))
+        self.assertEqual([item['format'] for item in record['images']], ['webp', 'png'])
+
+    @override_settings(IMAGE_MAX_PIXELS=10_000)
+    def test_oversized_header_is_rejected(self):
+        field_file = self.upload(InMemoryStorage(), "media_picture/huge.jpg", (200, 100))
+        with self.assertRaises(images.ImageTooLarge):
+            images.generate_derivatives(field_file)
+
+    @override_settings(STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    })
+    def test_stale_upload_keeps_the_newer_image(self):
+        field = Media._meta.get_field('product_picture')  # noqa
+        media = Media.objects.create(product=self.product,
+                                     product_picture=self.upload(field.storage, "media_picture/old.jpg",
+                                                                 (800, 400)).name)
+        newer = self.upload(field.storage, "media_picture/new.jpg", (800, 400)).name
+        generate = images.generate_derivatives
+
+        def upload_while_generating(field_file):
+            Media.soft_delete.filter(pk=media.pk).update(product_picture=newer)
+            return generate(field_file)
+
+        with mock.patch.object(images, 'generate_derivatives', side_effect=upload_while_generating):
+            images.process('product.Media', media.pk)
+        media.refresh_from_db()
+        self.assertEqual((media.product_picture.name, media.derivatives), (newer, {}))
+
     def test_update_media(self):
         media = Media.objects.create(product=self.product, product_picture="test.jpg")
         media.product_picture = "updated_test.jpg"
@@ -129,6 +205,28 @@ class CategoryTestCase(TestCase):
         self.assertIsNotNone(soft_deleted_code_category)
         self.assertTrue(soft_deleted_code_category['is_deleted'])
 
+    def test_category_path_and_descendants(self):
+        root = Category.objects.create(name="Root")
+        child = Category.objects.create(name="Child", parent_category=root)
+        grandchild = Category.objects.create(name="Grandchild", parent_category=child)
+        other = Category.objects.create(name="Other")
+        self.assertEqual(grandchild.path, f"{root.pk}/{child.pk}/{grandchild.pk}/")
+        self.assertEqual(grandchild.depth, 2)
+        self.assertEqual(set(root.get_descendants()), {child, grandchild})
+
+        child.parent_category = other
+        child.save()
+        grandchild.refresh_from_db()
+        self.assertEqual(grandchild.path, f"{other.pk}/{child.pk}/{grandchild.pk}/")
+
+    def test_category_tree_descendant_ids(self):
+        root = Category.objects.create(name="Root")
+        child = Category.objects.create(name="Child", parent_category=root)
+        category_tree.invalidate()
+        tree = category_tree.get_tree()
+        self.assertEqual(set(tree.descendant_ids(root.pk)), {root.pk, child.pk})
+        self.assertEqual([node.pk for node in tree.get(root.pk).children], [child.pk])
+
 
 class ProductTestCase(TestCase):
     def setUp(self):
@@ -168,6 +266,469 @@ class ProductTestCase(TestCase):
         self.assertTrue(soft_deleted_code_product['is_deleted'])
 
 
+class ProductCardsTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@example.com")
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand", description="Test Description",
+                                          location="Test Location")
+        for index in range(3):
+            product = Product.objects.create(category=self.category, brand=self.brand, name=f"Test Product {index}",
+                                             description="Test Description", price=100, quantity=10)
+            Media.objects.create(product=product)
+            Media.objects.create(product=product)
+            Discount.objects.create(product=product, percentage_discount=10)
+
+    def test_for_cards_uses_fixed_number_of_queries(self):
+        with self.assertNumQueries(2):
+            for product in Product.objects.for_cards():
+                self.assertEqual(len(product.card_media), 1)
+                self.assertEqual(len(product.current_discounts), 1)
+                self.assertIsNotNone(product.category.name)
+                self.assertIsNotNone(product.brand.name)
+
+
+class ProductManagerTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@example.com")
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand", description="Test Description",
+                                          location="Test Location")
+        for index in range(20):
+            Product.objects.create(category=self.category, brand=self.brand, name=f"Test Product {index}",
+                                   description="Test Description", price=100, quantity=10)
+
+    def test_managers_return_fresh_querysets(self):
+        for manager in (Product.objects, Product.soft_delete, Media.objects, Wishlist.objects, OrderItem.objects,
+                        User.objects):
+            first, second = manager.get_queryset(), manager.get_queryset()
+            self.assertIsNot(first, second)
+            self.assertIsNone(second._result_cache)  # noqa
+        list(Product.objects.all())
+        self.assertIsNone(Product.objects.get_queryset()._result_cache)  # noqa
+        self.assertTrue(hasattr(Product.objects, 'for_cards'))
+        self.assertTrue(hasattr(Product.soft_delete, 'undelete'))
+
+    def test_querysets_are_not_shared_between_threads(self):
+        querysets = []
+        threads = [threading.Thread(target=lambda: querysets.append(Product.objects.get_queryset()))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(queryset) for queryset in querysets}), 4)
+
+    def test_memory_stays_flat_across_requests(self):
+        url = reverse('product_detail', args=[Product.objects.first().pk])
+
+        def serve(times):
+            for _ in range(times):
+                self.client.get(url)
+                list(Product.objects.for_cards())
+            gc.collect()
+
+        serve(5)
+        tracemalloc.start()
+        try:
+            serve(5)
+            baseline = tracemalloc.get_traced_memory()[0]
+            serve(50)
+            growth = tracemalloc.get_traced_memory()[0] - baseline
+        finally:
+            tracemalloc.stop()
+        self.assertLess(growth, 256 * 1024)
+
+
+class LiveManagerTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@example.com")
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand", description="Test Description",
+                                          location="Test Location")
+        self.product = Product.objects.create(category=self.category, brand=self.brand, name="Test Product",
+                                              description="Test Description", price=100, quantity=10)
+        self.hidden = Product.objects.create(category=self.category, brand=self.brand, name="Hidden Product",
+                                             description="Test Description", price=100, quantity=10)
+
+    def test_objects_only_returns_live_rows(self):
+        Product.soft_delete.filter(pk=self.hidden.pk).deactivate()
+        self.assertEqual(list(Product.objects.for_cards()), [self.product])
+        self.assertEqual(set(Product.objects.archive()), {self.product, self.hidden})
+        self.assertEqual(Product.soft_delete.count(), 2)
+
+        Product.soft_delete.filter(pk=self.hidden.pk).undelete()
+        Product.soft_delete.filter(pk=self.product.pk).delete()
+        self.assertEqual(list(Product.objects.all()), [self.hidden])
+
+    def test_django_default_manager_keeps_every_row(self):
+        Product.soft_delete.filter(pk=self.hidden.pk).delete()
+        for model in (Product, Category, Discount, Media, Comment):
+            self.assertEqual(model._default_manager.name, 'soft_delete')  # noqa
+        self.assertEqual(self.brand.brand_products.count(), 2)
+
+
+@override_settings(SOFT_DELETE_CHUNK_SIZE=1)
+class SoftDeleteCascadeTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@example.com")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand", description="Test Description",
+                                          location="Test Location")
+        self.root = Category.objects.create(name="Root")
+        self.child = Category.objects.create(name="Child", parent_category=self.root)
+        self.products = [
+            Product.objects.create(category=category, brand=self.brand, name=f"Test Product {index}",
+                                   description="Test Description", price=100, quantity=10)
+            for index, category in enumerate((self.root, self.child, self.child))
+        ]
+        self.media = Media.objects.create(product=self.products[1])
+        self.inactive_media = Media.objects.create(product=self.products[1], is_active=False)
+        self.discount = Discount.objects.create(product=self.products[2], percentage_discount=10)
+        self.wishlist = Wishlist.objects.create(user=self.user, product=self.products[0])
+        Product.soft_delete.filter(pk=self.products[2].pk).delete()
+
+    def flags(self, instance):
+        instance = type(instance)._base_manager.get(pk=instance.pk)  # noqa
+        return instance.is_deleted, instance.is_active
+
+    def test_delete_cascades_in_chunks_and_undelete_restores(self):
+        # Other on_commit callbacks are queued too, e.g. the category tree invalidation.
+        with mock.patch('apps.core.tasks.run_soft_delete_operation.delay') as delay, \
+                self.captureOnCommitCallbacks(execute=True):
+            operation = cascade.soft_delete(Category, [self.root.pk], user=self.user)
+        delay.assert_called_once_with(operation.pk)
+        self.assertEqual(self.flags(self.root), (True, False))
+        self.assertEqual(self.flags(self.child), (False, True))
+
+        operation = cascade.run(operation.pk)
+        self.assertEqual(operation.status, SoftDeleteOperation.DONE)
+        # The root, then 6 dependent rows; the product deleted beforehand and its discount are left alone.
+        self.assertEqual(operation.processed, 7)
+        for instance in (self.child, self.products[0], self.products[1], self.media, self.inactive_media,
+                         self.wishlist):
+            self.assertEqual(self.flags(instance), (True, False))
+        self.assertEqual(self.flags(self.discount), (False, True))
+        self.assertFalse(Product.objects.exists())
+
+        with self.captureOnCommitCallbacks():
+            undo = cascade.undelete(operation)
+        undo = cascade.run(undo.pk)
+        self.assertEqual(undo.processed, 7)
+        self.assertEqual(SoftDeleteOperation.objects.get(pk=operation.pk).status, SoftDeleteOperation.UNDONE)
+        for instance in (self.root, self.child, self.products[0], self.products[1], self.media, self.wishlist):
+            self.assertEqual(self.flags(instance), (False, True))
+        self.assertEqual(self.flags(self.inactive_media), (False, False))
+        self.assertEqual(self.flags(self.products[2]), (True, False))
+
+
+class ProductKeysetPaginationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@example.com")
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand", description="Test Description",
+                                          location="Test Location")
+        self.products = [
+            Product.objects.create(category=self.category, brand=self.brand, name=f"Test Product {index}",
+                                   description="Test Description", price=100, quantity=10)
+            for index in range(5)
+        ]
+
+    def collect(self, paginator):
+        seen = []
+        page = paginator.get_page()
+        while True:
+            seen.extend(product.pk for product in page)
+            if not page.has_next:
+                return seen
+            page = paginator.get_page(page.next_cursor)
+
+    def test_pages_cover_every_product_once(self):
+        seen = self.collect(KeysetPaginator(Product.objects.all(), per_page=2))
+        expected = list(Product.objects.order_by('-create_time', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_pages_keep_rows_of_the_same_millisecond(self):
+        created = timezone.now().replace(microsecond=123000)
+        # Two rows share a timestamp, the others differ below the millisecond.
+        for product, offset in zip(self.products, (0, 0, 250, 500, 750)):
+            Product.soft_delete.filter(pk=product.pk).update(create_time=created + timedelta(microseconds=offset))
+        seen = self.collect(KeysetPaginator(Product.objects.all(), per_page=1))
+        expected = list(Product.objects.order_by('-create_time', '-id').values_list('pk', flat=True))
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), len(self.products))
+
+    def test_cursor_keeps_microseconds(self):
+        paginator = KeysetPaginator(Product.objects.all(), per_page=2)
+        created = timezone.now().replace(microsecond=123456)
+        cursor = paginator.encode_cursor(Product(id=7, create_time=created))
+        self.assertEqual(paginator.decode_cursor(cursor), [created, 7])
+
+    def test_invalid_cursor_returns_first_page(self):
+        paginator = KeysetPaginator(Product.objects.all(), per_page=2)
+        first_page = [product.pk for product in paginator.get_page()]
+        self.assertEqual([product.pk for product in paginator.get_page('tampered')], first_page)
+
+
+class ProductEffectivePriceTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@example.com")
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand", description="Test Description",
+                                          location="Test Location")
+        self.product = Product.objects.create(category=self.category, brand=self.brand, name="Test Product",
+                                              description="Test Description", price=100, quantity=10)
+
+    def test_effective_price_without_discount(self):
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.effective_price, 100)
+        self.assertIsNone(self.product.active_discount)
+
+    def test_effective_price_follows_discount(self):
+        discount = Discount.objects.create(product=self.product, percentage_discount=10)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.effective_price, 90)
+        self.assertEqual(self.product.active_discount, discount)
+
+        Discount.soft_delete.filter(pk=discount.pk).delete()
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.effective_price, 100)
+        self.assertIsNone(self.product.active_discount)
+
+
+class PricingTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@example.com")
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand", description="Test Description",
+                                          location="Test Location")
+        self.product = Product.objects.create(category=self.category, brand=self.brand, name="Test Product",
+                                              description="Test Description", price=200, quantity=10)
+        self.other = Product.objects.create(category=self.category, brand=self.brand, name="Other Product",
+                                            description="Test Description", price=100, quantity=10)
+
+    def test_latest_discount_wins(self):
+        older = Discount.objects.create(product=self.product, percentage_discount=10)
+        latest = Discount.objects.create(product=self.product, numerical_discount=30)
+        Discount.soft_delete.filter(pk=older.pk).update(create_time=timezone.now() - timedelta(days=1))
+        Discount.objects.create(product=self.other, percentage_discount=50)
+        with self.assertNumQueries(1):
+            discounts = pricing.latest_discounts([self.product.pk, self.other.pk])
+        self.assertEqual(discounts[self.product.pk], latest)
+        pricing.refresh_effective_prices([self.product.pk])
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.effective_price, self.product.active_discount), (170, latest))
+
+    def test_percentage_and_numerical_discounts(self):
+        self.assertEqual(pricing.calculate_discounted_price(200, percentage_discount=10), 180)
+        self.assertEqual(pricing.calculate_discounted_price(200, numerical_discount=30), 170)
+        self.assertEqual(pricing.calculate_discounted_price(200, percentage_discount=10, numerical_discount=30), 170)
+        self.assertEqual(pricing.calculate_discounted_price(200, percentage_discount=50, numerical_discount=30), 100)
+        self.assertIsNone(pricing.calculate_discounted_price(200))
+        self.assertEqual(pricing.compute_effective_price(200, Discount(numerical_discount=300)), 0)
+        self.assertEqual(pricing.compute_effective_price(200, None), 200)
+
+    def test_expired_discounts_are_ignored(self):
+        Discount.objects.create(product=self.product, percentage_discount=10, is_expired=True)
+        self.assertEqual(pricing.latest_discounts([self.product.pk]), {})
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.effective_price, 200)
+        self.assertIsNone(self.product.active_discount)
+
+    def test_apply_discounts_and_resolve_prices(self):
+        Discount.objects.create(product=self.product, percentage_discount=10)
+        products = pricing.apply_discounts(Product.objects.filter(pk__in=[self.product.pk, self.other.pk]))
+        by_pk = {product.pk: product for product in products}
+        self.assertEqual(by_pk[self.product.pk].discount, 180)
+        self.assertIsNone(by_pk[self.other.pk].discount)
+        self.assertEqual(pricing.resolve_prices(products), {self.product.pk: 180, self.other.pk: 100})
+
+
+class ProductSearchTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@example.com")
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Acme", description="Test Description",
+                                          location="Test Location")
+        self.product = Product.objects.create(category=self.category, brand=self.brand, name="Leather Jacket",
+                                              description="Black leather jacket", price=100, quantity=10)
+        Product.objects.create(category=self.category, brand=self.brand, name="Cotton Shirt",
+                               description="White shirt", price=50, quantity=10)
+        # The version counter lives in the persistent cache, start every test from a fresh one.
+        cache.delete(catalog.CATALOG_VERSION_KEY)
+        self.addCleanup(cache.delete, catalog.CATALOG_VERSION_KEY)
+
+    def test_search_vector_is_filled_on_save(self):
+        self.product.refresh_from_db()
+        self.assertIsNotNone(self.product.search_vector)
+
+    def test_search_ranks_matching_product(self):
+        results = list(Product.objects.search("leather jacket"))
+        self.assertEqual(results[0], self.product)
+        self.assertEqual(len(results), 1)
+
+    def test_normalize_query(self):
+        self.assertEqual(search.normalize_query("  \u0643\u062a\u0627\u0628   \u06f1\u06f2 "),
+                         "\u06a9\u062a\u0627\u0628 12")
+        self.assertEqual(search.normalize_query("Leather   JACKET"), "leather jacket")
+
+    def test_cached_search_ids_invalidated_by_catalog_version(self):
+        queryset = Product.objects.all()
+        self.assertEqual(search.cached_search_ids(queryset, "Leather"), [self.product.pk])
+        boots = Product.objects.create(category=self.category, brand=self.brand, name="Leather Boots",
+                                       description="Brown leather boots", price=80, quantity=10)
+        self.assertIn(boots.pk, search.cached_search_ids(queryset, "Leather"))
+
+    def test_cached_search_ids_are_reused_until_the_version_moves(self):
+        queryset = Product.objects.all()
+        version = catalog.catalog_version()
+        self.assertEqual(search.cached_search_ids(queryset, "Leather"), [self.product.pk])
+        # A bulk update sends no signal, so the cached ids stay until the version is bumped.
+        Product.soft_delete.filter(pk=self.product.pk).update(name="Suede Jacket",
+                                                              description="Black suede jacket")
+        search.update_search_vectors([self.product.pk])
+        self.assertEqual(search.cached_search_ids(queryset, "Leather"), [self.product.pk])
+        catalog.bump_catalog_version()
+        self.assertEqual(catalog.catalog_version(), version + 1)
+        self.assertEqual(search.cached_search_ids(queryset, "Leather"), [])
+
+
+class StorefrontFragmentTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@example.com")
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand", description="Test Description",
+                                          location="Test Location")
+        self.product = Product.objects.create(category=self.category, brand=self.brand, name="Test Product",
+                                              description="Test Description", price=100, quantity=10)
+
+    def test_fragment_is_rendered_once(self):
+        calls = []
+
+        def render():
+            calls.append(1)
+            return f"<p>{fragments.USER_PK_HOLE}</p>"
+
+        self.assertEqual(fragments.get_or_render("test-fragment", render), fragments.get_or_render("test-fragment", render))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(fragments.fill_holes(f"<p>{fragments.USER_PK_HOLE}</p>", user_pk=7), "<p>7</p>")
+
+    def test_discount_change_invalidates_fragments(self):
+        key = fragments.fragment_key("test-fragment")
+        Discount.objects.create(product=self.product, percentage_discount=10)
+        self.assertNotEqual(fragments.fragment_key("test-fragment"), key)
+
+
+class ProductFacetTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@example.com")
+        self.category = Category.objects.create(name="Test Category")
+        self.acme = Brand.objects.create(user=self.user, name="Acme", description="Test Description",
+                                         location="Test Location", phone_number="09120000001")
+        self.other = Brand.objects.create(user=self.user, name="Other", description="Test Description",
+                                          location="Test Location", phone_number="09120000002")
+        Product.objects.create(category=self.category, brand=self.acme, name="Red Shirt", description="Shirt",
+                               price=100, color="RED", size="M", quantity=10)
+        Product.objects.create(category=self.category, brand=self.acme, name="Blue Shirt", description="Shirt",
+                               price=200, color="BLUE", size="M", quantity=10)
+        Product.objects.create(category=self.category, brand=self.other, name="Red Hat", description="Hat",
+                               price=300, color="RED", size="L", quantity=10)
+
+    def test_filter_products(self):
+        products, ordering = facets.filter_products(facets.base_queryset(),
+                                                    {'color': ['RED'], 'max_price': 150, 'ordering': 'price_asc'})
+        self.assertEqual([product.name for product in products.order_by(*ordering)], ["Red Shirt"])
+
+    def test_facet_counts_ignore_own_dimension(self):
+        with self.assertNumQueries(1):
+            counts = facets.facet_counts(facets.base_queryset(), {'color': ['RED']})
+        self.assertEqual({item['value']: item['count'] for item in counts['color']}, {'RED': 2, 'BLUE': 1})
+        self.assertEqual({item['label']: item['count'] for item in counts['brand']}, {'Acme': 1, 'Other': 1})
+        self.assertEqual(counts['price'], {'min': 100, 'max': 300, 'count': 2})
+
+
+class CatalogValuesSerializerTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@example.com")
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand", description="Test Description",
+                                          location="Test Location")
+        self.product = Product.objects.create(category=self.category, brand=self.brand, name="Test Product",
+                                              description="Test Description", price=100, quantity=10)
+        Discount.objects.create(product=self.product, percentage_discount=10)
+
+    def test_sparse_fields(self):
+        serializer = ProductValuesSerializer("name,final_price")
+        self.assertEqual(serializer.lookups(), ['id', 'name', 'effective_price'])
+        rows = Product.objects.values(*serializer.lookups())
+        self.assertEqual(serializer.serialize(rows), [{'name': "Test Product", 'final_price': 90}])
+
+    def test_full_rows_use_bulk_lookups(self):
+        serializer = ProductValuesSerializer()
+        with self.assertNumQueries(2):
+            data = serializer.serialize(Product.objects.values(*serializer.lookups()))
+        self.assertEqual(data[0]['brand'], "Test Brand")
+        self.assertEqual(data[0]['discount'], {'percentage': 10, 'amount': None})
+        self.assertIsNone(data[0]['picture'])
+
+
+class ProductConditionalGetTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@example.com")
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand", description="Test Description",
+                                          location="Test Location")
+        self.product = Product.objects.create(category=self.category, brand=self.brand, name="Test Product",
+                                              description="Test Description", price=100, quantity=10)
+        self.url = reverse('product_detail', args=[self.product.pk])
+
+    def test_not_modified_until_product_changes(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Discount.objects.create(product=self.product, percentage_discount=10)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_soft_delete_moves_update_time(self):
+        update_time = Product.objects.get(pk=self.product.pk).update_time
+        Product.soft_delete.filter(pk=self.product.pk).delete()
+        self.assertGreater(Product.soft_delete.archive().get(pk=self.product.pk).update_time, update_time)
+
+
+class PermissionInstanceTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username="testuser", email="test@example.com")
+        self.category = Category.objects.create(name="Test Category")
+        self.brand = Brand.objects.create(user=self.user, name="Test Brand", description="Test Description",
+                                          location="Test Location")
+        self.product = Product.objects.create(category=self.category, brand=self.brand, name="Test Product",
+                                              description="Test Description", price=100, quantity=10)
+        self.request = RequestFactory().get('/')
+        self.request.user = self.user
+
+    def view(self, view_class):
+        view = view_class()
+        view.setup(self.request, pk=self.product.pk)
+        return view
+
+    def test_only_the_declared_instance_is_loaded_once(self):
+        view = self.view(ProductUpdateView)
+        with self.assertNumQueries(1):
+            self.assertEqual(view.product_instance, self.product)
+            self.assertEqual(view.product_instance.brand, self.brand)
+        with self.assertNumQueries(0):
+            self.assertIs(self.view(ProductDeleteView).product_instance, view.product_instance)
+        with self.assertRaises(AttributeError):
+            view.brand_instance  # noqa
+
+    def test_missing_instance_raises_404(self):
+        view = ProductUpdateView()
+        view.setup(self.request, pk=self.product.pk + 1)
+        with self.assertRaises(Http404):
+            view.product_instance  # noqa
+
+
 class CommentTestCase(TestCase):
     def setUp(self):
         self.user = User.objects.create(username="testuser", email="test@example.com")  # noqa
@@ -182,6 +743,17 @@ class CommentTestCase(TestCase):
         comment = Comment.objects.create(user=self.user, product=self.product, comment="Test Comment")
         self.assertIsNotNone(comment)
 
+    def test_comment_manager_methods(self):
+        comment = Comment.objects.create(user=self.user, product=self.product, comment="Great fabric")
+        reply = Comment.objects.create(user=self.user, product=self.product, comment="Thanks", reply=comment,
+                                       is_reply=True)
+        self.assertEqual(list(Comment.objects.search("fabric")), [comment])
+        self.assertEqual(set(Comment.objects.get_comments_by_user(self.user.pk)), {comment, reply})
+        self.assertEqual(set(Comment.objects.get_comments_by_product(self.product.pk)), {comment, reply})
+        self.assertEqual(list(Comment.objects.get_reply_comments().with_user().with_reply()), [reply])
+        self.assertEqual(set(Comment.objects.with_product().active()), {comment, reply})
+        self.assertFalse(Comment.objects.inactive().exists())
+
     def test_update_comment(self):
         comment = Comment.objects.create(user=self.user, product=self.product, comment="Test Comment")
         comment.comment = "Updated Comment"
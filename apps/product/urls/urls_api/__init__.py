@@ -7,6 +7,8 @@ Defines the `urlpatterns` list, which maps URL patterns to respective applicatio
 - `path("", include("apps.product.urls.urls_api.discount"))`: Includes URL patterns from the `urls_api.discount` module under the `apps.product.urls` package.
 - `path("", include("apps.product.urls.urls_api.warehouse_keeper"))`: Includes URL patterns from the `urls_api.warehouse_keeper` module under the `apps.product.urls` package.
 - `path("", include("apps.product.urls.urls_api.wishlist"))`: Includes URL patterns from the `urls_api.wishlist` module under the `apps.product.urls` package.
+- `path("", include("apps.product.urls.urls_api.product"))`: Includes URL patterns from the `urls_api.product` module under the `apps.product.urls` package.
+- `path("", include("apps.product.urls.urls_api.catalog"))`: Includes URL patterns from the `urls_api.catalog` module under the `apps.product.urls` package.
 These patterns are included at the root level (`""`) of the URL configuration.
 """
 urlpatterns = [
@@ -15,4 +17,6 @@ urlpatterns = [
     path("", include("apps.product.urls.urls_api.discount")),
     path("", include("apps.product.urls.urls_api.warehouse_keeper")),
     path("", include("apps.product.urls.urls_api.wishlist")),
+    path("", include("apps.product.urls.urls_api.product")),
+    path("", include("apps.product.urls.urls_api.catalog")),
 ]
@@ -0,0 +1,16 @@
+from django.urls import path
+from apps.product.views.api import api_catalog
+
+"""
+Defines Django URL patterns for the read-only catalog API using views from the `api_catalog` module.
+- `path('catalog/products/', api_catalog.ProductListAPI.as_view(), name='catalog_product_list_api')`: Maps the URL pattern `catalog/products/` to the `ProductListAPI` view class for listing products with cursor pagination, filters and `?fields=` sparse fieldsets.
+- `path('catalog/products/<int:pk>/', api_catalog.ProductDetailAPI.as_view(), name='catalog_product_detail_api')`: Maps the URL pattern `catalog/products/<int:pk>/` to the `ProductDetailAPI` view class for showing one product, with `pk` as a parameter.
+- `path('catalog/categories/', api_catalog.CategoryListAPI.as_view(), name='catalog_category_list_api')`: Maps the URL pattern `catalog/categories/` to the `CategoryListAPI` view class for listing the category tree.
+- `path('catalog/brands/', api_catalog.BrandListAPI.as_view(), name='catalog_brand_list_api')`: Maps the URL pattern `catalog/brands/` to the `BrandListAPI` view class for listing brands with cursor pagination.
+"""
+urlpatterns = [
+    path('catalog/products/', api_catalog.ProductListAPI.as_view(), name='catalog_product_list_api'),
+    path('catalog/products/<int:pk>/', api_catalog.ProductDetailAPI.as_view(), name='catalog_product_detail_api'),
+    path('catalog/categories/', api_catalog.CategoryListAPI.as_view(), name='catalog_category_list_api'),
+    path('catalog/brands/', api_catalog.BrandListAPI.as_view(), name='catalog_brand_list_api'),
+]
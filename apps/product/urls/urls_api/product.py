@@ -0,0 +1,10 @@
+from django.urls import path
+from apps.product.views.api import api_product
+
+"""
+Defines Django URL patterns for product API endpoints using views from the `api_product` module.
+- `path('products-filter/', api_product.ProductFilterAPI.as_view(), name='product_filter_api')`: Maps the URL pattern `products-filter/` to the `ProductFilterAPI` view class for filtering products by facets and price range, returning keyset paginated products and facet counts.
+"""
+urlpatterns = [
+    path('products-filter/', api_product.ProductFilterAPI.as_view(), name='product_filter_api'),
+]
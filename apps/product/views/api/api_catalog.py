@@ -0,0 +1,136 @@
+from rest_framework import status, views
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from apps.core import versioning
+from apps.core.mixin.mixin_conditional_get import ConditionalGetMixin
+from apps.core.pagination import KeysetPaginator
+from apps.product import catalog, category_tree, facets
+from apps.product.form_data import forms, serializers
+
+
+class CatalogListAPI(ConditionalGetMixin, views.APIView):
+    """
+    base class for the read-only catalog lists.
+    rows are read with `.values()`, serialized with a ValuesSerializer and paginated with a signed cursor.
+    responses are revalidated against the catalog cache versions, without touching the database.
+    """
+    http_method_names = ['get']
+    vary_on_user = False
+    serializer_class = None
+    queryset = None
+    ordering = ('-create_time', '-id')
+    paginate_by = 20
+
+    def get_queryset(self):
+        """
+        return the rows to list: a fresh copy of `queryset`, which subclasses set unless they override this method.
+        """
+        assert self.queryset is not None, (
+            f'{self.__class__.__name__} should include a `queryset` attribute or override get_queryset().')
+        return self.queryset.all()
+
+    def get_validator_extra(self):
+        return list(catalog.storefront_versions())
+
+    def get_ordering(self):
+        return self.ordering
+
+    def get(self, request, *args, **kwargs):
+        """
+        function for listing one page of rows.
+        :param request: HttpRequest object; accepts `cursor` and `fields` (comma separated) in the query string.
+        :return: Response with the serialized rows and the cursor of the next page.
+        """
+        serializer = self.serializer_class.from_request(request)
+        queryset = self.get_queryset()
+        ordering = self.get_ordering()
+        cursor_fields = [field.lstrip('-') for field in ordering]
+        paginator = KeysetPaginator(queryset.values(*serializer.lookups(*cursor_fields)), ordering=ordering,
+                                    per_page=self.paginate_by)
+        page = paginator.get_page_from_request(request)
+        return Response({'results': serializer.serialize(page.rows), 'next': page.next_cursor},
+                        status=status.HTTP_200_OK)
+
+
+class ProductListAPI(CatalogListAPI):
+    """
+    class for listing the products of the storefront.
+    accepts the filters of ProductFilterForm (category, brand, attributes, price range and ordering).
+    """
+    serializer_class = serializers.ProductValuesSerializer
+
+    def setup(self, request, *args, **kwargs):
+        """
+        function to set up the view before handling the request.
+        """
+        self.form = forms.ProductFilterForm(request.GET)  # noqa
+        return super().setup(request, *args, **kwargs)
+
+    def get_filters(self):
+        if not self.form.is_valid():
+            raise ValidationError(self.form.errors)
+        return self.form.cleaned_data
+
+    def get_queryset(self):
+        queryset, self.ordering = facets.filter_products(facets.base_queryset(), self.get_filters())  # noqa
+        return queryset
+
+
+class ProductDetailAPI(ConditionalGetMixin, views.APIView):
+    """
+    class for showing one product of the storefront.
+    answers 304 while the product, its category, its media and its active discount are unchanged.
+    """
+    http_method_names = ['get']
+    serializer_class = serializers.ProductDetailValuesSerializer
+    vary_on_user = False
+    validator_lookups = ('update_time', 'category__update_time', 'brand__update_time',
+                         'media_products__update_time', 'active_discount__update_time')
+    validator_counts = ('media_products',)
+
+    def get_validator_queryset(self):
+        return forms.Product.soft_delete.filter(pk=self.kwargs['pk'])
+
+    def get(self, request, *args, **kwargs):
+        """
+        function for showing a product.
+        :param request: HttpRequest object; accepts `fields` (comma separated) in the query string.
+        :return: Response with the serialized product.
+        """
+        serializer = self.serializer_class.from_request(request)
+        row = facets.base_queryset().filter(pk=kwargs['pk']).values(*serializer.lookups()).first()
+        if row is None:
+            raise NotFound()
+        return Response(serializer.serialize_one(row), status=status.HTTP_200_OK)
+
+
+class CategoryListAPI(ConditionalGetMixin, views.APIView):
+    """
+    class for listing the active categories in path order, served from the cached category tree.
+    the whole tree is returned at once; it is small and already in memory.
+    """
+    http_method_names = ['get']
+    serializer_class = serializers.CategoryValuesSerializer
+    vary_on_user = False
+
+    def get_validator_extra(self):
+        return [versioning.get_version(category_tree.TREE_VERSION_KEY)]
+
+    def get(self, request, *args, **kwargs):
+        """
+        function for listing categories.
+        :param request: HttpRequest object; accepts `fields` (comma separated) in the query string.
+        :return: Response with the serialized categories.
+        """
+        serializer = self.serializer_class.from_request(request)
+        rows = [vars(node) for node in category_tree.get_tree()]
+        return Response({'results': serializer.serialize(rows), 'next': None}, status=status.HTTP_200_OK)
+
+
+class BrandListAPI(CatalogListAPI):
+    """
+    class for listing the active brands by name.
+    """
+    serializer_class = serializers.BrandValuesSerializer
+    queryset = forms.Brand.objects.filter(is_deleted=False, is_active=True)
+    ordering = ('name', 'id')
@@ -0,0 +1,38 @@
+from rest_framework import status, views
+from rest_framework.response import Response
+from apps.core.mixin.mixin_conditional_get import ConditionalGetMixin
+from apps.core.pagination import KeysetPaginator
+from apps.product import catalog, facets
+from apps.product.form_data import forms, serializers
+
+
+class ProductFilterAPI(ConditionalGetMixin, views.APIView):
+    """
+    class for filtering products by category, brand, size, color, material, warranty and price range.
+    the response holds one keyset page of products and the facet counts of every dimension.
+    """
+    paginate_by = 20
+    vary_on_user = False
+
+    def get_validator_extra(self):
+        return list(catalog.storefront_versions())
+
+    def get(self, request, *args, **kwargs):
+        """
+        function for filtering products.
+        :param request: HttpRequest object; filters are read from the query string, facets may repeat.
+        :return: Response with the products, the next cursor and the facet counts.
+        """
+        form = forms.ProductFilterForm(request.GET)
+        if not form.is_valid():
+            return Response(form.errors, status=status.HTTP_400_BAD_REQUEST)
+        filters = form.cleaned_data
+        queryset = facets.base_queryset()
+        products, ordering = facets.filter_products(queryset.for_cards(), filters)
+        paginator = KeysetPaginator(products, ordering=ordering, per_page=self.paginate_by)
+        page = paginator.get_page_from_request(request)
+        return Response({
+            'results': serializers.ProductCardSerializer(page.rows, many=True).data,
+            'next': page.next_cursor,
+            'facets': facets.facet_counts(queryset, filters),
+        }, status=status.HTTP_200_OK)
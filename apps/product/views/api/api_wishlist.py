@@ -13,6 +13,7 @@ from apps.product.form_data import forms
 from rest_framework import status, views
 from apps.product.form_data import serializers
 from apps.product import mixin
+from apps.product import pricing
 from apps.product.mixin import ProductDiscountMixin
 
 
@@ -25,22 +26,12 @@ class WishlistAddProductAPI(views.APIView, mixin.ProductDiscountMixin):
 
     def add_product_to_wishlist_authenticated(self):
         """
-        function for adding product to wishlist authenticated user.
+        function for adding product to wishlist authenticated user, in a single INSERT ... ON CONFLICT DO UPDATE
+        statement.
         :return: JsonResponse with serialized wishlist data.
         """
-        product_discount = self.calculate_product_discount(self.product_instance, self.latest_discount)
-        wishlist, created = forms.Wishlist.objects.get_or_create(
-            user=self.request.user,
-            product=self.product_instance,
-            defaults={'quantity': 1,
-                      'total_price': product_discount if product_discount else self.product_instance.price}
-        )
-        if not created:
-            wishlist.quantity += 1
-            wishlist.total_price += product_discount if product_discount else self.product_instance.price
-            wishlist.save()
-        else:
-            wishlist.save()
+        wishlist = forms.Wishlist.objects.add_lines(self.request.user.pk, {self.product_instance.pk: 1},
+                                                    pricing.resolve_prices([self.product_instance]))[0]
         serializer = serializers.WishlistProductSerializer(wishlist)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -105,9 +96,7 @@ class WishlistUpdateProductAPI(views.APIView):
         self.signer = Signer()  # noqa
         self.user_authenticated = request.user.is_authenticated  # noqa
         self.signed_product_id = self.signer.sign(str(self.product_instance.pk))  # noqa
-        self.latest_discount = self.product_instance.product_code_discounts.filter(is_expired=False,  # noqa
-                                                                                   is_active=True).order_by(
-            '-create_time').first()
+        self.latest_discount = pricing.latest_discount(self.product_instance)  # noqa
         self.request_quantity = request.POST.get('quantity')  # noqa
         self.request_total_price = request.POST.get('total_price')  # noqa
         self.form_class = forms.WishlistAddForm  # noqa
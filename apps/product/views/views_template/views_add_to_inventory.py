@@ -79,8 +79,7 @@ class AdminAddToInventoryListView(CRUD.AdminPermissionRequiredMixinView, generic
         if self.request.user.is_superuser or self.request.user.is_staff:
             context['admin_warehouse_keeper'] = warehouse_keepers
             return context
-        if self.request.user.is_superuser or self.request.user.is_staff or self.request.user.groups.filter(
-                name='Supervisor').exists():
+        if self.request.authz.is_admin_or_staff or self.request.authz.is_supervisor:
             context['supervisor_warehouse_keeper'] = warehouse_keepers
             return context
 
@@ -128,6 +127,8 @@ class AddToInventoryUpdateView(CRUD.AdminPermissionRequiredMixinView):
     """
     class to handle the update view for warehouse keeper entries
     """
+    instance_models = {'add_to_inventory_instance': forms.AddToInventory}
+
     def setup(self, request, *args, **kwargs):
         """
         function to set up the view before rendering.
@@ -141,15 +142,15 @@ class AddToInventoryUpdateView(CRUD.AdminPermissionRequiredMixinView):
         """
         function to handle get request on the view. Renders the form for updating a warehouse keeper entry.
         """
-        form = self.form_class(instance=self.add_to_inventory_instance_instance)
+        form = self.form_class(instance=self.add_to_inventory_instance)
         return render(request, self.template_warehouse_keeper_update,
-                      {'form': form, 'warehouse_keeper': self.add_to_inventory_instance_instance})
+                      {'form': form, 'warehouse_keeper': self.add_to_inventory_instance})
 
     def post(self, request, *args, **kwargs):
         """
         function to handle post request on the view. Updates a warehouse keeper entry if the form is valid.
         """
-        form = self.form_class(self.request_post, instance=self.add_to_inventory_instance_instance)  # noqa
+        form = self.form_class(self.request_post, instance=self.add_to_inventory_instance)  # noqa
         if form.is_valid():  # noqa
             add_to_inventory = form.save(commit=False)
             add_to_inventory.user = add_to_inventory.inventory.user
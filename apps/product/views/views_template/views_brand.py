@@ -67,8 +67,7 @@ class AdminOrSellerBrandListView(CRUD.SellerOrAdminOrSupervisorDetailPermissionR
         context = super().get_context_data(**kwargs) # noqa
         brands = forms.Brand.objects.all()
         get_brand = brands.filter(user=self.request.user)
-        if self.request.user.is_superuser or self.request.user.is_staff or self.request.user.groups.filter(
-                name='Supervisor').exists():
+        if self.request.authz.is_admin_or_staff or self.request.authz.is_supervisor:
             context['brands'] = brands
             return context
         if not self.request.user.is_superuser:
@@ -112,8 +111,7 @@ class BrandDetailView(CRUD.SellerOrAdminOrSupervisorDetailPermissionRequiredMixi
         context = super().get_context_data(**kwargs)
         brands = forms.Brand.objects.all()
         get_brand = brands.filter(user=self.request.user)
-        if self.request.user.is_superuser or self.request.user.is_staff or self.request.user.groups.filter(
-                name='Supervisor').exists():
+        if self.request.authz.is_admin_or_staff or self.request.authz.is_supervisor:
             context['brands'] = brands
             return context
         if not self.request.user.is_superuser:
@@ -168,14 +166,14 @@ class BrandDeleteView(CRUD.SellerOrAdminBrandUpdateOrDeletePermissionRequiredMix
         """
         Display brand details.
         """
-        self.object = self.get_object()  # noqa
+        self.object = self.brand_instance  # noqa
         return render(request, self.template_name, {'brand': self.object})
 
     def post(self, request, *args, **kwargs):
         """
         Handle soft deletion of the brand.
         """
-        brand = self.get_object()
+        brand = self.brand_instance
         forms.Brand.soft_delete.filter(pk=brand.id).delete()
         messages.success(request, _(f'Brand has been successfully soft deleted {brand.name}.'), extra_tags='success')
         return redirect('home')
@@ -1,10 +1,13 @@
-from django.contrib.postgres.search import TrigramSimilarity
 from django.contrib import messages
 from django.urls import reverse_lazy
 from django.shortcuts import render, redirect
 from django.utils.translation import gettext_lazy as _
 from django.views import generic
 from apps.product.form_data import forms
+from apps.product import category_tree, pricing, search
+from apps.core import cascade, versioning
+from apps.core.mixin.mixin_conditional_get import ConditionalGetMixin
+from apps.core.pagination import IdListPaginator, KeysetPaginator
 from apps.core.permission.template_permission_admin import CRUD
 
 
@@ -35,7 +38,7 @@ class CategoryCreateView(CRUD.AdminPermissionRequiredMixinView):
         Handle POST requests to the view. Validates the form data and creates a new category if the form is valid.
         """
         form = self.form_class(self.request_post, self.request_files)  # noqa
-        if forms.Category.objects.filter(name=self.request_post.get('name')).exists():
+        if forms.Category.soft_delete.filter(name=self.request_post.get('name')).exists():
             messages.error(request, _(f'Category already exists.'), extra_tags='error')
             return redirect(self.next_page_category_create)
         if form.is_valid():  # noqa
@@ -66,29 +69,33 @@ class AdminCategoryListView(CRUD.AdminPermissionRequiredMixinView, generic.ListV
         """
         function to get the queryset for the view.
         """
-        return forms.Category.objects.all()
+        return forms.Category.objects.archive()
 
     def get_context_data(self, **kwargs):
         """
         function to get the context data for the view.
         """
         context = super().get_context_data(**kwargs)  # noqa
-        categories = forms.Category.objects.all()
+        categories = forms.Category.objects.archive()
         if self.request.user.is_superuser or self.request.user.is_staff:
             context['admin_categories'] = categories
             return context
-        if self.request.user.is_superuser or self.request.user.is_staff or self.request.user.groups.filter(
-                name='Supervisor').exists():
+        if self.request.authz.is_admin_or_staff or self.request.authz.is_supervisor:
             context['supervisor_categories'] = categories
             return context
 
 
-class CategoryDetailView(generic.DetailView):
+class CategoryDetailView(ConditionalGetMixin, generic.DetailView):
     """
     Detail view for a category.
+    Answers 304 while the category tree and the products of the category (with their media and discounts)
+    are unchanged.
     """
     http_method_names = ['get']  # noqa
     model = forms.Category
+    paginate_by = 20
+    validator_lookups = ('update_time', 'media_products__update_time', 'active_discount__update_time')
+    validator_counts = ('id', 'media_products')
 
     def setup(self, request, *args, **kwargs):
         """
@@ -99,6 +106,20 @@ class CategoryDetailView(generic.DetailView):
         self.form_class_search = forms.SearchForm  # noqa
         return super().setup(request, *args, **kwargs)
 
+    def get_validator_queryset(self):
+        """
+        function to get the products checked before rendering, deleted ones included so deletions count.
+        """
+        pk = self.kwargs.get(self.pk_url_kwarg)
+        category_ids = category_tree.get_tree().descendant_ids(pk) or [pk]
+        return forms.Product.soft_delete.filter(category_id__in=category_ids)
+
+    def get_validator_extra(self):
+        """
+        function to get the category tree version, it changes with any category.
+        """
+        return [versioning.get_version(category_tree.TREE_VERSION_KEY)]
+
     def get_object(self, queryset=None):
         """
         function to get the object for the view.
@@ -119,52 +140,43 @@ class CategoryDetailView(generic.DetailView):
         """
         context = super().get_context_data(**kwargs)
         category = self.object
-        related_products = category.category_products.all().filter(is_deleted=False)
-        products_search = category.category_products.all().filter(is_deleted=False)
+        category_ids = category_tree.get_tree().descendant_ids(category.pk) or [category.pk]
+        related_products = forms.Product.objects.for_cards().filter(category_id__in=category_ids)
+        products_search = forms.Product.objects.for_cards().filter(category_id__in=category_ids)
         form_search = self.form_class_search(self.request.GET)
 
-        for product in related_products:
-            product_price = product.price  # noqa
-            latest_discount = product.product_code_discounts.filter(is_expired=False).order_by('-create_time').first()
-            numerical_discount = None  # noqa
-            percentage_discount = None  # noqa
-            product_discount = None
-
-            if latest_discount:
-                numerical_discount = latest_discount.numerical_discount
-                percentage_discount = latest_discount.percentage_discount
-                if numerical_discount and percentage_discount:  # noqa
-                    product_numerical_discount = product_price - numerical_discount
-                    product_percentage_discount = product_price - (product_price * percentage_discount / 100)
-                    if product_numerical_discount < product_percentage_discount:
-                        product_discount = product_numerical_discount
-                        numerical_discount = None
-                        percentage_discount = None
-                if numerical_discount is not None:
-                    product_discount = product_price - numerical_discount
-                if percentage_discount is not None:
-                    product_discount = product_price - (product_price * percentage_discount / 100)
-                if not product_discount and not numerical_discount:
-                    product_discount = None
-
-                product.discount = product_discount
-                context['discount'] = product_discount
         if form_search.is_valid():
             search_query = form_search.cleaned_data.get('search')
-            products_search = products_search.annotate(
-                similarity=TrigramSimilarity('name', search_query) + TrigramSimilarity('description', search_query)
-            ).filter(similarity__gt=0.1).order_by('-similarity')
+            product_ids = search.cached_search_ids(products_search, search_query, scope=f'category:{category.pk}')
+            products_search = IdListPaginator(products_search, product_ids, per_page=self.paginate_by,
+                                              transform=pricing.apply_discounts).get_page_from_request(self.request)
+            related_products = self.paginate_products(related_products, ('-create_time', '-id'), cursor=None)
+            next_page = products_search
+        else:
+            related_products = self.paginate_products(related_products, ('-create_time', '-id'))
+            next_page = related_products
         context['products'] = related_products
         context['form_search'] = form_search
         context['products_search'] = products_search
+        context['next_page_query'] = next_page.next_query(self.request.GET)
 
         return context
 
+    def paginate_products(self, products, ordering, **kwargs):
+        """
+        function to get one keyset page of products, starting after the cursor of the request.
+        """
+        paginator = KeysetPaginator(products, ordering=ordering, per_page=self.paginate_by,
+                                    transform=pricing.apply_discounts)
+        cursor = kwargs.get('cursor', self.request.GET.get(paginator.cursor_param))
+        return paginator.get_page(cursor)
+
 
 class CategoryUpdateView(CRUD.AdminPermissionRequiredMixinView):
     """
     View for updating a category.
     """
+    instance_models = {'category_instance': forms.Category}
 
     def setup(self, request, *args, **kwargs):
         """Initialize the success_url and retrieve the category instance."""
@@ -216,7 +228,7 @@ class CategoryDeleteView(CRUD.AdminPermissionRequiredMixinView, generic.DetailVi
         Handle soft deletion of the category.
         """
         category = self.get_object()
-        forms.Category.soft_delete.filter(pk=category.id).delete()
+        cascade.soft_delete(forms.Category, [category.id], user=request.user)
         messages.success(request, _(f'Category has been successfully soft deleted {category.name}.'),
                          extra_tags='success')
         return redirect('home')
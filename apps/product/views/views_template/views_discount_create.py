@@ -82,19 +82,18 @@ class AdminDiscountListView(CRUD.AdminPermissionRequiredMixinView, generic.ListV
         """
         function to get the queryset for the view.
         """
-        return forms.Discount.objects.all()
+        return forms.Discount.objects.archive()
 
     def get_context_data(self, **kwargs):
         """
         function to get the context data for the view.
         """
         context = super().get_context_data(**kwargs)  # noqa
-        discounts = forms.Discount.objects.all()
+        discounts = forms.Discount.objects.archive()
         if self.request.user.is_superuser or self.request.user.is_staff:
             context['admin_discounts'] = discounts
             return context
-        if self.request.user.is_superuser or self.request.user.is_staff or self.request.user.groups.filter(
-                name='Supervisor').exists():
+        if self.request.authz.is_admin_or_staff or self.request.authz.is_supervisor:
             context['supervisor_discounts'] = discounts
             return context
 
@@ -135,7 +134,7 @@ class DiscountDetailView(CRUD.AdminPermissionRequiredMixinView, DetailView):
         :return: The context data for the view
         """
         context = super().get_context_data(**kwargs)
-        discounts = forms.Discount.objects.all()
+        discounts = forms.Discount.objects.archive()
         context['discounts'] = discounts
         return context
 
@@ -144,6 +143,7 @@ class DiscountUpdateView(CRUD.AdminPermissionRequiredMixinView):
     """
     Update an existing discount.
     """
+    instance_models = {'discount_instance': forms.Discount}
 
     def setup(self, request, *args, **kwargs):
         """
@@ -201,6 +201,6 @@ class DiscountDeleteView(CRUD.AdminPermissionRequiredMixinView, DetailView):
         Handle soft deletion of the discount.
         """
         discount = self.get_object()
-        forms.Discount.objects.filter(pk=discount.id).delete()
+        forms.Discount.soft_delete.filter(pk=discount.id).delete()
         messages.success(request, _(f'Discount has been successfully soft deleted.'), extra_tags='success')
         return redirect('home')
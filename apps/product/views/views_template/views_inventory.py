@@ -4,6 +4,7 @@ from django.contrib import messages
 from django.urls import reverse_lazy
 from django.shortcuts import render, redirect
 from django.utils.translation import gettext_lazy as _
+from apps.core import cascade
 from apps.product.form_data import forms
 from apps.core.permission.template_permission_admin import CRUD
 
@@ -72,8 +73,7 @@ class AdminInventoryListView(CRUD.AdminPermissionRequiredMixinView, generic.List
         if self.request.user.is_superuser or self.request.user.is_staff:
             context['admin_inventories'] = inventory
             return context
-        if self.request.user.is_superuser or self.request.user.is_staff or self.request.user.groups.filter(
-                name='Supervisor').exists():
+        if self.request.authz.is_admin_or_staff or self.request.authz.is_supervisor:
             context['supervisor_inventories'] = inventory
             return context
 
@@ -118,6 +118,7 @@ class InventoryDetailView(CRUD.AdminPermissionRequiredMixinView, generic.DetailV
 
 
 class InventoryUpdateView(CRUD.AdminPermissionRequiredMixinView):
+    instance_models = {'inventory_instance': forms.Inventory}
 
     def setup(self, request, *args, **kwargs):
         """Initialize the success_url and retrieve the warehouse keeper instance."""
@@ -162,6 +163,6 @@ class InventoryDeleteView(CRUD.AdminPermissionRequiredMixinView, DetailView):
         Handle soft deletion of the inventory.
         """
         inventory = self.get_object()
-        forms.Inventory.soft_delete.filter(pk=inventory.id).delete()
+        cascade.soft_delete(forms.Inventory, [inventory.id], user=request.user)
         messages.success(request, _(f'Inventory has been successfully soft deleted.'), extra_tags='success')
         return redirect(self.next_page_home)
@@ -3,8 +3,11 @@ from django.urls import reverse_lazy
 from django.shortcuts import render, redirect
 from django.utils.translation import gettext_lazy as _
 from django.views import generic
+from apps.core import cascade
+from apps.core.mixin.mixin_conditional_get import ConditionalGetMixin
 
 from apps.product.form_data import forms
+from apps.product import pricing
 from apps.product.models import Media
 from apps.product.permission.template_permission_seller_or_admin import CRUD
 
@@ -69,11 +72,10 @@ class AdminOrSellerProductListView(CRUD.SellerOrAdminOrSupervisorDetailPermissio
         function to get the context data for the view.
         """
         context = super().get_context_data(**kwargs)  # noqa
-        products = forms.Product.objects.all()
-        get_product = forms.Product.objects.filter(brand__user=self.request.user)
+        products = forms.Product.objects.archive().for_cards()
+        get_product = forms.Product.objects.archive().for_cards().filter(brand__user=self.request.user)
 
-        if self.request.user.is_superuser or self.request.user.is_staff or self.request.user.groups.filter(  # noqa
-                name='Supervisor').exists():
+        if self.request.authz.is_admin_or_staff or self.request.authz.is_supervisor:
             context['products'] = products
             return context
         if not self.request.user.is_superuser:
@@ -82,12 +84,16 @@ class AdminOrSellerProductListView(CRUD.SellerOrAdminOrSupervisorDetailPermissio
         return context
 
 
-class ProductDetailView(generic.DetailView):
+class ProductDetailView(ConditionalGetMixin, generic.DetailView):
     """
     Detail view for a product.
+    Answers 304 while the product, its category, its media and its active discount are unchanged.
     """
     http_method_names = ['get']  # noqa
     model = forms.Product
+    validator_lookups = ('update_time', 'category__update_time', 'media_products__update_time',
+                         'active_discount__update_time')
+    validator_counts = ('media_products',)
 
     def setup(self, request, *args, **kwargs):
         """
@@ -97,6 +103,12 @@ class ProductDetailView(generic.DetailView):
         self.template_name = 'product/product/product.html'
         return super().setup(request, *args, **kwargs)
 
+    def get_validator_queryset(self):
+        """
+        function to get the rows checked before rendering, see ConditionalGetMixin.
+        """
+        return forms.Product.soft_delete.filter(pk=self.kwargs.get(self.pk_url_kwarg))
+
     def get_object(self, queryset=None):
         """
         function to get the object for the view.
@@ -118,31 +130,7 @@ class ProductDetailView(generic.DetailView):
         context = super().get_context_data(**kwargs)
         products = self.object
 
-        product_price = products.price
-
-        latest_discount = products.product_code_discounts.filter(is_expired=False).order_by('-create_time').first()
-
-        numerical_discount = None
-        percentage_discount = None
-        product_discount = None
-
-        if latest_discount:  # noqa
-            numerical_discount = latest_discount.numerical_discount
-            percentage_discount = latest_discount.percentage_discount
-        if numerical_discount and percentage_discount:  # noqa
-            product_numerical_discount = product_price - numerical_discount
-            product_percentage_discount = product_price - (product_price * percentage_discount / 100)
-            if product_numerical_discount < product_percentage_discount:
-                product_discount = product_numerical_discount
-                numerical_discount = None  # noqa
-                percentage_discount = None  # noqa
-        if numerical_discount is not None:
-            product_discount = product_price - numerical_discount
-        if percentage_discount is not None:
-            product_discount = product_price - (product_price * percentage_discount / 100)
-
-        if not product_discount and not numerical_discount:
-            product_discount = None
+        product_discount = pricing.product_discount(products)
 
         context['product'] = products
         context['discount'] = product_discount
@@ -202,15 +190,15 @@ class ProductDeleteView(CRUD.SellerOrAdminProductUpdateOrDeletePermissionRequire
         """
         Display product details.
         """
-        self.object = self.get_object()  # noqa
+        self.object = self.product_instance  # noqa
         return render(request, self.template_name, {'product': self.object})
 
     def post(self, request, *args, **kwargs):
         """
         Handle soft deletion of the product.
         """
-        product = self.get_object()
-        forms.Product.soft_delete.filter(pk=product.id).delete()
+        product = self.product_instance
+        cascade.soft_delete(forms.Product, [product.id], user=request.user)
         messages.success(request, _(f'Product has been successfully soft deleted {product.name}.'),
                          extra_tags='success')
         return redirect('home')
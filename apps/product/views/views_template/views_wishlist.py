@@ -7,7 +7,8 @@ from django.views import generic
 from apps.product.form_data import forms
 from django.core.signing import Signer
 from apps.product import mixin
-from apps.product.mixin import ProductDiscountMixin
+from apps.product import pricing
+from apps.product.managers import card_prefetch
 
 
 class WishlistAddProductView(mixin.ProductDiscountMixin):
@@ -26,7 +27,8 @@ class WishlistAddProductView(mixin.ProductDiscountMixin):
     def add_product_to_wishlist_authenticated(self):
         """
         function to handle the addition of a product to the wishlist for authenticated users.
-        if the form is valid, it creates or updates the wishlist item for the authenticated user.
+        if the form is valid, it creates the wishlist item of the authenticated user or adds one to its quantity,
+        in a single INSERT ... ON CONFLICT DO UPDATE statement.
         if the form is invalid, it returns an error response with the form errors.
         Returns:
         JsonResponse: Response containing success or error message.
@@ -35,20 +37,8 @@ class WishlistAddProductView(mixin.ProductDiscountMixin):
 
         if form.is_valid():
             try:
-                product_discount = self.calculate_product_discount(self.product_instance,
-                                                                   self.latest_discount)  # Calculate discount
-                total_price = product_discount if product_discount else self.product_instance.price
-
-                wishlist, created = forms.Wishlist.objects.get_or_create(
-                    user=self.request.user,
-                    product=self.product_instance,
-                    defaults={'quantity': 1, 'total_price': total_price}
-                )
-
-                if not created:
-                    wishlist.quantity += 1
-                    wishlist.total_price += total_price
-                    wishlist.save()
+                forms.Wishlist.objects.add_lines(self.request.user.pk, {self.product_instance.pk: 1},
+                                                 pricing.resolve_prices([self.product_instance]))
 
                 response = JsonResponse({'message': _('Product added to wishlist successfully.')})
             except Exception as e:
@@ -87,7 +77,7 @@ class WishlistShowProductView(generic.ListView):
                 total_price = product_data.get('total_price', 0)
                 sum_total_price += total_price
                 product_id = product_data.get('product')
-                product_instance = forms.Product.objects.get(pk=product_id)
+                product_instance = forms.Product.soft_delete.get(pk=product_id)
                 media_instances = product_instance.media_products.all()
                 for media_instance in media_instances:
                     url = media_instance.get_img()
@@ -100,7 +90,8 @@ class WishlistShowProductView(generic.ListView):
         """
         function to handle the show view for wishlist entries for authenticated users.
         """
-        wishlist_items = forms.Wishlist.objects.filter(user=request.user)
+        wishlist_items = list(forms.Wishlist.objects.filter(user=request.user).select_related(
+            'product').prefetch_related(card_prefetch('product__')))
         wishlist_data = {}
         sum_total_price = 0
         pk_product = None
@@ -108,12 +99,7 @@ class WishlistShowProductView(generic.ListView):
             product = item.product
             pk_product = product.pk
             sum_total_price += item.total_price
-            latest_discount_product_price = product.product_code_discounts.filter(is_expired=False,
-                                                                                  is_active=True).order_by(
-                '-create_time').first()
-            calculate = ProductDiscountMixin()
-            product_discount = calculate.calculate_product_discount(product_instance=product,
-                                                                    latest_discount=latest_discount_product_price)
+            product_discount = pricing.product_discount(product)
             wishlist_data[item.product.pk] = {
                 'product': item.product.id,
                 'image_url': product,
@@ -138,9 +124,7 @@ class WishlistUpdateProductView(WishlistAddProductView):
         self.signer = Signer()  # noqa
         self.user_authenticated = request.user.is_authenticated  # noqa
         self.signed_product_id = self.signer.sign(str(self.product_instance.pk))  # noqa
-        self.latest_discount = self.product_instance.product_code_discounts.filter(is_expired=False,  # noqa
-                                                                                   is_active=True).order_by(
-            '-create_time').first()
+        self.latest_discount = pricing.latest_discount(self.product_instance)  # noqa
         self.request_quantity = request.POST.get('quantity')  # noqa
         self.request_total_price = request.POST.get('total_price')  # noqa
         self.form_class = forms.WishlistAddForm  # noqa
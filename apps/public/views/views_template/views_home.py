@@ -1,9 +1,10 @@
-from django.contrib.postgres.search import TrigramSimilarity
-from django.db.models import Q
+from functools import partial
 from django.views import View
 from django.utils import timezone
 from datetime import timedelta
 from apps.product.form_data import forms
+from apps.product import category_tree, pricing, search
+from apps.core.pagination import IdListPaginator, KeysetPaginator
 from django.shortcuts import render
 
 
@@ -12,6 +13,7 @@ class HomeView(View):
     View for displaying home page with categories.
     """
     http_method_names = ['get']
+    paginate_by = 20
 
     def setup(self, request, *args, **kwargs):
         """
@@ -23,54 +25,41 @@ class HomeView(View):
 
     def get_categories(self):  # noqa
         """
-        Retrieve non-deleted categories.
+        Retrieve non-deleted categories from the cached category tree.
         """
-        return forms.Category.objects.filter(is_deleted=False, is_active=True)
+        return list(category_tree.get_tree())
 
     def get_products(self):  # noqa
         """
-        Retrieve non-deleted products.
+        Retrieve live products of active categories.
         """
-        return forms.Product.objects.filter(is_deleted=False, is_active=True, category__is_active=True)
+        return forms.Product.objects.filter(category__is_active=True).for_cards()
 
     def apply_discounts(self, products):  # noqa
         """
         Apply discounts to products if applicable.
         """
-        for product in products:
-            product_price = product.price
-            latest_discount = product.product_code_discounts.filter(is_expired=False, is_active=True).order_by(
-                '-create_time').first()
-            numerical_discount = None
-            percentage_discount = None
-            if latest_discount:
-                numerical_discount = latest_discount.numerical_discount
-                percentage_discount = latest_discount.percentage_discount
-            if numerical_discount and percentage_discount:
-                product_numerical_discount = product_price - numerical_discount
-                product_percentage_discount = product_price - (product_price * percentage_discount / 100)
-                if product_numerical_discount < product_percentage_discount:
-                    product.discount = product_numerical_discount
-                else:
-                    product.discount = product_percentage_discount
-            elif percentage_discount:
-                product.discount = product_price - (product_price * percentage_discount / 100)
-            elif numerical_discount:
-                product.discount = product_price - numerical_discount
-            else:
-                product.discount = None
+        return pricing.apply_discounts(products)
 
     def get_products_search(self, form_search):  # noqa
         """
-        Retrieve products based on search query.
+        Retrieve one page of products matching the search query.
+        The ordered ids come from the search cache and the page is loaded with a single in_bulk lookup.
         """
-        products_search = forms.Product.objects.all().filter(Q(is_deleted=False), Q(is_active=True),
-                                                             Q(category__is_active=True))
+        products_search = forms.Product.objects.for_cards().filter(category__is_active=True)
         search_query = form_search.cleaned_data.get('search')
-        products = products_search.annotate(
-            similarity=TrigramSimilarity('name', search_query) + TrigramSimilarity('description', search_query)
-        ).filter(similarity__gt=0.1).order_by('-similarity')
-        return products
+        product_ids = search.cached_search_ids(products_search, search_query)
+        paginator = IdListPaginator(products_search, product_ids, per_page=self.paginate_by,
+                                    transform=self.apply_discounts)
+        return paginator.get_page_from_request(self.request)
+
+    def paginate_products(self, products, ordering):
+        """
+        Return one keyset page of products, starting after the cursor of the request.
+        """
+        paginator = KeysetPaginator(products, ordering=ordering, per_page=self.paginate_by,
+                                    transform=self.apply_discounts)
+        return paginator.get_page_from_request(self.request)
 
     def get(self, request, *args, **kwargs):
         categories = self.get_categories()
@@ -78,21 +67,22 @@ class HomeView(View):
         products_search = products
         form_search = self.form_class_search(request.GET)
         last_week = timezone.now() - timedelta(days=7)
-        products_new = products.filter(create_time__gte=last_week, is_deleted=False)
-        if self.apply_discounts is not None:
-            self.apply_discounts(products)  # noqa
+        products_new = products.filter(create_time__gte=last_week).order_by(
+            '-create_time', '-id')[:self.paginate_by]
         if form_search.is_valid():
             products_search = self.get_products_search(form_search)
+        else:
+            products_search = self.paginate_products(products_search, ('-create_time', '-id'))
         admin_permissions = None
         admin_or_supervisor = None
         admin_or_seller = None
-        if self.request.user.is_superuser or self.request.user.is_staff:
+        if request.authz.is_admin_or_staff:
             admin_permissions = 'admin'
-        if self.request.user.groups.filter(name='Supervisor').exists():
+        if request.authz.is_supervisor:
             admin_or_supervisor = 'supervisor'
-        if self.request.user.groups.filter(name='Seller').exists():
+        if request.authz.is_seller:
             admin_or_seller = 'seller'
-        permissions = request.user.get_all_permissions()
+        permissions = request.authz.permissions
         return render(request, self.template_home, {
             'seller': admin_or_seller,
             'supervisor': admin_or_supervisor,
@@ -101,5 +91,7 @@ class HomeView(View):
             'categories': categories,
             'products': products_search,
             'products_new': products_new,
+            # Called by the template only when the product grid fragment is not cached.
+            'next_page_query': partial(products_search.next_query, request.GET),
             'form_search': form_search,
         })
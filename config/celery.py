@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from celery.schedules import crontab
 import logging
 
 # Set the Django settings module for the Celery app
@@ -21,3 +22,15 @@ logging.basicConfig(filename=log_file, level=logging.DEBUG)
 # Configure Celery to use Redis as the broker and result backend
 app.conf.broker_url = 'redis://127.0.0.1:6379/0'
 app.conf.result_backend = 'redis://127.0.0.1:6379/0'
+
+# Periodic tasks run by celery beat
+app.conf.beat_schedule = {
+    'expire-discounts': {
+        'task': 'apps.product.tasks.expire_discounts',
+        'schedule': crontab(minute='*/5'),
+    },
+    'release-expired-reservations': {
+        'task': 'apps.order.tasks.release_expired_reservations',
+        'schedule': crontab(minute='*'),
+    },
+}
@@ -40,6 +40,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "apps.core.middlewares.AuthorizationSnapshotMiddleware",
+    "apps.core.middlewares.ExpiredCookiesMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     # 'apps.core.middlewares.LoginRequiredMiddleware',
@@ -83,6 +85,27 @@ JWT_AUTH_ENCRYPT_KEY = b'32 bytes'
 JWT_AUTH_GET_USER_BY_ACCESS_TOKEN = True
 JWT_AUTH_CACHE_USING = True
 
+# Search Handling
+SEARCH_CACHE_TIMEOUT = config("SEARCH_CACHE_TIMEOUT", cast=int, default=300)
+SEARCH_CACHE_MAX_RESULTS = config("SEARCH_CACHE_MAX_RESULTS", cast=int, default=1000)
+
+# Soft Delete Handling
+SOFT_DELETE_CHUNK_SIZE = config("SOFT_DELETE_CHUNK_SIZE", cast=int, default=500)
+
+# Cart Handling
+CART_REDIS_URL = config("CART_REDIS_URL", default="redis://127.0.0.1:6379/1")
+CART_TTL = config("CART_TTL", cast=int, default=604800)
+CART_COOKIE_NAME = config("CART_COOKIE_NAME", default="cart_id")
+
+# Stock Handling
+STOCK_RESERVATION_TTL = config("STOCK_RESERVATION_TTL", cast=int, default=900)
+
+# Image Derivatives
+IMAGE_DERIVATIVE_WIDTHS = (320, 640, 1280)
+IMAGE_MAX_PIXELS = config("IMAGE_MAX_PIXELS", cast=int, default=40_000_000)
+IMAGE_WEBP_QUALITY = config("IMAGE_WEBP_QUALITY", cast=int, default=80)
+IMAGE_JPEG_QUALITY = config("IMAGE_JPEG_QUALITY", cast=int, default=85)
+
 # AWS S3 Configuration
 DEFAULT_FILE_STORAGE = config('DEFAULT_FILE_STORAGE')
 AWS_ACCESS_KEY_ID = config('AWS_ACCESS_KEY_ID')
@@ -103,6 +126,7 @@ if DEBUG:
         "django.contrib.sessions",
         "django.contrib.messages",
         "django.contrib.staticfiles",
+        "django.contrib.postgres",
         # Third-party
         "rest_framework",
         "storages",
@@ -147,6 +171,7 @@ else:
         "jazzmin",  # Third-party
         "django.contrib.auth",
         "django.contrib.contenttypes",
+        "django.contrib.postgres",
         # Third-party
         "rest_framework",
         "storages",